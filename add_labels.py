@@ -4,14 +4,20 @@ Script to add labels to a GitHub repository.
 Usage: python3 add_labels.py [owner] [repo] [github_token]
 Example: python3 add_labels.py bromso connect-the-dots YOUR_GITHUB_TOKEN
 Or set GITHUB_TOKEN environment variable
+
+Existing labels are read once through the HTTP cache (http_cache.py), and
+only labels that are missing or differ are written, so a repeated run costs
+a conditional request that GitHub answers with 304.
 """
 
 import sys
 import os
 import json
-import requests
 import urllib.parse
 
+from http_cache import get_cache
+from profiling import run_main
+
 # Labels to create
 LABELS = [
     {"name": "priority:high", "color": "b60205", "description": "High impact/urgent"},
@@ -32,11 +38,37 @@ LABELS = [
     {"name": "risk:low", "color": "ffd700"}
 ]
 
-def create_or_update_label(owner, repo, label, token):
-    """Create or update a label in the repository."""
+def get_existing_labels(owner, repo, token):
+    """Existing labels as {name: label}, or None if they could not be listed."""
+    labels, _ = get_cache().get_all(f"repos/{owner}/{repo}/labels?per_page=100", token)
+    if labels is None:
+        return None
+    return {label["name"]: label for label in labels}
+
+def label_matches(existing, label):
+    """Whether an existing label already has the wanted color and description."""
+    if existing.get("color", "").lower() != label["color"].lstrip("#").lower():
+        return False
+    # Labels without a description here leave the existing one alone
+    return not label.get("description") or existing.get("description") == label["description"]
+
+def create_or_update_label(owner, repo, label, token, existing_labels=None):
+    """Create or update a label in the repository.
+
+    With `existing_labels` ({name: label}), labels that already match are
+    skipped and existing ones are updated without trying to create them.
+    """
     name = label["name"]
     color = label["color"].lstrip("#")  # Remove # if present
     description = label.get("description", "")
+
+    existing = (existing_labels or {}).get(name)
+    if existing and label_matches(existing, label):
+        print(f"✓ Label up to date: {name}")
+        return True
+
+    # Imported on first use so loading this module stays cheap
+    import requests
     
     url = f"https://api.github.com/repos/{owner}/{repo}/labels"
     headers = {
@@ -52,13 +84,16 @@ def create_or_update_label(owner, repo, label, token):
     if description:
         payload["description"] = description
     
-    # Try to create the label
-    response = requests.post(url, headers=headers, json=payload)
+    # Try to create the label, unless it is known to exist
+    if existing:
+        response = None
+    else:
+        response = requests.post(url, headers=headers, json=payload)
     
-    if response.status_code == 201:
+    if response is not None and response.status_code == 201:
         print(f"✓ Created label: {name}")
         return True
-    elif response.status_code == 422:
+    elif response is None or response.status_code == 422:
         # Label already exists, try to update it
         encoded_name = urllib.parse.quote(name, safe="")
         update_url = f"https://api.github.com/repos/{owner}/{repo}/labels/{encoded_name}"
@@ -76,10 +111,11 @@ def create_or_update_label(owner, repo, label, token):
         print(f"  Response: {response.text}")
         return False
 
-def main():
-    owner = sys.argv[1] if len(sys.argv) > 1 else "bromso"
-    repo = sys.argv[2] if len(sys.argv) > 2 else "connect-the-dots"
-    token = sys.argv[3] if len(sys.argv) > 3 else os.getenv("GITHUB_TOKEN")
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    owner = argv[0] if len(argv) > 0 else "bromso"
+    repo = argv[1] if len(argv) > 1 else "connect-the-dots"
+    token = argv[2] if len(argv) > 2 else os.getenv("GITHUB_TOKEN")
     
     if not token:
         print("Error: GitHub token is required.")
@@ -90,14 +126,18 @@ def main():
     print(f"Adding labels to {owner}/{repo}...")
     print()
     
+    existing_labels = get_existing_labels(owner, repo, token)
+    if existing_labels is None:
+        print("⚠ Could not list existing labels; creating each one")
+    
     success_count = 0
     for label in LABELS:
-        if create_or_update_label(owner, repo, label, token):
+        if create_or_update_label(owner, repo, label, token, existing_labels):
             success_count += 1
     
     print()
     print(f"Done! Successfully processed {success_count}/{len(LABELS)} labels.")
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
 
@@ -4,21 +4,20 @@ Script to add milestones to a GitHub repository.
 Usage: python3 add_milestones.py [owner] [repo] [github_token]
 Example: python3 add_milestones.py bromso uxcel-product-roadmap YOUR_GITHUB_TOKEN
 Or set GITHUB_TOKEN environment variable
+
+Existing milestones are read once through the HTTP cache (http_cache.py),
+and only milestones that are missing or differ are written, so a repeated
+run costs a conditional request that GitHub answers with 304.
 """
 
 import sys
 import os
 import json
-import urllib.parse
 
-# Check if requests is available, otherwise use urllib
-try:
-    import requests
-    USE_REQUESTS = True
-except ImportError:
-    import urllib.request
-    import urllib.error
-    USE_REQUESTS = False
+from http_cache import get_cache
+from profiling import run_main
+
+_requests = None
 
 # Milestones to create
 MILESTONES = [
@@ -54,8 +53,24 @@ MILESTONES = [
     }
 ]
 
+def get_requests():
+    """The requests module if available, otherwise None (use urllib).
+
+    Checked on first use rather than at import time, so loading this module
+    stays cheap when no milestones are created.
+    """
+    global _requests
+    if _requests is None:
+        try:
+            import requests
+            _requests = requests
+        except ImportError:
+            _requests = False
+    return _requests or None
+
 def create_milestone_requests(owner, repo, milestone, token):
     """Create a milestone using the requests library."""
+    requests = get_requests()
     url = f"https://api.github.com/repos/{owner}/{repo}/milestones"
     headers = {
         "Authorization": f"Bearer {token}",
@@ -68,6 +83,9 @@ def create_milestone_requests(owner, repo, milestone, token):
 
 def create_milestone_urllib(owner, repo, milestone, token):
     """Create a milestone using urllib."""
+    import urllib.request
+    import urllib.error
+
     url = f"https://api.github.com/repos/{owner}/{repo}/milestones"
     data = json.dumps(milestone).encode('utf-8')
     
@@ -90,11 +108,65 @@ def create_milestone_urllib(owner, repo, milestone, token):
             'json': lambda: {}
         })()
 
-def create_or_update_milestone(owner, repo, milestone, token):
-    """Create or update a milestone in the repository."""
+def get_existing_milestones(owner, repo, token):
+    """Existing milestones (open and closed) as {title: milestone}, or None on failure."""
+    milestones, _ = get_cache().get_all(f"repos/{owner}/{repo}/milestones?state=all&per_page=100", token)
+    if milestones is None:
+        return None
+    return {m["title"]: m for m in milestones}
+
+def milestone_matches(existing, milestone):
+    """Whether an existing milestone already has the wanted description and due date."""
+    # GitHub stores the due date only, so compare dates rather than timestamps
+    due_on = (existing.get("due_on") or "")[:10]
+    return ((existing.get("description") or "") == milestone.get("description", "")
+            and due_on == (milestone.get("due_on") or "")[:10])
+
+def update_milestone(owner, repo, number, milestone, token):
+    """Update an existing milestone. Returns the HTTP status code."""
+    url = f"https://api.github.com/repos/{owner}/{repo}/milestones/{number}"
+    requests = get_requests()
+    if requests:
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json"
+        }
+        return requests.patch(url, headers=headers, json=milestone).status_code
+
+    import urllib.request
+    import urllib.error
+
+    req = urllib.request.Request(url, data=json.dumps(milestone).encode('utf-8'), method='PATCH')
+    req.add_header("Authorization", f"Bearer {token}")
+    req.add_header("Accept", "application/vnd.github+json")
+    req.add_header("Content-Type", "application/json")
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.getcode()
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def create_or_update_milestone(owner, repo, milestone, token, existing_milestones=None):
+    """Create or update a milestone in the repository.
+
+    With `existing_milestones` ({title: milestone}), milestones that already
+    match are skipped and existing ones are updated without trying to
+    create them.
+    """
     title = milestone["title"]
-    
-    if USE_REQUESTS:
+    existing = (existing_milestones or {}).get(title)
+    if existing:
+        if milestone_matches(existing, milestone):
+            print(f"✓ Milestone up to date: {title}")
+            return True
+        status = update_milestone(owner, repo, existing["number"], milestone, token)
+        if status == 200:
+            print(f"✓ Updated milestone: {title}")
+            return True
+        print(f"✗ Failed to update milestone: {title} (HTTP {status})")
+        return False
+
+    if get_requests():
         response = create_milestone_requests(owner, repo, milestone, token)
     else:
         response = create_milestone_urllib(owner, repo, milestone, token)
@@ -103,24 +175,11 @@ def create_or_update_milestone(owner, repo, milestone, token):
         print(f"✓ Created milestone: {title}")
         return True
     elif response.status_code == 422:
-        # Milestone might already exist, try to update it
-        # First, get existing milestones to find the number
-        if USE_REQUESTS:
-            list_url = f"https://api.github.com/repos/{owner}/{repo}/milestones"
-            list_headers = {
-                "Authorization": f"Bearer {token}",
-                "Accept": "application/vnd.github+json"
-            }
-            list_response = requests.get(list_url, headers=list_headers)
-            if list_response.status_code == 200:
-                existing = [m for m in list_response.json() if m["title"] == title]
-                if existing:
-                    milestone_num = existing[0]["number"]
-                    update_url = f"https://api.github.com/repos/{owner}/{repo}/milestones/{milestone_num}"
-                    update_response = requests.patch(update_url, headers=list_headers, json=milestone)
-                    if update_response.status_code == 200:
-                        print(f"✓ Updated milestone: {title}")
-                        return True
+        # Milestone might already exist (created since it was listed), try to update it
+        existing = (get_existing_milestones(owner, repo, token) or {}).get(title)
+        if existing and update_milestone(owner, repo, existing["number"], milestone, token) == 200:
+            print(f"✓ Updated milestone: {title}")
+            return True
         
         print(f"✗ Failed to create milestone: {title} (already exists or invalid)")
         return False
@@ -133,10 +192,11 @@ def create_or_update_milestone(owner, repo, milestone, token):
             pass
         return False
 
-def main():
-    owner = sys.argv[1] if len(sys.argv) > 1 else "bromso"
-    repo = sys.argv[2] if len(sys.argv) > 2 else "uxcel-product-roadmap"
-    token = sys.argv[3] if len(sys.argv) > 3 else os.getenv("GITHUB_TOKEN")
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    owner = argv[0] if len(argv) > 0 else "bromso"
+    repo = argv[1] if len(argv) > 1 else "uxcel-product-roadmap"
+    token = argv[2] if len(argv) > 2 else os.getenv("GITHUB_TOKEN")
     
     if not token:
         print("Error: GitHub token is required.")
@@ -147,14 +207,18 @@ def main():
     print(f"Adding milestones to {owner}/{repo}...")
     print()
     
+    existing_milestones = get_existing_milestones(owner, repo, token)
+    if existing_milestones is None:
+        print("⚠ Could not list existing milestones; creating each one")
+    
     success_count = 0
     for milestone in MILESTONES:
-        if create_or_update_milestone(owner, repo, milestone, token):
+        if create_or_update_milestone(owner, repo, milestone, token, existing_milestones):
             success_count += 1
     
     print()
     print(f"Done! Successfully processed {success_count}/{len(MILESTONES)} milestones.")
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
 
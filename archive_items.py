@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Archive stale project items.
+Archived items drop out of every paginated scan, so fetch time stops
+growing with the project's history. Items are selected from a snapshot by
+policy:
+  done         Status is Done and the item has not changed for --done-days
+  drafts       draft issues with no activity for --draft-days
+  closed-epic  closed (or Done) items whose Epic Link names a closed (or
+               Done) Epic by issue number or exact title; fuzzy matches and
+               items still open are listed for review instead, unless
+               --include-open asks for the open ones too
+The project's items are held as an ItemStore (see item_records.py), so
+large projects fit in a fraction of the raw snapshot's memory. Matching
+items are archived with batched archiveProjectV2Item mutations.
+Every archive run is recorded in the local cache, and --undo unarchives the
+items of the last (or a given) run.
+Usage: python3 archive_items.py [owner] [project_number] [epics_project_number]
+                                [--policy done,drafts,closed-epic] [--snapshot FILE] [--include-open]
+                                [--dry-run]
+       python3 archive_items.py [owner] [project_number] --undo [RUN]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from epic_resolver import EpicResolver
+from github_api import cache_path, graphql_value, run_mutations
+from item_records import ItemStore
+from profiling import run_main, span
+from project_snapshot import is_epic_item, item_field_values, load_or_fetch_snapshot
+
+POLICIES = ['done', 'drafts', 'closed-epic']
+DEFAULT_DONE_DAYS = 30
+DEFAULT_DRAFT_DAYS = 90
+LOG_FILE = 'archive_log_{owner}_{project_number}.json'
+
+def parse_timestamp(value):
+    """Parse a GitHub ISO 8601 timestamp, or None."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def last_activity(record):
+    """Latest update of an item record or its content."""
+    stamps = [parse_timestamp(record.updated_at), parse_timestamp(record.content_updated_at)]
+    stamps = [stamp for stamp in stamps if stamp]
+    return max(stamps) if stamps else None
+
+def is_draft(record):
+    """Draft issues have content without an issue number."""
+    return record.content_id is not None and record.number is None
+
+def is_open_record(record):
+    """item_is_open for an item record."""
+    return record.state != 'CLOSED' and record.get('Status') != 'Done'
+
+def is_epic_record(record):
+    """is_epic_item for an item record."""
+    return 'EPIC:' in (record.title or '').upper() or record.get('Work Item Type') == 'Epic'
+
+def epic_is_closed(epic_item):
+    content = epic_item.get('content') or {}
+    return content.get('state') == 'CLOSED' or item_field_values(epic_item).get('Status') == 'Done'
+
+def select_items(records, policies, now, done_days=DEFAULT_DONE_DAYS, draft_days=DEFAULT_DRAFT_DAYS, epic_items=(),
+                 include_open=False):
+    """Item records to archive, first matching policy wins.
+
+    Returns (selected, review): selected as (record, policy, reason), and
+    the closed-epic matches that are left alone as (record, reason), either
+    because the Epic Link only matched fuzzily or because the item is still
+    open (unless include_open).
+    """
+    done_before = now - timedelta(days=done_days)
+    draft_before = now - timedelta(days=draft_days)
+    resolver = EpicResolver.from_items(epic_items) if 'closed-epic' in policies and epic_items else None
+
+    selected = []
+    review = []
+    for record in records:
+        activity = last_activity(record)
+        epic_link = record.get('Epic Link')
+        if 'done' in policies and record.get('Status') == 'Done' and activity and activity < done_before:
+            selected.append((record, 'done', f"Done, unchanged since {activity.date()}"))
+        elif 'drafts' in policies and is_draft(record) and activity and activity < draft_before:
+            selected.append((record, 'drafts', f"draft, no activity since {activity.date()}"))
+        elif resolver is not None and epic_link and not is_epic_record(record):
+            epic, score = resolver.resolve(epic_link)
+            if not epic or not epic_is_closed(epic['item']):
+                continue
+            reason = f"Epic closed: {epic['title']}"
+            if score < 1.0:
+                review.append((record, f"{reason}; fuzzy match of \"{epic_link}\" ({score:.2f})"))
+            elif is_open_record(record) and not include_open:
+                review.append((record, f"{reason}; item still open"))
+            else:
+                selected.append((record, 'closed-epic', reason))
+    return selected, review
+
+def archive_mutation(project_id, item_id, undo=False):
+    """Build an archiveProjectV2Item (or unarchiveProjectV2Item) mutation field."""
+    name = 'unarchiveProjectV2Item' if undo else 'archiveProjectV2Item'
+    arguments = graphql_value({'projectId': project_id, 'itemId': item_id})
+    return f'{name}(input: {arguments}) {{ item {{ id }} }}'
+
+def load_log(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_log(path, runs):
+    with open(path, 'w') as f:
+        json.dump(runs, f, indent=2)
+
+def undo(log_file, run_id):
+    """Unarchive the items of one recorded run (the last one not yet undone by default)."""
+    runs = load_log(log_file)
+    pending = [run for run in runs if not run.get('undone')]
+    if run_id != 'last':
+        pending = [run for run in pending if run['run'] == run_id]
+    if not pending:
+        print("Nothing to undo")
+        sys.exit(1)
+    run = pending[-1]
+
+    print(f"Unarchiving {len(run['items'])} items archived in run {run['run']}...")
+    results = run_mutations([archive_mutation(run['project_id'], entry['id'], undo=True) for entry in run['items']])
+    restored = sum(1 for result in results if result)
+    for entry, result in zip(run['items'], results):
+        print(f"  {'✓' if result else '✗'} {entry['title']}")
+    if restored == len(run['items']):
+        run['undone'] = True
+    else:
+        run['items'] = [entry for entry, result in zip(run['items'], results) if not result]
+    save_log(log_file, runs)
+    print()
+    print(f"Done! Unarchived {restored}/{len(results)} items.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Archive stale project items, or undo an archive run.')
+    parser.add_argument('owner', nargs='?', default='bromso')
+    parser.add_argument('project_number', nargs='?', default='17')
+    parser.add_argument('epics_project_number', nargs='?', default='18')
+    parser.add_argument('--policy', default=','.join(POLICIES), help=f"comma-separated policies from: {', '.join(POLICIES)}")
+    parser.add_argument('--done-days', type=int, default=DEFAULT_DONE_DAYS, help='archive Done items unchanged for this many days')
+    parser.add_argument('--draft-days', type=int, default=DEFAULT_DRAFT_DAYS, help='archive drafts inactive for this many days')
+    parser.add_argument('--snapshot', help='read items from a saved snapshot instead of the API')
+    parser.add_argument('--epics-snapshot', help='read Epics from a saved snapshot (closed-epic policy)')
+    parser.add_argument('--include-open', action='store_true',
+                        help='closed-epic: also archive items that are still open')
+    parser.add_argument('--dry-run', action='store_true', help='report matching items without archiving them')
+    parser.add_argument('--undo', nargs='?', const='last', metavar='RUN', help='unarchive the items of the last (or a given) run')
+    args = parser.parse_args(argv)
+
+    log_file = cache_path(LOG_FILE.format(owner=args.owner, project_number=args.project_number))
+    if args.undo:
+        undo(log_file, args.undo)
+        return
+
+    policies = args.policy.split(',')
+    unknown = [policy for policy in policies if policy not in POLICIES]
+    if unknown:
+        parser.error(f"unknown policies: {', '.join(unknown)}")
+
+    snapshot = load_or_fetch_snapshot(args.owner, args.project_number, args.snapshot)
+    if snapshot is None:
+        sys.exit(1)
+    with span('index'):
+        # The raw item dicts are released once the store holds them
+        records = ItemStore.from_items(snapshot.pop('items'))
+    epic_items = []
+    if 'closed-epic' in policies:
+        epics_snapshot = load_or_fetch_snapshot(args.owner, args.epics_project_number, args.epics_snapshot)
+        if epics_snapshot is None:
+            sys.exit(1)
+        epic_items = [item for item in epics_snapshot['items'] if is_epic_item(item)]
+    print()
+
+    with span('diff'):
+        selected, review = select_items(records, policies, datetime.now(timezone.utc),
+                                        args.done_days, args.draft_days, epic_items, args.include_open)
+
+    for policy in policies:
+        matches = [(record, reason) for record, record_policy, reason in selected if record_policy == policy]
+        print(f"{policy}: {len(matches)} items")
+        for record, reason in matches:
+            print(f"  - {record.title or record.id} ({reason})")
+    if review:
+        print(f"needs review (not archived): {len(review)} items")
+        for record, reason in review:
+            print(f"  ? {record.title or record.id} ({reason})")
+    print()
+
+    if args.dry_run:
+        print(f"Dry run: {len(selected)} of {len(records)} items would be archived.")
+        return
+
+    project_id = snapshot['project_id']
+    results = run_mutations([archive_mutation(project_id, record.id) for record, _, _ in selected])
+    archived = [
+        {'id': record.id, 'title': record.title or '', 'policy': policy}
+        for (record, policy, _), result in zip(selected, results) if result
+    ]
+    if archived:
+        run_id = time.strftime('%Y%m%d-%H%M%S')
+        runs = load_log(log_file)
+        runs.append({'run': run_id, 'project_id': project_id, 'items': archived})
+        save_log(log_file, runs)
+        print(f"Recorded as run {run_id}; undo with --undo {run_id}")
+    print(f"Done! Archived {len(archived)}/{len(selected)} items.")
+
+if __name__ == '__main__':
+    run_main(main)
@@ -11,6 +11,8 @@ import urllib.request
 import urllib.error
 import urllib.parse
 
+from profiling import run_main
+
 def make_graphql_request(query, token):
     """Make a GraphQL request to GitHub API."""
     url = "https://api.github.com/graphql"
@@ -192,10 +194,11 @@ def add_field_to_project(project_id, field_name, field_type, token, options=None
         return field_data.get("id")
     return None
 
-def main():
-    owner = sys.argv[1] if len(sys.argv) > 1 else "bromso"
-    project_number = sys.argv[2] if len(sys.argv) > 2 else "17"
-    token = sys.argv[3] if len(sys.argv) > 3 else os.getenv("GITHUB_TOKEN")
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    owner = argv[0] if len(argv) > 0 else "bromso"
+    project_number = argv[1] if len(argv) > 1 else "17"
+    token = argv[2] if len(argv) > 2 else os.getenv("GITHUB_TOKEN")
     
     if not token:
         print("Error: GitHub token is required.")
@@ -255,5 +258,5 @@ def main():
     print("Done!")
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
 
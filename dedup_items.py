@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Find and merge duplicate project items.
+Exact duplicates share a hash of their normalized title and body. Near
+duplicates are found with MinHash signatures and locality-sensitive
+hashing: only items that agree on a whole band of their signature are
+compared, so the cost grows with the number of items rather than the number
+of pairs. Signatures use one-permutation hashing (each shingle is hashed
+once and kept as the minimum of one of K bins, empty bins borrowing from
+the next one), which keeps signing cheap without NumPy. Shingles are hashed
+with a fixed-key BLAKE2b rather than hash(), which is randomized per
+process, so a --dry-run finds the same candidates as the --merge after it.
+Candidate pairs are confirmed with the exact Jaccard similarity of their
+shingles.
+
+Shingles are character trigrams of the title plus word pairs of the body.
+With --merge, each cluster keeps its lowest-numbered open issue. Clusters
+chain (A like B and B like C does not make A like C), so only members that
+meet --threshold against the keeper itself are merged: the keeper copies
+the field values it is missing from them, and their issues are closed as
+duplicates and their items archived. The other members are only listed.
+Usage: python3 dedup_items.py [owner] [project_number] [--threshold 0.8] [--snapshot FILE]
+                              [--merge] [--dry-run]
+"""
+
+import argparse
+import hashlib
+import re
+import sys
+
+from archive_items import archive_mutation
+from github_api import field_value_mutation, get_project_id, graphql_value, run_mutations
+from item_paginator import fetch_project_items, require_complete
+from profiling import run_main, span
+from project_snapshot import ITEM_NODE_FIELDS, get_project_fields, item_field_values, load_snapshot
+
+SIGNATURE_BINS = 64
+BANDS = 16
+ROWS = SIGNATURE_BINS // BANDS
+DEFAULT_THRESHOLD = 0.8
+MASK = (1 << 64) - 1
+EMPTY = MASK
+MERGEABLE_TYPES = {'TEXT', 'NUMBER', 'DATE', 'SINGLE_SELECT', 'ITERATION'}
+
+# Snapshot fields plus issue and draft bodies
+DEDUP_NODE_FIELDS = ITEM_NODE_FIELDS.replace('''
+                      title
+                      state''', '''
+                      title
+                      body
+                      state''').replace('''
+                      title
+                      updatedAt
+                    }
+                  }''', '''
+                      title
+                      body
+                      updatedAt
+                    }
+                  }''')
+
+def words(text):
+    return re.findall(r'[a-z0-9]+', (text or '').lower())
+
+def shingles(title_words, body_words):
+    """Title character trigrams and body word pairs, as one set."""
+    padded = f"  {' '.join(title_words)} "
+    result = {padded[i:i + 3] for i in range(len(padded) - 2)}
+    result.update(f'{a} {b}\t' for a, b in zip(body_words, body_words[1:]))
+    return result
+
+def exact_key(title_words, body_words):
+    """Hash of the normalized title and body."""
+    text = ' '.join(title_words) + '\n' + ' '.join(body_words)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def feature_hash(feature):
+    """Stable 64-bit hash of a shingle, the same in every process."""
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def minhash(features):
+    """One-permutation MinHash signature of a set of strings."""
+    signature = [EMPTY] * SIGNATURE_BINS
+    for feature in features:
+        value = feature_hash(feature)
+        bin_index = value % SIGNATURE_BINS
+        value //= SIGNATURE_BINS
+        if value < signature[bin_index]:
+            signature[bin_index] = value
+    # Densify: an empty bin takes the value of the next non-empty one
+    if EMPTY in signature and any(value != EMPTY for value in signature):
+        for i in range(SIGNATURE_BINS):
+            if signature[i] == EMPTY:
+                j = (i + 1) % SIGNATURE_BINS
+                while signature[j] == EMPTY:
+                    j = (j + 1) % SIGNATURE_BINS
+                signature[i] = signature[j] + 1 + (j - i) % SIGNATURE_BINS
+    return signature
+
+def similarity(a, b):
+    """Jaccard similarity of two shingle sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class DisjointSet:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+def find_clusters(items, threshold=DEFAULT_THRESHOLD):
+    """Group items into duplicate clusters of two or more.
+
+    Returns (clusters, features): clusters is a list of lists of item
+    indexes, largest first, and features each item's shingle set (None for
+    items without text), for checking members against a keeper.
+    """
+    sets = DisjointSet(len(items))
+    exact = {}
+    buckets = {}
+    features = []
+
+    with span('index'):
+        for index, item in enumerate(items):
+            content = item.get('content') or {}
+            title_words, body_words = words(content.get('title')), words(content.get('body'))
+            if not title_words and not body_words:
+                features.append(None)
+                continue
+            key = exact_key(title_words, body_words)
+            if key in exact:
+                sets.union(exact[key], index)
+            else:
+                exact[key] = index
+            item_features = shingles(title_words, body_words)
+            features.append(item_features)
+            signature = minhash(item_features)
+            for band in range(BANDS):
+                bucket_key = (band, tuple(signature[band * ROWS:(band + 1) * ROWS]))
+                buckets.setdefault(bucket_key, []).append(index)
+
+    with span('diff'):
+        for members in buckets.values():
+            # Compare each member with the bucket's first and previous member
+            # rather than every pair; shared bands and the union-find connect the rest
+            for position in range(1, len(members)):
+                index = members[position]
+                for other in {members[0], members[position - 1]}:
+                    if sets.find(index) != sets.find(other) and similarity(features[index], features[other]) >= threshold:
+                        sets.union(index, other)
+
+    clusters = {}
+    for index in range(len(items)):
+        if features[index] is not None:
+            clusters.setdefault(sets.find(index), []).append(index)
+    return sorted((members for members in clusters.values() if len(members) > 1), key=len, reverse=True), features
+
+def choose_keeper(cluster_items):
+    """The item to keep: the lowest-numbered open issue, or None."""
+    open_issues = [item for item in cluster_items
+                   if (item.get('content') or {}).get('number') is not None
+                   and (item.get('content') or {}).get('state') != 'CLOSED']
+    if not open_issues:
+        return None
+    return min(open_issues, key=lambda item: item['content']['number'])
+
+def field_value_input(fv, field):
+    """ProjectV2FieldValue input reproducing a field value node, or None."""
+    data_type = field.get('dataType')
+    if data_type == 'TEXT' and 'text' in fv:
+        return {'text': fv['text']}
+    if data_type == 'NUMBER' and 'number' in fv:
+        return {'number': fv['number']}
+    if data_type == 'DATE' and 'date' in fv:
+        return {'date': fv['date']}
+    if data_type == 'SINGLE_SELECT' and fv.get('optionId'):
+        return {'singleSelectOptionId': fv['optionId']}
+    if data_type == 'ITERATION' and fv.get('iterationId'):
+        return {'iterationId': fv['iterationId']}
+    return None
+
+def merge_mutations(project_id, keeper, duplicates, fields):
+    """Mutations merging duplicates into the keeper, with a description of each."""
+    mutations = []
+    present = set(item_field_values(keeper))
+    for duplicate in duplicates:
+        for fv in (duplicate.get('fieldValues') or {}).get('nodes', []):
+            name = (fv.get('field') or {}).get('name')
+            field = fields.get(name)
+            if not field or name in present or field.get('dataType') not in MERGEABLE_TYPES:
+                continue
+            value = field_value_input(fv, field)
+            if value is None:
+                continue
+            present.add(name)
+            mutations.append((f"copy {name} from {describe(duplicate)}",
+                              field_value_mutation(project_id, keeper['id'], field['id'], value)))
+
+    for duplicate in duplicates:
+        content = duplicate.get('content') or {}
+        if content.get('number') is not None and content.get('state') != 'CLOSED':
+            arguments = graphql_value({'issueId': content['id']})
+            # stateReason is an enum, so it is added outside graphql_value's string quoting
+            mutations.append((f"close {describe(duplicate)} as a duplicate",
+                              f'closeIssue(input: {arguments[:-1]}, stateReason: DUPLICATE}}) {{ issue {{ id }} }}'))
+        mutations.append((f"archive {describe(duplicate)}", archive_mutation(project_id, duplicate['id'])))
+    return mutations
+
+def describe(item):
+    content = item.get('content') or {}
+    number = content.get('number')
+    return f"#{number}" if number is not None else f"draft '{content.get('title', '')}'"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find and merge duplicate project items.')
+    parser.add_argument('owner', nargs='?', default='bromso')
+    parser.add_argument('project_number', nargs='?', default='17')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='minimum Jaccard similarity of near duplicates (0-1)')
+    parser.add_argument('--snapshot', help='read items from a saved snapshot (titles only unless it has bodies)')
+    parser.add_argument('--merge', action='store_true', help='merge each cluster into its lowest-numbered open issue')
+    parser.add_argument('--dry-run', action='store_true', help='with --merge, list the merge steps without writing them')
+    args = parser.parse_args(argv)
+
+    if args.snapshot:
+        snapshot = load_snapshot(args.snapshot)
+        print(f"Loaded snapshot from {args.snapshot}")
+    else:
+        project_id, project_title = get_project_id(args.owner, args.project_number)
+        if not project_id:
+            print("Failed to get project ID")
+            sys.exit(1)
+        print(f"Project: {project_title} (ID: {project_id})")
+        items = fetch_project_items(project_id, DEDUP_NODE_FIELDS)
+        require_complete(items)
+        snapshot = {'project_id': project_id, 'fields': get_project_fields(project_id), 'items': items}
+
+    items = snapshot['items']
+    clusters, features = find_clusters(items, args.threshold)
+    print(f"Found {len(clusters)} duplicate clusters covering {sum(len(c) for c in clusters)} of {len(items)} items")
+    print()
+
+    mutations = []
+    for cluster in clusters:
+        cluster_items = [items[index] for index in cluster]
+        keeper = choose_keeper(cluster_items)
+        keeper_index = next((index for index in cluster if items[index] is keeper), None)
+        # Closing and archiving can't be undone here, so each duplicate must
+        # be similar enough to the keeper itself, not just to another member
+        duplicates = []
+        print(f"Cluster of {len(cluster)}:")
+        for index, item in zip(cluster, cluster_items):
+            content = item.get('content') or {}
+            label = f"#{content['number']}" if content.get('number') is not None else 'draft'
+            state = f" [{content['state'].lower()}]" if content.get('state') else ''
+            if item is keeper:
+                marker, note = '*', ''
+            elif keeper is None:
+                marker, note = '-', ''
+            else:
+                score = similarity(features[keeper_index], features[index])
+                if score >= args.threshold:
+                    duplicates.append(item)
+                    marker, note = '-', f" ({score:.2f})"
+                else:
+                    marker, note = '?', f" ({score:.2f} to the keeper; not merged)"
+            print(f"  {marker} {label} {content.get('title', '')}{state}{note}")
+        if not args.merge:
+            continue
+        if keeper is None:
+            print("  ⚠ No open issue to keep; skipping merge")
+            continue
+        if not duplicates:
+            print("  ⚠ No member is similar enough to the keeper; skipping merge")
+            continue
+        cluster_mutations = merge_mutations(snapshot['project_id'], keeper, duplicates, snapshot['fields'])
+        for description, _ in cluster_mutations:
+            print(f"    → {description}")
+        mutations.extend(cluster_mutations)
+
+    if not args.merge:
+        return
+    print()
+    if args.dry_run:
+        print(f"Dry run: {len(mutations)} merge steps would be written.")
+        return
+
+    results = run_mutations([mutation for _, mutation in mutations])
+    for (description, _), result in zip(mutations, results):
+        if not result:
+            print(f"  ✗ Failed to {description}")
+    print(f"Done! {sum(1 for r in results if r)}/{len(mutations)} merge steps succeeded.")
+
+if __name__ == '__main__':
+    run_main(main)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Build the dependency graph from the "Depends On" field and mark blocked items.
+Parses "#12, #45" references for every item into an adjacency-list graph over
+issue numbers, reports cycles and topological order, and sets Status to
+"Blocked" (in batched mutations) for items with open blockers.
+Usage: python3 dependency_graph.py [owner] [project_number] [--snapshot FILE] [--dry-run]
+"""
+
+import argparse
+import re
+import sys
+import time
+
+from epic_resolver import parse_issue_reference
+from github_api import field_value_mutation, run_mutations
+from profiling import run_main, span
+from project_snapshot import item_field_values, item_is_open, load_or_fetch_snapshot
+
+DEPENDS_ON_FIELD = 'Depends On'
+STATUS_FIELD = 'Status'
+BLOCKED_STATUS = 'Blocked'
+
+def parse_depends_on(text):
+    """Parse a Depends On value ("#12, #45") into a list of issue numbers."""
+    numbers = []
+    for part in re.split(r'[,;\s]+', text or ''):
+        number = parse_issue_reference(part)
+        if number is not None and number not in numbers:
+            numbers.append(number)
+    return numbers
+
+class DependencyGraph:
+    """Dependency graph over issue numbers, kept in topological order.
+
+    Edges point from a blocker to the items it blocks. The topological order
+    is maintained incrementally (Pearce-Kelly): adding an edge only reorders
+    the nodes between its two endpoints. Edges that would close a cycle are
+    kept in the graph but left out of the order until the cycle is broken.
+    """
+
+    def __init__(self):
+        self.blockers = {}
+        self.dependents = {}
+        self.open = {}
+        self.position = {}
+        self.cyclic = set()
+        self.closure = {}
+        self.next_position = 0
+
+    @classmethod
+    def from_items(cls, items):
+        """Build the graph from snapshot items in one pass."""
+        graph = cls()
+        with span('index'):
+            for item in items:
+                number = (item.get('content') or {}).get('number')
+                if number is None:
+                    continue
+                depends_on = parse_depends_on(item_field_values(item).get(DEPENDS_ON_FIELD))
+                graph._add_node(number)
+                graph.open[number] = item_is_open(item)
+                for blocker in depends_on:
+                    graph._add_node(blocker)
+                    graph.blockers[number].add(blocker)
+                    graph.dependents[blocker].add(number)
+            graph._order_all()
+        return graph
+
+    def __len__(self):
+        return len(self.blockers)
+
+    def _add_node(self, number):
+        if number not in self.blockers:
+            self.blockers[number] = set()
+            self.dependents[number] = set()
+            self.position[number] = self.next_position
+            self.next_position += 1
+
+    def _order_all(self):
+        """Assign a topological order to the whole graph (Kahn's algorithm)."""
+        indegree = {number: len(blockers) for number, blockers in self.blockers.items()}
+        ready = [number for number, degree in indegree.items() if degree == 0]
+        order = []
+        while ready:
+            number = ready.pop()
+            order.append(number)
+            for dependent in self.dependents[number]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+
+        ordered = set(order)
+        leftover = [number for number in self.blockers if number not in ordered]
+        self.position = {number: i for i, number in enumerate(order + leftover)}
+        self.next_position = len(self.position)
+
+        # Nodes left over sit on or behind a cycle. Give them an arbitrary
+        # order, then place their edges one by one so that only the edges
+        # actually closing a cycle end up excluded from the order.
+        if leftover:
+            pending = [(b, n) for n in leftover for b in self.blockers[n] if b not in ordered]
+            for edge in pending:
+                self.cyclic.add(edge)
+            for edge in pending:
+                self.cyclic.discard(edge)
+                self._place_edge(*edge)
+
+    def _place_edge(self, blocker, dependent):
+        """Fit an existing edge into the order, or mark it cyclic."""
+        lower, upper = self.position[dependent], self.position[blocker]
+        if lower > upper:
+            return
+        if blocker == dependent:
+            self.cyclic.add((blocker, dependent))
+            return
+
+        forward = self._search(dependent, self.dependents, lambda n: self.position[n] <= upper, blocker)
+        if forward is None:
+            self.cyclic.add((blocker, dependent))
+            return
+        backward = self._search(blocker, self.blockers, lambda n: self.position[n] >= lower)
+
+        backward.sort(key=self.position.get)
+        forward.sort(key=self.position.get)
+        slots = sorted(self.position[n] for n in backward + forward)
+        for number, slot in zip(backward + forward, slots):
+            self.position[number] = slot
+
+    def _search(self, start, edges, in_bounds, target=None):
+        """Collect nodes reachable over ordered edges within bounds.
+
+        Returns None if `target` is reached (the new edge would close a cycle).
+        """
+        seen = {start}
+        stack = [start]
+        while stack:
+            number = stack.pop()
+            for other in edges[number]:
+                edge = (number, other) if edges is self.dependents else (other, number)
+                if other in seen or edge in self.cyclic or not in_bounds(other):
+                    continue
+                if other == target:
+                    return None
+                seen.add(other)
+                stack.append(other)
+        return list(seen)
+
+    def _invalidate(self, number):
+        """Drop cached transitive blockers of a node and everything it blocks."""
+        if not self.closure:
+            return
+        seen = {number}
+        stack = [number]
+        while stack:
+            current = stack.pop()
+            self.closure.pop(current, None)
+            for dependent in self.dependents.get(current, ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    stack.append(dependent)
+
+    def set_item(self, number, depends_on, is_open=True):
+        """Add or update one item, adjusting the order incrementally."""
+        self._add_node(number)
+        self.open[number] = is_open
+        old, new = self.blockers[number], set(depends_on)
+        if old == new:
+            return
+
+        self._invalidate(number)
+        for blocker in old - new:
+            self.blockers[number].discard(blocker)
+            self.dependents[blocker].discard(number)
+            if (blocker, number) in self.cyclic:
+                self.cyclic.discard((blocker, number))
+            elif self.cyclic:
+                # Removing an ordered edge may let a deferred edge back in.
+                for edge in list(self.cyclic):
+                    self.cyclic.discard(edge)
+                    self._place_edge(*edge)
+        for blocker in new - old:
+            self._add_node(blocker)
+            self.blockers[number].add(blocker)
+            self.dependents[blocker].add(number)
+            self._place_edge(blocker, number)
+
+    def remove_item(self, number):
+        """Forget an item's own dependencies (it may still block others)."""
+        if number in self.blockers:
+            self.set_item(number, [], is_open=False)
+            self.open.pop(number, None)
+
+    def topological_order(self):
+        """Issue numbers with every blocker before the items it blocks."""
+        return sorted(self.position, key=self.position.get)
+
+    def find_cycles(self):
+        """Return dependency cycles as lists of issue numbers."""
+        if not self.cyclic:
+            return []
+
+        # Tarjan's strongly connected components, iteratively
+        index, lowlink, on_stack = {}, {}, set()
+        stack, cycles, counter = [], [], 0
+        for root in {edge[1] for edge in self.cyclic}:
+            if root in index:
+                continue
+            work = [(root, iter(self.blockers[root]))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                number, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.blockers[child])))
+                        break
+                    if child in on_stack:
+                        lowlink[number] = min(lowlink[number], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[number])
+                    if lowlink[number] == index[number]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == number:
+                                break
+                        if len(component) > 1 or number in self.blockers[number]:
+                            cycles.append(sorted(component))
+        return cycles
+
+    def transitive_blockers(self, number):
+        """All issues that `number` depends on, directly or indirectly."""
+        if number in self.closure:
+            return self.closure[number]
+        seen = set()
+        stack = list(self.blockers.get(number, ()))
+        while stack:
+            blocker = stack.pop()
+            if blocker in seen:
+                continue
+            seen.add(blocker)
+            if blocker in self.closure:
+                seen |= self.closure[blocker]
+            else:
+                stack.extend(self.blockers[blocker])
+        seen.discard(number)
+        self.closure[number] = seen
+        return seen
+
+    def open_blockers(self, number):
+        """Direct blockers of `number` that are still open."""
+        return [b for b in self.blockers.get(number, ()) if self.open.get(b)]
+
+    def missing_blockers(self, number):
+        """Direct blockers of `number` that are not items in the project."""
+        return [b for b in self.blockers.get(number, ()) if b not in self.open]
+
+    def blocked_items(self):
+        """Open items that have at least one open blocker."""
+        return [n for n in self.blockers if self.open.get(n) and self.open_blockers(n)]
+
+def blocked_status_mutations(project_id, items, graph, status_field):
+    """Build mutations setting Status to Blocked for items with open blockers."""
+    option_id = status_field['options'].get(BLOCKED_STATUS)
+    if not option_id:
+        return []
+
+    blocked = set(graph.blocked_items())
+    mutations = []
+    for item in items:
+        number = (item.get('content') or {}).get('number')
+        if number not in blocked:
+            continue
+        if item_field_values(item).get(STATUS_FIELD) == BLOCKED_STATUS:
+            continue
+        mutations.append((item, field_value_mutation(
+            project_id, item['id'], status_field['id'], {'singleSelectOptionId': option_id}
+        )))
+    return mutations
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the Depends On graph and mark blocked items.')
+    parser.add_argument('owner', nargs='?', default='bromso')
+    parser.add_argument('project_number', nargs='?', default='17')
+    parser.add_argument('--snapshot', help='read items from a saved snapshot instead of the API')
+    parser.add_argument('--dry-run', action='store_true', help='report blocked items without writing them')
+    args = parser.parse_args(argv)
+
+    snapshot = load_or_fetch_snapshot(args.owner, args.project_number, args.snapshot)
+    if snapshot is None:
+        sys.exit(1)
+
+    items = snapshot['items']
+    started = time.perf_counter()
+    graph = DependencyGraph.from_items(items)
+    elapsed = time.perf_counter() - started
+    print(f"Built dependency graph: {len(graph)} issues from {len(items)} items in {elapsed * 1000:.0f} ms")
+    print()
+
+    cycles = graph.find_cycles()
+    for cycle in cycles:
+        print(f"⚠ Dependency cycle: {' → '.join(f'#{n}' for n in cycle)}")
+    for number in graph.open:
+        missing = graph.missing_blockers(number)
+        if missing:
+            print(f"⚠ #{number} depends on issues not in the project: {', '.join(f'#{n}' for n in missing)}")
+
+    blocked = graph.blocked_items()
+    print(f"{len(blocked)} open items have open blockers")
+
+    status_field = snapshot['fields'].get(STATUS_FIELD)
+    if not status_field or BLOCKED_STATUS not in status_field['options']:
+        print(f"Could not find '{BLOCKED_STATUS}' option on the '{STATUS_FIELD}' field")
+        return
+
+    mutations = blocked_status_mutations(snapshot['project_id'], items, graph, status_field)
+    for item, _ in mutations:
+        number = item['content']['number']
+        blockers = ', '.join(f'#{n}' for n in sorted(graph.open_blockers(number)))
+        upstream = sum(1 for n in graph.transitive_blockers(number) if graph.open.get(n))
+        print(f"  #{number} {item['content'].get('title', '')} (blocked by {blockers}; {upstream} open upstream)")
+
+    if args.dry_run:
+        print()
+        print(f"Dry run: {len(mutations)} items would be set to {BLOCKED_STATUS}.")
+        return
+
+    results = run_mutations([mutation for _, mutation in mutations])
+    updated = sum(1 for result in results if result)
+    print()
+    print(f"Done! Set {updated}/{len(mutations)} items to {BLOCKED_STATUS}.")
+
+if __name__ == '__main__':
+    run_main(main)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Resolve Epic Link values to Epic items.
+Epic Link may hold an issue reference (#123 or an issue URL), which is looked
+up by issue number, or a title. Titles are matched exactly, then folded
+(case, accents and punctuation ignored), then fuzzily: word and trigram
+indexes over the folded Epic titles are built once, on the first fuzzy
+lookup, so a fuzzy lookup only scores Epics that share words or rare
+trigrams with the link instead of comparing every child against every Epic.
+"""
+
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from profiling import span
+
+DEFAULT_MIN_SCORE = 0.6
+TOKEN_CANDIDATES = 20
+WORD = re.compile(r'[^\W_]+')
+
+ISSUE_REFERENCE = re.compile(
+    r'^(?:#|https?://github\.com/[^/\s]+/[^/\s]+/issues/|[\w.-]+/[\w.-]+#)(\d+)/?$',
+    re.IGNORECASE
+)
+
+def parse_issue_reference(value):
+    """Get the issue number from '#123', 'owner/repo#123' or an issue URL."""
+    match = ISSUE_REFERENCE.match(value.strip()) if value else None
+    return int(match.group(1)) if match else None
+
+def normalize_epic_title(title):
+    """Normalize epic title for matching."""
+    return re.sub(r'^EPIC:\s*', '', title, flags=re.IGNORECASE).strip()
+
+def fold_title(title):
+    """Fold a title to lowercase words so case, accents and punctuation don't matter.
+
+    Letters and digits of any script are kept (accents are stripped, not the
+    letters they sit on); a title with none folds to ''.
+    """
+    text = normalize_epic_title(title).casefold()
+    if not text.isascii():
+        text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    return ' '.join(WORD.findall(text))
+
+def title_trigrams(folded):
+    """Get the set of character trigrams of a folded title."""
+    padded = f'  {folded} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class EpicResolver:
+    """Match Epic Link values to Epics by issue number, or exact, folded or fuzzy title."""
+
+    def __init__(self, epics, min_score=DEFAULT_MIN_SCORE):
+        """Index epics (dicts with a 'title' and, for issues, an 'issue_number')."""
+        self.min_score = min_score
+        self.epics = []
+        self.numbers = {}
+        self.exact = {}
+        self.folded = {}
+        self.grams = None
+        self.postings = None
+        self.tokens = None
+        self.cache = {}
+
+        with span('index'):
+            for epic in epics:
+                if epic.get('issue_number') is not None:
+                    self.numbers[epic['issue_number']] = epic
+                title = epic.get('title') or ''
+                normalized = normalize_epic_title(title)
+                if not normalized:
+                    continue
+                self.epics.append(epic)
+                self.exact.setdefault(normalized, epic)
+                folded = fold_title(title)
+                # An empty folded key would match every link without letters or digits
+                if folded:
+                    self.folded.setdefault(folded, epic)
+
+    def _index_fuzzy(self):
+        """Build the word and trigram indexes on the first fuzzy lookup."""
+        self.grams = []
+        self.postings = {}
+        self.tokens = {}
+        with span('index'):
+            for index, epic in enumerate(self.epics):
+                folded = fold_title(epic['title'])
+                grams = title_trigrams(folded) if folded else set()
+                self.grams.append(grams)
+                for gram in grams:
+                    self.postings.setdefault(gram, []).append(index)
+                for token in set(folded.split()):
+                    self.tokens.setdefault(token, []).append(index)
+
+    @classmethod
+    def from_items(cls, items, min_score=DEFAULT_MIN_SCORE):
+        """Index project items; each match is {'title', 'issue_number', 'item'}."""
+        return cls((
+            {
+                'title': (item.get('content') or {}).get('title', ''),
+                'issue_number': (item.get('content') or {}).get('number'),
+                'item': item
+            }
+            for item in items
+        ), min_score)
+
+    def __len__(self):
+        return len(self.epics)
+
+    def resolve(self, epic_link):
+        """Return (epic, score) for an Epic Link value, or (None, 0.0)."""
+        if not epic_link:
+            return None, 0.0
+        if epic_link in self.cache:
+            return self.cache[epic_link]
+
+        number = parse_issue_reference(epic_link)
+        if number is not None:
+            # Numeric references never fall back to title matching, so they
+            # stay correct when Epics are renamed.
+            epic = self.numbers.get(number)
+            match = (epic, 1.0) if epic else (None, 0.0)
+        else:
+            match = self._match_title(epic_link)
+
+        self.cache[epic_link] = match
+        return match
+
+    def _match_title(self, epic_link):
+        """Match by exact, then case/punctuation-folded, then fuzzy title."""
+        normalized = normalize_epic_title(epic_link)
+        if normalized in self.exact:
+            return self.exact[normalized], 1.0
+        folded = fold_title(epic_link)
+        if not folded:
+            return None, 0.0
+        if folded in self.folded:
+            return self.folded[folded], 1.0
+        return self._fuzzy_match(folded)
+
+    def _fuzzy_match(self, folded):
+        """Find the best Epic by trigram Dice similarity above min_score."""
+        if not folded or not self.epics:
+            return None, 0.0
+        if self.postings is None:
+            self._index_fuzzy()
+
+        query = title_trigrams(folded)
+        size = len(query)
+        best, best_score = self._best_of(query, ((index, size) for index in self._token_candidates(folded)))
+        if best_score < self.min_score:
+            best, best_score = self._best_of(query, self._trigram_candidates(query))
+
+        if best is None or best_score < self.min_score:
+            return None, 0.0
+        return self.epics[best], round(best_score, 3)
+
+    def _token_candidates(self, folded, limit=TOKEN_CANDIDATES):
+        """Epics sharing the most words with the link (cheap first pass)."""
+        candidates = Counter()
+        for token in set(folded.split()):
+            candidates.update(self.tokens.get(token, ()))
+        return [index for index, _ in candidates.most_common(limit)]
+
+    def _trigram_candidates(self, query):
+        """Epics that can still reach min_score, found via the rarest trigrams.
+
+        Yields (index, most trigrams it can share with the query).
+        """
+        # A title scoring >= min_score must share at least `needed` trigrams
+        # with the query, so it has to appear in one of the rarest
+        # len(known) - needed + 1 posting lists. Only those are scanned, and
+        # a title found in c of them shares at most c + needed - 1 trigrams.
+        needed = max(1, math.ceil(self.min_score * len(query) / (2 - self.min_score) - 1e-9))
+        known = sorted((g for g in query if g in self.postings), key=lambda g: len(self.postings[g]))
+        probe = len(known) - needed + 1
+        if probe <= 0:
+            return ()
+
+        counts = Counter()
+        for gram in known[:probe]:
+            counts.update(self.postings[gram])
+        unprobed = len(known) - probe
+        return ((index, count + unprobed) for index, count in counts.items())
+
+    def _best_of(self, query, candidates):
+        """Score candidate Epics, given as (index, most shared trigrams), against the query trigrams."""
+        best, best_score = None, 0.0
+        # Scores below min_score are never used, so they don't need computing
+        floor = self.min_score - 1e-9
+        size = len(query)
+        grams_of = self.grams
+        for index, most_shared in candidates:
+            grams = grams_of[index]
+            total = size + len(grams)
+            # Dice can't beat 2 * min(shared, |a|, |b|) / (|a| + |b|); skip the
+            # set intersection when that bound alone rules the candidate out.
+            if 2.0 * min(most_shared, len(grams)) / total <= max(best_score, floor):
+                continue
+            score = 2.0 * len(query & grams) / total
+            if score > best_score:
+                best, best_score = index, score
+        return best, best_score
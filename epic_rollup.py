@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Roll child data up onto Epics.
+For each Epic in the Epics project, sums child Story Points into Estimate,
+sets Due Date to the latest child Due Date and derives Status from the child
+status distribution. Rollups are cached per Epic, keyed on child versions,
+so only Epics whose children changed are recomputed, and only fields whose
+value changed are written (in batched mutations). Only children whose Epic
+Link names the Epic by issue number or exact title count; fuzzy matches are
+listed with their score and left out unless --include-fuzzy is given.
+Usage: python3 epic_rollup.py [owner] [epics_project_number] [issues_project_number]
+                              [--epics-snapshot FILE] [--issues-snapshot FILE] [--include-fuzzy] [--dry-run]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from collections import Counter
+
+from epic_resolver import EpicResolver
+from github_api import cache_path, field_value_mutation, run_mutations
+from project_snapshot import is_epic_item, item_field_values, load_or_fetch_snapshot
+from profiling import run_main, span
+
+CACHE_FILE = 'epic_rollup_{owner}_{project_number}.json'
+IN_PROGRESS_STATUSES = {'Current Sprint', 'Test'}
+
+def rollup_status(distribution):
+    """Derive an Epic Status from its children's Status counts."""
+    total = sum(distribution.values())
+    done = distribution.get('Done', 0)
+    if done == total:
+        return 'Done'
+    if done or any(distribution.get(status) for status in IN_PROGRESS_STATUSES):
+        return 'Current Sprint'
+    if distribution.get('Blocked'):
+        return 'Blocked'
+    if distribution.get('Next Sprint'):
+        return 'Next Sprint'
+    return 'Icebox'
+
+def compute_rollup(children):
+    """Sum of Story Points, Status distribution and latest Due Date of children."""
+    points = 0
+    distribution = Counter()
+    due_dates = []
+    for child in children:
+        values = item_field_values(child)
+        points += values.get('Story Points') or 0
+        distribution[values.get('Status') or 'No Status'] += 1
+        if values.get('Due Date'):
+            due_dates.append(values['Due Date'])
+    return {
+        'story_points': points,
+        'status_distribution': dict(distribution),
+        'latest_due_date': max(due_dates) if due_dates else None,
+        'status': rollup_status(distribution)
+    }
+
+def children_version(children):
+    """Cache key for a set of children: their item IDs and update times."""
+    versions = sorted(f"{child.get('id')}@{child.get('updatedAt')}" for child in children)
+    return hashlib.sha1('\n'.join(versions).encode('utf-8')).hexdigest()
+
+def group_children(epic_items, child_items, include_fuzzy=False):
+    """Map Epic item ID -> child items, resolving each child's Epic Link.
+
+    Returns (children, unmatched, fuzzy): unmatched holds (item, Epic Link)
+    and fuzzy holds (item, Epic item, Epic Link, score) for every child whose
+    link only matched fuzzily (score below 1.0). Those children are grouped
+    under their Epic only with include_fuzzy.
+    """
+    resolver = EpicResolver.from_items(epic_items)
+    children = {}
+    unmatched = []
+    fuzzy = []
+    for item in child_items:
+        epic_link = item_field_values(item).get('Epic Link')
+        if not epic_link:
+            continue
+        epic, score = resolver.resolve(epic_link)
+        if not epic:
+            unmatched.append((item, epic_link))
+            continue
+        if score < 1.0:
+            fuzzy.append((item, epic['item'], epic_link, score))
+            if not include_fuzzy:
+                continue
+        children.setdefault(epic['item']['id'], []).append(item)
+    return children, unmatched, fuzzy
+
+def epic_field_changes(epic_item, rollup, fields):
+    """Fields of an Epic whose rolled-up value differs from the current one.
+
+    Returns a list of (field name, new value, ProjectV2FieldValue input).
+    """
+    current = item_field_values(epic_item)
+    changes = []
+
+    if 'Estimate' in fields and current.get('Estimate') != rollup['story_points']:
+        changes.append(('Estimate', rollup['story_points'], {'number': rollup['story_points']}))
+
+    due_date = rollup['latest_due_date']
+    if due_date and 'Due Date' in fields and current.get('Due Date') != due_date:
+        changes.append(('Due Date', due_date, {'date': due_date}))
+
+    option_id = fields.get('Status', {}).get('options', {}).get(rollup['status'])
+    if option_id and current.get('Status') != rollup['status']:
+        changes.append(('Status', rollup['status'], {'singleSelectOptionId': option_id}))
+
+    return changes
+
+def load_cache(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_cache(path, cache):
+    with open(path, 'w') as f:
+        json.dump(cache, f)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Roll child Story Points, Status and Due Date up onto Epics.')
+    parser.add_argument('owner', nargs='?', default='bromso')
+    parser.add_argument('epics_project_number', nargs='?', default='18')
+    parser.add_argument('issues_project_number', nargs='?', default='17')
+    parser.add_argument('--epics-snapshot', help='read Epics from a saved snapshot')
+    parser.add_argument('--issues-snapshot', help='read child issues from a saved snapshot')
+    parser.add_argument('--include-fuzzy', action='store_true',
+                        help='also roll up children whose Epic Link only matches an Epic fuzzily')
+    parser.add_argument('--dry-run', action='store_true', help='report changes without writing them')
+    args = parser.parse_args(argv)
+
+    epics_snapshot = load_or_fetch_snapshot(args.owner, args.epics_project_number, args.epics_snapshot)
+    issues_snapshot = load_or_fetch_snapshot(args.owner, args.issues_project_number, args.issues_snapshot)
+    if epics_snapshot is None or issues_snapshot is None:
+        sys.exit(1)
+    print()
+
+    epic_items = [item for item in epics_snapshot['items'] if is_epic_item(item)]
+    child_items = [item for item in issues_snapshot['items'] if not is_epic_item(item)]
+    with span('index'):
+        children, unmatched, fuzzy = group_children(epic_items, child_items, args.include_fuzzy)
+    print(f"Found {len(epic_items)} Epics and {len(child_items)} child items ({len(unmatched)} with unmatched Epic Link)")
+    if fuzzy:
+        action = 'included' if args.include_fuzzy else 'left out; --include-fuzzy counts them'
+        print(f"≈ {len(fuzzy)} children match their Epic only fuzzily ({action}):")
+        for item, epic_item, epic_link, score in fuzzy:
+            content = item.get('content') or {}
+            label = f"#{content['number']} " if content.get('number') is not None else ''
+            print(f"  ≈ {label}{content.get('title', '')}: \"{epic_link}\" → "
+                  f"{(epic_item.get('content') or {}).get('title', '')} ({score:.2f})")
+
+    cache_file = cache_path(CACHE_FILE.format(owner=args.owner, project_number=args.epics_project_number))
+    cache = load_cache(cache_file)
+    recomputed = 0
+    changes_by_epic = []
+
+    with span('diff'):
+        for epic in epic_items:
+            epic_children = children.get(epic['id'])
+            if not epic_children:
+                continue
+
+            version = children_version(epic_children)
+            cached = cache.get(epic['id'])
+            if cached and cached['version'] == version:
+                rollup = cached['rollup']
+            else:
+                rollup = compute_rollup(epic_children)
+                cache[epic['id']] = {'version': version, 'rollup': rollup}
+                recomputed += 1
+
+            changes = epic_field_changes(epic, rollup, epics_snapshot['fields'])
+            if changes:
+                changes_by_epic.append((epic, rollup, changes))
+
+    print(f"Recomputed {recomputed} Epic rollups ({len(children) - recomputed} unchanged)")
+    print()
+
+    mutations = []
+    for epic, rollup, changes in changes_by_epic:
+        print(f"Epic: {epic['content'].get('title', '')}")
+        distribution = ', '.join(f'{status}: {count}' for status, count in sorted(rollup['status_distribution'].items()))
+        print(f"  Children: {distribution}")
+        for name, value, field_value in changes:
+            print(f"  → {name}: {value}")
+            mutations.append(field_value_mutation(
+                epics_snapshot['project_id'], epic['id'], epics_snapshot['fields'][name]['id'], field_value
+            ))
+
+    if args.dry_run:
+        print()
+        print(f"Dry run: {len(mutations)} field updates on {len(changes_by_epic)} Epics would be written.")
+        return
+
+    results = run_mutations(mutations)
+    save_cache(cache_file, cache)
+    print()
+    print(f"Done! Updated {sum(1 for r in results if r)}/{len(mutations)} Epic fields.")
+
+if __name__ == '__main__':
+    run_main(main)
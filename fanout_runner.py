@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Run the roadmap pipeline for many teams in parallel.
+Reads a manifest of teams (owner, repo, issues project, epics project and
+issues.jsonl) and runs the pipeline steps for each team in a process pool.
+All workers draw on one shared API rate-limit budget, and each team's output
+is collected into a combined report.
+Usage: python3 fanout_runner.py manifest.json [--workers N] [--points-per-hour N] [--report FILE]
+
+Manifest format (JSON):
+  [
+    {"name": "collab", "owner": "bromso", "repo": "uxcel-product-roadmap",
+     "issues_project": 17, "epics_project": 18, "issues_file": "collab/issues.jsonl",
+     "steps": ["update-fields", "link-epics"]},
+    ...
+  ]
+"steps" is optional; relative issues_file paths are relative to the manifest.
+"""
+
+import argparse
+import importlib
+import io
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+
+from github_api import DEFAULT_POINTS_PER_HOUR, RateBudget, reset_token_pool, set_rate_budget
+from http_cache import reset_cache
+from profiling import run_main
+from request_coalescing import invalidate_reads
+
+# Pipeline step -> (module, function building the module's main() arguments)
+STEPS = {
+    'configure': ('setup_project_fields', lambda team: [team['owner'], team['issues_project']]),
+    'validate': ('issue_validation', lambda team: [
+        team['owner'], team['issues_project'], team['issues_file'], '--epics-project', team['epics_project']
+    ]),
+    'update-fields': ('update_issue_fields', lambda team: [
+        team['owner'], team['issues_project'], team['issues_file']
+    ]),
+    'link-epics': ('link_epics_to_issues', lambda team: [
+        team['owner'], team['epics_project'], team['issues_project']
+    ]),
+    'link-subissues': ('link_sub_issues_to_epics_v2', lambda team: [
+        team['owner'], team['repo'], team['epics_project'], team['issues_project'], team['issues_file']
+    ]),
+    'epic-rollup': ('epic_rollup', lambda team: [
+        team['owner'], team['epics_project'], team['issues_project']
+    ]),
+}
+DEFAULT_STEPS = ['configure', 'validate', 'update-fields', 'link-epics', 'link-subissues']
+REQUIRED_KEYS = ['owner', 'repo', 'issues_project', 'epics_project', 'issues_file']
+
+def load_manifest(path):
+    """Read and check the team manifest."""
+    with open(path, 'r') as f:
+        teams = json.load(f)
+    if isinstance(teams, dict):
+        teams = teams.get('teams', [])
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    for i, team in enumerate(teams):
+        missing = [key for key in REQUIRED_KEYS if key not in team]
+        if missing:
+            raise ValueError(f"Team #{i + 1} in {path} is missing: {', '.join(missing)}")
+        team['issues_project'] = str(team['issues_project'])
+        team['epics_project'] = str(team['epics_project'])
+        team['issues_file'] = os.path.join(base_dir, team['issues_file'])
+        team.setdefault('name', f"{team['owner']}/{team['repo']}")
+        team.setdefault('steps', DEFAULT_STEPS)
+        unknown = [step for step in team['steps'] if step not in STEPS]
+        if unknown:
+            raise ValueError(f"Team {team['name']} has unknown steps: {', '.join(unknown)}")
+    return teams
+
+def init_worker(budget):
+    """Pool initializer: share the rate-limit budget with this worker."""
+    set_rate_budget(budget)
+
+def reset_worker_state():
+    """Forget what the previous team in this worker process left behind.
+
+    Workers are reused across teams, so memoized reads, the HTTP cache
+    instance and the token pool would otherwise carry over from one team
+    to the next.
+    """
+    invalidate_reads()
+    reset_cache()
+    reset_token_pool()
+
+def run_team(team):
+    """Run every pipeline step for one team, capturing its output."""
+    reset_worker_state()
+    output = io.StringIO()
+    steps = []
+    for step in team['steps']:
+        module_name, build_args = STEPS[step]
+        started = time.perf_counter()
+        with redirect_stdout(output):
+            print(f"=== {step} ===")
+            try:
+                importlib.import_module(module_name).main(build_args(team))
+                status = 'ok'
+            except SystemExit as e:
+                status = 'ok' if not e.code else f'exit {e.code}'
+            except Exception:
+                traceback.print_exc(file=output)
+                status = 'error'
+            print()
+        steps.append({'step': step, 'status': status, 'seconds': round(time.perf_counter() - started, 2)})
+        if status != 'ok':
+            break
+
+    return {
+        'name': team['name'],
+        'ok': all(s['status'] == 'ok' for s in steps) and len(steps) == len(team['steps']),
+        'steps': steps,
+        'output': output.getvalue()
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the roadmap pipeline for many teams in parallel.')
+    parser.add_argument('manifest', help='JSON manifest of teams')
+    parser.add_argument('--workers', type=int, default=min(8, os.cpu_count() or 1))
+    parser.add_argument('--points-per-hour', type=int, default=DEFAULT_POINTS_PER_HOUR,
+                        help='API requests per hour shared by all workers')
+    parser.add_argument('--report', default='fanout_report.json', help='where to write the combined report')
+    args = parser.parse_args(argv)
+
+    try:
+        teams = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"Running pipeline for {len(teams)} teams with {args.workers} workers...")
+    print()
+
+    budget = RateBudget(args.points_per_hour)
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(budget,)) as pool:
+        futures = {pool.submit(run_team, team): team for team in teams}
+        for future in as_completed(futures):
+            team = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'name': team['name'], 'ok': False, 'steps': [], 'output': f'Worker failed: {e}\n'}
+            results.append(result)
+            summary = ', '.join(f"{s['step']} {s['status']} ({s['seconds']}s)" for s in result['steps'])
+            print(f"{'✓' if result['ok'] else '✗'} {result['name']}: {summary}")
+
+    elapsed = time.perf_counter() - started
+    results.sort(key=lambda result: result['name'])
+    with open(args.report, 'w') as f:
+        json.dump({'seconds': round(elapsed, 2), 'teams': results}, f, indent=2, ensure_ascii=False)
+
+    succeeded = sum(1 for result in results if result['ok'])
+    print()
+    print(f"Done! {succeeded}/{len(results)} teams succeeded in {elapsed:.1f}s.")
+    print(f"Combined report written to {args.report}")
+    if succeeded < len(results):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    run_main(main)
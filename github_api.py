@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Shared GitHub GraphQL helpers for the roadmap scripts.
+Requests go through the GitHub CLI (`gh api graphql`), like the other scripts,
+unless a token pool is configured (GITHUB_TOKENS or a GitHub App via
+GITHUB_APP_*, see token_pool.py and github_app_auth.py); then they are sent
+over HTTPS with the token that has the most remaining budget.
+Identical reads within a run are coalesced (see request_coalescing.py):
+repeating a query costs one request, and any mutation clears the memo.
+Mutations are sent one at a time through the write lane of
+request_scheduler.py, which paces them and backs off on secondary rate
+limits; reads are not serialized.
+"""
+
+import copy
+import json
+import os
+import subprocess
+import time
+
+from profiling import span
+from request_coalescing import invalidate_reads, reads, request_key
+from request_scheduler import write_lane
+
+MUTATION_BATCH_SIZE = 25
+CACHE_DIR = os.getenv('ROADMAP_CACHE_DIR', '.roadmap_cache')
+DEFAULT_POINTS_PER_HOUR = 5000
+GRAPHQL_URL = 'https://api.github.com/graphql'
+STREAM_CHUNK_SIZE = 65536
+
+_rate_budget = None
+_token_pool = None
+_token_pool_loaded = False
+
+def cache_path(name):
+    """Path of a file in the local cache directory (created on demand)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, name)
+
+class RateBudget:
+    """Token bucket of API requests, shareable between processes.
+
+    Each request takes one point and points refill continuously at
+    points_per_hour, with up to a minute's worth available in a burst. The
+    state lives in shared memory, so a budget created before starting a
+    process pool is drawn on by every worker.
+    """
+
+    def __init__(self, points_per_hour=DEFAULT_POINTS_PER_HOUR, burst=None):
+        # Imported here so scripts that never share a budget don't pay for it
+        import multiprocessing
+        self.rate = points_per_hour / 3600.0
+        self.capacity = float(burst if burst is not None else max(1, points_per_hour // 60))
+        self.lock = multiprocessing.Lock()
+        self.state = multiprocessing.RawArray('d', [self.capacity, time.monotonic()])
+
+    def acquire(self, points=1):
+        """Take points from the budget, sleeping until enough have refilled."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                available = min(self.capacity, self.state[0] + (now - self.state[1]) * self.rate)
+                self.state[1] = now
+                if available >= points:
+                    self.state[0] = available - points
+                    return
+                self.state[0] = available
+                wait = (points - available) / self.rate
+            time.sleep(wait)
+
+def set_rate_budget(budget):
+    """Make every request in this process draw on `budget` (None to disable)."""
+    global _rate_budget
+    _rate_budget = budget
+
+def set_token_pool(pool):
+    """Send requests through `pool` instead of the gh CLI (None for gh)."""
+    global _token_pool, _token_pool_loaded
+    _token_pool, _token_pool_loaded = pool, True
+
+def get_token_pool():
+    """The configured token pool, created from GITHUB_TOKENS on first use."""
+    global _token_pool, _token_pool_loaded
+    if not _token_pool_loaded:
+        # Imported here because token_pool itself imports this module
+        from token_pool import TokenPool
+        _token_pool, _token_pool_loaded = TokenPool.from_env(), True
+    return _token_pool
+
+def reset_token_pool():
+    """Forget the token pool; the next request loads it from GITHUB_TOKENS again."""
+    global _token_pool, _token_pool_loaded
+    _token_pool, _token_pool_loaded = None, False
+
+def is_mutation(query):
+    """Whether a GraphQL document is a mutation."""
+    return query.lstrip().startswith('mutation')
+
+def _run_gh(body):
+    """Send a GraphQL request body through the gh CLI."""
+    with span('gh'):
+        result = subprocess.run(
+            ['gh', 'api', 'graphql', '--input', '-'],
+            input=json.dumps(body),
+            capture_output=True,
+            text=True
+        )
+
+    try:
+        with span('parse'):
+            data = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return {'errors': [{'message': result.stderr.strip() or 'Invalid JSON response'}]}
+
+    if result.returncode != 0 and not data.get('errors'):
+        data['errors'] = [{'message': result.stderr.strip() or f'gh exited with {result.returncode}'}]
+    return data
+
+def _acquire_token(pool, mutation):
+    """(label, token, None) from the pool, or (None, None, error response).
+
+    Callable credentials (GitHub App installation tokens) refresh inside
+    acquire() and raise RuntimeError when that fails; the failure becomes
+    an ordinary error response so one bad refresh doesn't end the run.
+    """
+    try:
+        label, token = pool.acquire(mutation)
+    except RuntimeError as e:
+        return None, None, {'errors': [{'message': str(e)}]}
+    return label, token, None
+
+def _run_http(body, pool, mutation):
+    """Send a GraphQL request body over HTTPS with a token from the pool."""
+    # Imported here: the gh path never needs urllib's HTTP stack
+    import urllib.error
+    import urllib.request
+    label, token, error = _acquire_token(pool, mutation)
+    if error:
+        return error
+    req = urllib.request.Request(GRAPHQL_URL, data=json.dumps(body).encode('utf-8'))
+    req.add_header("Authorization", f"Bearer {token}")
+    req.add_header("Accept", "application/vnd.github+json")
+    req.add_header("Content-Type", "application/json")
+
+    try:
+        with span('http'), urllib.request.urlopen(req) as response:
+            pool.record(label, response.headers, response.status)
+            return json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        pool.record(label, e.headers, e.code)
+        error_body = e.read().decode('utf-8')
+        try:
+            data = json.loads(error_body)
+        except json.JSONDecodeError:
+            data = {}
+        if not data.get('errors'):
+            data['errors'] = [{'message': data.get('message') or error_body or f'HTTP {e.code}'}]
+        if e.headers and e.headers.get('Retry-After', '').isdigit():
+            data['retry_after'] = int(e.headers['Retry-After'])
+        return data
+    except (urllib.error.URLError, TimeoutError) as e:
+        # No response, so no rate-limit headers: hand the counted request back
+        pool.release(label)
+        return {'errors': [{'message': str(getattr(e, 'reason', e))}]}
+
+def _request_body(query, variables):
+    """Wait for the rate budget and build a GraphQL request body."""
+    if _rate_budget is not None:
+        _rate_budget.acquire()
+
+    body = {'query': query}
+    if variables:
+        body['variables'] = variables
+    return body
+
+def _send(query, variables):
+    body = _request_body(query, variables)
+    pool = get_token_pool()
+    if pool is None:
+        return _run_gh(body)
+    return _run_http(body, pool, is_mutation(query))
+
+def run_graphql(query, variables=None):
+    """Run a GraphQL query or mutation. Returns the parsed response dict.
+
+    Queries are coalesced: an identical query made earlier in the run (or
+    still in flight) is answered with a copy of its response. Mutations
+    always go out, in order through the write lane, and clear the memo;
+    responses with errors are not kept.
+    """
+    if is_mutation(query):
+        try:
+            return write_lane.run(lambda: _send(query, variables))
+        finally:
+            invalidate_reads()
+
+    data = reads.get(request_key(query, variables), lambda: _send(query, variables),
+                     keep=lambda data: not data.get('errors'))
+    # Callers may modify what they get back; the memoized response must not change
+    return copy.deepcopy(data)
+
+def run_graphql_many(queries):
+    """Run independent queries, packed into as few requests as fit.
+
+    Returns one response per query, in order, each as run_graphql would have
+    returned it. Memoized queries are answered without a request, and the
+    rest are memoized for later run_graphql calls (see query_planner.py).
+    """
+    # Imported here: only scripts with batches of reads need the planner
+    from query_planner import run_packed
+
+    results = [None] * len(queries)
+    missing = []
+    for index, query in enumerate(queries):
+        found, data = reads.lookup(request_key(query))
+        if found:
+            results[index] = copy.deepcopy(data)
+        else:
+            missing.append(index)
+
+    responses = run_packed([queries[index] for index in missing], lambda document: _send(document, None))
+    for index, data in zip(missing, responses):
+        if not data.get('errors'):
+            reads.put(request_key(queries[index]), copy.deepcopy(data))
+        results[index] = data
+    return results
+
+def _stream_gh(body, chunk_size):
+    """Send a GraphQL request body through the gh CLI, yielding output chunks."""
+    process = subprocess.Popen(
+        ['gh', 'api', 'graphql', '--input', '-'],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    process.stdin.write(json.dumps(body))
+    process.stdin.close()
+
+    received = False
+    while True:
+        chunk = process.stdout.read(chunk_size)
+        if not chunk:
+            break
+        received = True
+        yield chunk
+    stderr = process.stderr.read()
+    process.wait()
+
+    if not received:
+        message = stderr.strip() or f'gh exited with {process.returncode}'
+        yield json.dumps({'errors': [{'message': message}]})
+
+def _stream_http(body, pool, chunk_size):
+    """Send a GraphQL request body over HTTPS, yielding response chunks."""
+    import codecs
+    import urllib.error
+    import urllib.request
+
+    label, token, error = _acquire_token(pool, False)
+    if error:
+        yield json.dumps(error)
+        return
+    req = urllib.request.Request(GRAPHQL_URL, data=json.dumps(body).encode('utf-8'))
+    req.add_header("Authorization", f"Bearer {token}")
+    req.add_header("Accept", "application/vnd.github+json")
+    req.add_header("Content-Type", "application/json")
+
+    try:
+        response = urllib.request.urlopen(req)
+    except urllib.error.HTTPError as e:
+        pool.record(label, e.headers, e.code)
+        error_body = e.read().decode('utf-8')
+        try:
+            json.loads(error_body)
+            yield error_body
+        except json.JSONDecodeError:
+            yield json.dumps({'errors': [{'message': error_body or f'HTTP {e.code}'}]})
+        return
+    except (urllib.error.URLError, TimeoutError) as e:
+        pool.release(label)
+        yield json.dumps({'errors': [{'message': str(getattr(e, 'reason', e))}]})
+        return
+
+    with response:
+        pool.record(label, response.headers, response.status)
+        # Decode incrementally: a chunk may end inside a multi-byte character
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        while True:
+            data = response.read(chunk_size)
+            if not data:
+                break
+            yield decoder.decode(data)
+        yield decoder.decode(b'', final=True)
+
+def stream_graphql(query, variables=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Run a GraphQL query, yielding the raw response text as it arrives.
+
+    Use with graphql_stream.JsonArrayStream to process large pages without
+    parsing them whole.
+    """
+    body = _request_body(query, variables)
+    pool = get_token_pool()
+    if pool is None:
+        return _stream_gh(body, chunk_size)
+    return _stream_http(body, pool, chunk_size)
+
+def graphql_value(value):
+    """Render a Python value as a GraphQL input literal."""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return json.dumps(value)
+    if isinstance(value, dict):
+        return '{' + ', '.join(f'{key}: {graphql_value(val)}' for key, val in value.items()) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(graphql_value(val) for val in value) + ']'
+    return json.dumps(str(value))
+
+def get_project_id(owner, project_number):
+    """Get project ID."""
+    query = f'''{{
+      user(login: "{owner}") {{
+        projectV2(number: {project_number}) {{
+          id
+          title
+        }}
+      }}
+    }}'''
+
+    data = run_graphql(query)
+    project = (data.get('data') or {}).get('user', {}).get('projectV2') or {}
+    return project.get('id'), project.get('title')
+
+def get_project_ids(owner, project_numbers):
+    """Get (ID, title) of several projects with one request."""
+    queries = [f'{{ user(login: "{owner}") {{ projectV2(number: {number}) {{ id title }} }} }}'
+               for number in project_numbers]
+    ids = []
+    for data in run_graphql_many(queries):
+        project = ((data.get('data') or {}).get('user') or {}).get('projectV2') or {}
+        ids.append((project.get('id'), project.get('title')))
+    return ids
+
+def field_value_mutation(project_id, item_id, field_id, value):
+    """Build an updateProjectV2ItemFieldValue mutation field.
+
+    `value` is a ProjectV2FieldValue input, e.g. {'singleSelectOptionId': id}.
+    """
+    arguments = graphql_value({
+        'projectId': project_id,
+        'itemId': item_id,
+        'fieldId': field_id,
+        'value': value
+    })
+    return f'updateProjectV2ItemFieldValue(input: {arguments}) {{ projectV2Item {{ id }} }}'
+
+def run_mutations(mutations, batch_size=MUTATION_BATCH_SIZE, delay=0):
+    """Run mutation fields in aliased batches, one request per batch.
+
+    Returns one result per mutation, in order: the mutation's payload, or None
+    if it failed. Batches are paced by the write lane; `delay` adds a fixed
+    pause between them on top of that.
+    """
+    results = []
+    for start in range(0, len(mutations), batch_size):
+        batch = mutations[start:start + batch_size]
+        document = 'mutation {\n' + '\n'.join(f'  m{i}: {m}' for i, m in enumerate(batch)) + '\n}'
+
+        with span('mutate'):
+            data = run_graphql(document)
+        payloads = data.get('data') or {}
+        failed = {err['path'][0] for err in data.get('errors') or [] if err.get('path')}
+        for i in range(len(batch)):
+            alias = f'm{i}'
+            results.append(None if alias in failed else payloads.get(alias))
+
+        if delay and start + batch_size < len(mutations):
+            time.sleep(delay)
+    return results
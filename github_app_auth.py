@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+GitHub App authentication with cached installation tokens.
+Signs a JWT with the App's private key, exchanges it for an installation
+token and caches the token on disk until shortly before it expires. The cache
+is shared by concurrent runs (refreshes are serialized with a file lock), so
+a warm start reads one small file: no subprocess and no auth round trip.
+
+Configure with environment variables:
+  GITHUB_APP_ID, GITHUB_APP_INSTALLATION_ID and either
+  GITHUB_APP_PRIVATE_KEY_PATH (PEM file) or GITHUB_APP_PRIVATE_KEY (PEM text)
+Usage: python3 github_app_auth.py   (prints a valid installation token)
+"""
+
+import base64
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+from github_api import cache_path
+from profiling import run_main
+
+# Sign with PyJWT when it is installed, otherwise fall back to openssl
+try:
+    import jwt
+    USE_PYJWT = True
+except ImportError:
+    USE_PYJWT = False
+
+# File locking keeps concurrent runs from refreshing the same token twice
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+API_URL = 'https://api.github.com'
+REFRESH_MARGIN = 300  # Refresh tokens 5 minutes before they expire
+JWT_LIFETIME = 540
+
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def create_app_jwt(app_id, private_key):
+    """Create a short-lived RS256 JWT identifying the App."""
+    now = int(time.time())
+    payload = {'iat': now - 60, 'exp': now + JWT_LIFETIME, 'iss': str(app_id)}
+    if USE_PYJWT:
+        return jwt.encode(payload, private_key, algorithm='RS256')
+
+    header = {'alg': 'RS256', 'typ': 'JWT'}
+    signing_input = f"{_b64url(json.dumps(header).encode())}.{_b64url(json.dumps(payload).encode())}"
+    with tempfile.NamedTemporaryFile('w', suffix='.pem', delete=False) as key_file:
+        key_file.write(private_key)
+    try:
+        result = subprocess.run(
+            ['openssl', 'dgst', '-sha256', '-sign', key_file.name],
+            input=signing_input.encode('ascii'),
+            capture_output=True
+        )
+    finally:
+        os.unlink(key_file.name)
+    if result.returncode != 0:
+        raise RuntimeError(f"openssl failed to sign the App JWT: {result.stderr.decode().strip()}")
+    return f"{signing_input}.{_b64url(result.stdout)}"
+
+def request_installation_token(app_jwt, installation_id):
+    """Exchange an App JWT for an installation token. Returns (token, expires_at).
+
+    Raises RuntimeError when the exchange fails, whatever the cause.
+    """
+    url = f"{API_URL}/app/installations/{installation_id}/access_tokens"
+    req = urllib.request.Request(url, data=b'', method='POST')
+    req.add_header("Authorization", f"Bearer {app_jwt}")
+    req.add_header("Accept", "application/vnd.github+json")
+
+    try:
+        with urllib.request.urlopen(req) as response:
+            data = json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"Failed to get installation token (HTTP {e.code}): {e.read().decode('utf-8')}") from None
+    except urllib.error.URLError as e:
+        raise RuntimeError(f"Failed to get installation token: {e.reason}") from None
+    except ValueError as e:
+        raise RuntimeError(f"Failed to get installation token: unreadable response ({e})") from None
+    if 'token' not in data or 'expires_at' not in data:
+        raise RuntimeError(f"Failed to get installation token: unexpected response {data!r}")
+
+    expires_at = datetime.fromisoformat(data['expires_at'].replace('Z', '+00:00')).timestamp()
+    return data['token'], expires_at
+
+class InstallationToken:
+    """Callable returning a valid installation token, refreshed on demand."""
+
+    def __init__(self, app_id, installation_id, private_key):
+        self.app_id = str(app_id)
+        self.installation_id = str(installation_id)
+        self.private_key = private_key
+        self.fingerprint = hashlib.sha256(f'app:{self.app_id}:{self.installation_id}'.encode()).hexdigest()[:16]
+        self.cache_file = cache_path(f'app_token_{self.app_id}_{self.installation_id}.json')
+        self.lock = threading.Lock()
+        self.token = None
+        self.expires_at = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build from GITHUB_APP_* variables, or return None if not configured."""
+        app_id = os.getenv('GITHUB_APP_ID')
+        installation_id = os.getenv('GITHUB_APP_INSTALLATION_ID')
+        private_key = os.getenv('GITHUB_APP_PRIVATE_KEY')
+        key_path = os.getenv('GITHUB_APP_PRIVATE_KEY_PATH')
+        if not app_id or not installation_id or not (private_key or key_path):
+            return None
+        if not private_key:
+            with open(key_path, 'r') as f:
+                private_key = f.read()
+        return cls(app_id, installation_id, private_key)
+
+    def _is_fresh(self, expires_at):
+        return expires_at - REFRESH_MARGIN > time.time()
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_file, 'r') as f:
+                cached = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        if not self._is_fresh(cached.get('expires_at', 0)):
+            return False
+        self.token, self.expires_at = cached['token'], cached['expires_at']
+        return True
+
+    def _write_cache(self):
+        temp_file = f'{self.cache_file}.{os.getpid()}.tmp'
+        fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'token': self.token, 'expires_at': self.expires_at}, f)
+        os.replace(temp_file, self.cache_file)
+
+    def refresh(self):
+        """Get a new installation token, unless another run just did."""
+        with open(f'{self.cache_file}.lock', 'w') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if self._read_cache():
+                return self.token
+            app_jwt = create_app_jwt(self.app_id, self.private_key)
+            self.token, self.expires_at = request_installation_token(app_jwt, self.installation_id)
+            self._write_cache()
+        return self.token
+
+    def __call__(self):
+        with self.lock:
+            if self.token and self._is_fresh(self.expires_at):
+                return self.token
+            if self._read_cache():
+                return self.token
+            return self.refresh()
+
+def get_installation_token():
+    """A valid installation token from GITHUB_APP_* settings, or None."""
+    provider = InstallationToken.from_env()
+    return provider() if provider else None
+
+def main(argv=None):
+    provider = InstallationToken.from_env()
+    if not provider:
+        print("Error: set GITHUB_APP_ID, GITHUB_APP_INSTALLATION_ID and GITHUB_APP_PRIVATE_KEY_PATH.")
+        sys.exit(1)
+    try:
+        print(provider())
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    run_main(main)
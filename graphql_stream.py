@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Incremental parsing of large GraphQL responses.
+Walks the response text as it arrives and yields the elements of one array
+(e.g. data.node.items.nodes) one at a time, so a caller can start working on
+the first items of a page before the rest has been read, and never holds the
+whole page as nested dicts. Everything outside the array (pageInfo, errors)
+is small and is parsed into a skeleton once the stream ends.
+"""
+
+import json
+import re
+import sys
+
+ITEMS_PATH = ('data', 'node', 'items', 'nodes')
+
+# A complete string, a structural character, or the start of a string that
+# has not fully arrived yet (the lone quote only matches when the first
+# alternative cannot)
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]:,]|"')
+_SPACE = re.compile(r'[\s,]*')
+
+class JsonArrayStream:
+    """Iterate over the elements of the array at `path` in a JSON text stream.
+
+    `chunks` is an iterable of text chunks. After iteration, `skeleton` holds
+    the rest of the document with the array left empty. Elements are passed
+    through `transform` before being yielded.
+    """
+
+    def __init__(self, chunks, path=ITEMS_PATH, transform=None):
+        self.chunks = iter(chunks)
+        self.path = list(path)
+        self.transform = transform
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.skeleton = None
+        self.count = 0
+
+    def _read(self):
+        """Append the next chunk to the buffer. False at end of stream."""
+        for chunk in self.chunks:
+            if chunk:
+                self.buffer += chunk
+                return True
+        return False
+
+    def _find_array(self):
+        """Scan to the target array. Returns the text up to and including '[', or None."""
+        stack = []  # One entry per open container: the current key for objects, None for arrays
+        expect_key = False
+        pos = 0
+        while True:
+            match = _TOKEN.search(self.buffer, pos)
+            if match is None or match.group() == '"':
+                # Out of data (possibly mid-string): read more and rescan from here
+                if match is not None:
+                    pos = match.start()
+                if not self._read():
+                    return None
+                continue
+
+            token = match.group()
+            pos = match.end()
+            if token == '{':
+                stack.append('')
+                expect_key = True
+            elif token == '[':
+                if stack == self.path:
+                    return self.buffer[:pos]
+                stack.append(None)
+                expect_key = False
+            elif token in '}]':
+                stack.pop()
+                expect_key = False
+            elif token == ',':
+                expect_key = bool(stack) and stack[-1] is not None
+            elif token == ':':
+                expect_key = False
+            elif expect_key:
+                stack[-1] = json.loads(token)
+
+    def __iter__(self):
+        prefix = self._find_array()
+        if prefix is None:
+            # The array is not in the response (e.g. an error): parse it whole
+            self.skeleton = json.loads(self.buffer) if self.buffer.strip() else {}
+            return
+
+        pos = len(prefix)
+        while True:
+            pos = _SPACE.match(self.buffer, pos).end()
+            if pos >= len(self.buffer):
+                if not self._read():
+                    raise ValueError('Response ended inside the streamed array')
+                continue
+            if self.buffer[pos] == ']':
+                break
+            try:
+                element, end = self.decoder.raw_decode(self.buffer, pos)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            # Drop consumed text so the buffer only ever holds one element
+            self.buffer = self.buffer[end:]
+            pos = 0
+            self.count += 1
+            yield self.transform(element) if self.transform else element
+
+        while self._read():
+            pass
+        self.skeleton = json.loads(prefix + self.buffer[pos:])
+        self.buffer = ''
+
+def compact_item(item):
+    """Drop empty field values (unselected value types) and intern field names.
+
+    Field names repeat on every item, so interning them keeps one copy per
+    name instead of one per item.
+    """
+    field_values = item.get('fieldValues')
+    if field_values and 'nodes' in field_values:
+        nodes = []
+        for fv in field_values['nodes']:
+            if not fv:
+                continue
+            field = fv.get('field')
+            if field and 'name' in field:
+                field['name'] = sys.intern(field['name'])
+            nodes.append(fv)
+        field_values['nodes'] = nodes
+    return item
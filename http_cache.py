@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+On-disk HTTP cache for GitHub REST reads.
+Responses are stored with their ETag and Last-Modified validators, and the
+next GET for the same URL is sent as a conditional request
+(If-None-Match / If-Modified-Since). GitHub answers 304 Not Modified when
+nothing changed, which does not count against the primary rate limit, and
+the stored body is used. The cache is bounded in size: when it grows past
+its limit the least recently used entries are evicted.
+
+Requests are sent with an explicit token over HTTPS, or through the GitHub
+CLI (`gh api`) when no token is given, like the other scripts.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+
+from github_api import cache_path
+
+API_URL = 'https://api.github.com'
+CACHE_SUBDIR = 'http'
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+class CachedResponse:
+    """A REST response, possibly served from the cache."""
+
+    def __init__(self, status_code, headers, text, from_cache=False):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        self.from_cache = from_cache
+
+    def json(self):
+        return json.loads(self.text) if self.text else None
+
+def _parse_gh_output(stdout):
+    """Split `gh api -i` output into (status, {header: value}, body)."""
+    head, _, body = stdout.replace('\r\n', '\n').partition('\n\n')
+    lines = head.split('\n')
+    try:
+        status = int(lines[0].split()[1])
+    except (IndexError, ValueError):
+        return None, {}, stdout
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return status, headers, body
+
+class HttpCache:
+    """Conditional GET cache, one file per URL, evicted least recently used first."""
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or cache_path(CACHE_SUBDIR)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _entry_path(self, url, token):
+        # Responses can differ per credential, so the token is part of the key
+        # (hashed, never written to disk)
+        key = hashlib.sha256(f"{token or 'gh'}\n{url}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _load(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _store(self, path, entry):
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits its limit."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for dir_entry in it:
+                if dir_entry.name.endswith('.json'):
+                    stat = dir_entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+                    total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def _send(self, url, token, conditional):
+        """GET url with conditional headers. Returns (status, headers, body)."""
+        if token is None:
+            # gh resolves the host and credentials itself; it takes API paths
+            path = url[len(API_URL) + 1:] if url.startswith(API_URL) else url
+            command = ['gh', 'api', '-i', path]
+            for name, value in conditional.items():
+                command += ['-H', f'{name}: {value}']
+            result = subprocess.run(command, capture_output=True, text=True)
+            status, headers, body = _parse_gh_output(result.stdout)
+            if status is None:
+                return 0, {}, result.stderr.strip()
+            return status, headers, body
+
+        import urllib.error
+        import urllib.request
+        req = urllib.request.Request(url)
+        req.add_header("Authorization", f"Bearer {token}")
+        req.add_header("Accept", "application/vnd.github+json")
+        for name, value in conditional.items():
+            req.add_header(name, value)
+        try:
+            with urllib.request.urlopen(req) as response:
+                headers = {name.lower(): value for name, value in response.headers.items()}
+                return response.status, headers, response.read().decode('utf-8')
+        except urllib.error.HTTPError as e:
+            headers = {name.lower(): value for name, value in (e.headers or {}).items()}
+            return e.code, headers, e.read().decode('utf-8')
+        except urllib.error.URLError as e:
+            return 0, {}, str(e.reason)
+
+    def get(self, url, token=None):
+        """GET a REST URL (or an API path), revalidating any cached copy."""
+        if not url.startswith('http'):
+            url = f"{API_URL}/{url.lstrip('/')}"
+        path = self._entry_path(url, token)
+        entry = self._load(path)
+
+        conditional = {}
+        if entry:
+            if entry.get('etag'):
+                conditional['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                conditional['If-Modified-Since'] = entry['last_modified']
+
+        status, headers, body = self._send(url, token, conditional)
+        if status == 304 and entry:
+            try:
+                os.utime(path)  # Mark as recently used
+            except OSError:
+                pass
+            return CachedResponse(entry['status'], entry['headers'], entry['body'], from_cache=True)
+
+        if status == 200 and (headers.get('etag') or headers.get('last-modified')):
+            kept_headers = {name: headers[name] for name in ('link', 'etag', 'last-modified') if name in headers}
+            self._store(path, {
+                'url': url,
+                'etag': headers.get('etag'),
+                'last_modified': headers.get('last-modified'),
+                'status': status,
+                'headers': kept_headers,
+                'body': body,
+                'stored_at': time.time()
+            })
+        return CachedResponse(status, headers, body)
+
+    def get_all(self, url, token=None):
+        """GET every page of a REST list, following Link rel="next".
+
+        Returns (items, responses); items is None if any page failed.
+        """
+        items = []
+        responses = []
+        while url:
+            response = self.get(url, token)
+            responses.append(response)
+            if response.status_code != 200:
+                return None, responses
+            items.extend(response.json() or [])
+            url = _next_link(response.headers.get('link', ''))
+        return items, responses
+
+def _next_link(link_header):
+    """The rel="next" URL of a Link header, or None."""
+    for part in link_header.split(','):
+        target, _, params = part.partition(';')
+        if 'rel="next"' in params:
+            return target.strip().strip('<>')
+    return None
+
+_cache = None
+
+def get_cache():
+    """The shared HttpCache of this run."""
+    global _cache
+    if _cache is None:
+        _cache = HttpCache()
+    return _cache
+
+def reset_cache():
+    """Drop the shared HttpCache; the next get_cache() starts a new one."""
+    global _cache
+    _cache = None
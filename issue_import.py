@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Read issues.jsonl exports.
+Records are newline-delimited JSON objects. The source can be a plain file,
+a gzip or zstd compressed file (detected from its first bytes, whatever its
+name), or `-` for standard input, so exports can be piped in without a
+temporary copy. Plain files are memory-mapped; every source is read in
+large blocks that are cut at their last newline and decoded at once, instead
+of being read and decoded line by line, and compressed files and streams
+are parsed as they are decompressed.
+zstd needs the optional `zstandard` package; records are parsed with
+`orjson` when it is installed, which is several times faster than json.
+A line that is not valid JSON raises ValueError, or is passed to an
+on_error callback (so a validator can list it with every other problem).
+Usage: python3 issue_import.py [issues_file]   (count records and time the read)
+"""
+
+import gzip
+import io
+import json
+import mmap
+import sys
+import time
+
+from profiling import run_main
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+STDIN = '-'
+BLOCK_SIZE = 1 << 20
+
+def _parse_block(text, source, first_line, on_error=None):
+    """Parse the non-blank lines of a decoded block that ends on a line boundary."""
+    for offset, line in enumerate(text.split('\n')):
+        if line and not line.isspace():
+            try:
+                yield loads(line)
+            except ValueError as e:
+                if on_error is None:
+                    raise ValueError(f"{source}, line {first_line + offset}: {e}") from None
+                on_error(first_line + offset, str(e))
+
+def _scan(read, source, block_size=BLOCK_SIZE, on_error=None):
+    """Parse every non-blank line of a binary source, read in large blocks.
+
+    Each block is cut at its last newline and decoded as a whole, so the
+    per-line work is a str split and json.loads rather than a read call.
+    """
+    pending = b''
+    line_number = 1
+    while True:
+        block = read(block_size)
+        if not block:
+            break
+        cut = block.rfind(b'\n')
+        if cut < 0:
+            pending += block
+            continue
+        text = (pending + block[:cut]).decode('utf-8')
+        pending = block[cut + 1:]
+        yield from _parse_block(text, source, line_number, on_error)
+        line_number += text.count('\n') + 1
+    if pending:
+        yield from _parse_block(pending.decode('utf-8'), source, line_number, on_error)
+
+def _decompressed(raw, source):
+    """Wrap a binary stream in a decompressor if its first bytes call for one."""
+    head = raw.peek(4)[:4]
+    if head.startswith(GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=raw)
+    if head.startswith(ZSTD_MAGIC):
+        if not HAS_ZSTD:
+            raise ValueError(f"{source} is zstd compressed; install the zstandard package to read it")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw))
+    return None
+
+def read_issues(path, on_error=None):
+    """Yield the records of an issues.jsonl export at `path` (or `-` for stdin).
+
+    Lines that are not valid JSON raise ValueError, unless `on_error` is
+    given: then on_error(line number, message) is called and they are skipped.
+    """
+    if path == STDIN:
+        raw = sys.stdin.buffer
+        if not hasattr(raw, 'peek'):
+            raw = io.BufferedReader(raw)
+        yield from _scan((_decompressed(raw, 'stdin') or raw).read, 'stdin', on_error=on_error)
+        return
+
+    with open(path, 'rb') as raw:
+        decompressed = _decompressed(raw, path)
+        if decompressed is not None:
+            with decompressed:
+                yield from _scan(decompressed.read, path, on_error=on_error)
+            return
+        try:
+            mapped = mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return  # Empty file
+        with mapped:
+            yield from _scan(mapped.read, path, on_error=on_error)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    issues_file = argv[0] if len(argv) > 0 else 'issues.jsonl'
+
+    started = time.perf_counter()
+    count = sum(1 for _ in read_issues(issues_file))
+    elapsed = time.perf_counter() - started
+    print(f"Read {count} records from {issues_file} in {elapsed:.2f}s")
+
+if __name__ == '__main__':
+    run_main(main)
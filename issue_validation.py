@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Validate issues.jsonl records before anything is written.
+Each record key that names a project field (by field name, like
+"Story Points", or its snake_case form, like "story_points") is checked
+against the field's type: the project's live schema where it is known,
+project_config.json otherwise. Single-select values must be one of the
+field's options, numbers and dates must parse, Depends On must hold issue
+references and, when Epics are given, Epic Link must resolve to an Epic.
+The checks are compiled once into a lookup from record key to validator, so
+a record costs one dict lookup per key. Every problem is reported at once,
+and the pipeline stops before its first mutation.
+Usage: python3 issue_validation.py [owner] [project_number] [issues_file] [--epics-project N]
+                                   [--snapshot FILE] [--epics-snapshot FILE] [--offline]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter
+from datetime import date
+
+from epic_resolver import EpicResolver, parse_issue_reference
+from github_api import get_project_id
+from issue_import import read_issues
+from profiling import run_main, span
+from project_snapshot import get_project_fields, is_epic_item, load_or_fetch_snapshot, load_snapshot
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'project_config.json')
+CONFIG_TYPES = {
+    'text': 'TEXT',
+    'number': 'NUMBER',
+    'date': 'DATE',
+    'single-select': 'SINGLE_SELECT',
+    'iteration': 'ITERATION'
+}
+NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+MAX_LISTED = 200
+# Record keys the scripts write to another field: update_issue_fields.py
+# falls back to `estimate` for Story Points
+RECORD_ALIASES = {'estimate': 'Story Points'}
+
+def parse_number(value):
+    """A number field value as int when integral, float otherwise."""
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+def record_key(field_name):
+    """The snake_case record key of a field ("Story Points" -> "story_points")."""
+    return re.sub(r'\W+', '_', field_name.strip().lower()).strip('_')
+
+def load_config_fields(path=CONFIG_FILE):
+    """Field types and options from project_config.json, as {name: {'dataType', 'options'}}."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        config = json.load(f)
+    return {
+        field['name']: {'dataType': CONFIG_TYPES.get(field.get('type')), 'options': field.get('options') or []}
+        for field in config.get('project', {}).get('fields', [])
+    }
+
+def build_schema(config_fields, project_fields=None):
+    """Merge configured fields with the project's live fields (which win).
+
+    `project_fields` is {name: {'dataType', 'options', 'iterations'}} as
+    returned by get_project_fields (options and iterations optional), or
+    None when the project is not known.
+    """
+    schema = {}
+    for name in set(config_fields) | set(project_fields or {}):
+        configured = config_fields.get(name) or {}
+        live = (project_fields or {}).get(name)
+        schema[name] = {
+            'dataType': (live or configured).get('dataType'),
+            'options': list((live or {}).get('options') or configured.get('options') or []),
+            'iterations': [iteration['title'] for iteration in (live or {}).get('iterations') or []],
+            'missing': project_fields is not None and live is None
+        }
+    return schema
+
+def _check_number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return f"not a number: {value!r}"
+    if isinstance(value, str) and not NUMBER.fullmatch(value.strip()):
+        return f"not a number: {value!r}"
+    return None
+
+def _check_date(value):
+    if not isinstance(value, str) or not DATE.fullmatch(value):
+        return f"not a YYYY-MM-DD date: {value!r}"
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return f"not a valid date: {value!r}"
+    return None
+
+def _check_text(value):
+    if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+        return f"not text: {value!r}"
+    return None
+
+def _check_depends_on(value):
+    if not isinstance(value, str):
+        return f"not a list of issue references: {value!r}"
+    for part in re.split(r'[,;\s]+', value):
+        if part and parse_issue_reference(part) is None:
+            return f"not an issue reference: {part!r}"
+    return None
+
+def _check_choice(choices, kind):
+    allowed = frozenset(choices)
+    expected = ', '.join(choices)
+    def check(value):
+        if not isinstance(value, str) or value not in allowed:
+            return f"unknown {kind} {value!r} (expected one of: {expected})"
+        return None
+    return check
+
+def _check_epic_link(resolver):
+    def check(value):
+        error = _check_text(value)
+        if error:
+            return error
+        epic, _ = resolver.resolve(str(value))
+        return None if epic else f"no Epic matches {value!r}"
+    return check
+
+def field_validator(name, field, epic_resolver=None):
+    """The check for one field: check(value) -> error message or None."""
+    data_type = field['dataType']
+    if data_type == 'NUMBER':
+        return _check_number
+    if data_type == 'DATE':
+        return _check_date
+    if data_type == 'SINGLE_SELECT' and field['options']:
+        return _check_choice(field['options'], 'option')
+    if data_type == 'ITERATION' and field['iterations']:
+        return _check_choice(field['iterations'], 'iteration')
+    if name == 'Epic Link' and epic_resolver is not None:
+        return _check_epic_link(epic_resolver)
+    if name == 'Depends On':
+        return _check_depends_on
+    if data_type in ('TEXT', 'SINGLE_SELECT', 'ITERATION'):
+        return _check_text
+    return None
+
+def compile_validators(schema, epic_resolver=None):
+    """Map every record key of a field to (field name, check, results).
+
+    `results` memoizes the check per string value (exports repeat the same
+    dates, options and Epic Links across many records); it is None for free
+    text, whose values are always valid strings. Fields missing from the
+    project get a None check: the scripts ignore their values, so they are
+    counted rather than reported. Keys in RECORD_ALIASES are checked as the
+    field they are written to.
+    """
+    validators = {}
+    for name, field in schema.items():
+        check = None if field['missing'] else field_validator(name, field, epic_resolver)
+        if check is None and not field['missing']:
+            continue
+        entry = (name, check, None if check in (None, _check_text) else {})
+        validators[name] = entry
+        validators.setdefault(record_key(name), entry)
+    for key, name in RECORD_ALIASES.items():
+        if name in validators:
+            validators[key] = validators[name]
+    return validators
+
+def parse_error_collector(errors):
+    """An on_error callback for read_issues that adds unreadable lines to `errors`."""
+    def on_error(line_number, message):
+        errors.append((None, '', None, f"line {line_number}: not valid JSON ({message})"))
+    return on_error
+
+def validate_records(records, validators, errors=None):
+    """Check every record.
+
+    Returns (errors, duplicates, ignored): errors is a list of (record
+    number, title, field name, message), duplicates the titles that occur
+    more than once (the scripts use the last record with each title) and
+    ignored counts values set for fields the project lacks. Problems are
+    appended to `errors` when given, e.g. the list parse_error_collector
+    fills while the records are read, so both come out in file order.
+    """
+    errors = [] if errors is None else errors
+    titles = set()
+    duplicates = set()
+    ignored = Counter()
+    with span('index'):
+        for number, record in enumerate(records, 1):
+            if record.__class__ is not dict:
+                errors.append((number, '', None, f"not a JSON object: {record!r}"))
+                continue
+            title = record.get('title')
+            if not title or title.__class__ is not str:
+                errors.append((number, '', 'title', "missing title"))
+            elif title in titles:
+                duplicates.add(title)
+            else:
+                titles.add(title)
+            for key, value in record.items():
+                entry = validators.get(key)
+                if entry is None or value is None or value == '':
+                    continue
+                name, check, results = entry
+                if check is None:
+                    ignored[name] += 1
+                    continue
+                if results is not None and value.__class__ is str:
+                    message = results.get(value, False)
+                    if message is False:
+                        message = results[value] = check(value)
+                else:
+                    message = check(value)
+                if message:
+                    errors.append((number, title, name, message))
+    return errors, sorted(duplicates), ignored
+
+def print_report(errors, duplicates, ignored, source):
+    """Print every problem (up to MAX_LISTED lines, then counts per field)."""
+    for number, title, field, message in errors[:MAX_LISTED]:
+        if number is None:
+            print(f"  ✗ {message}")
+            continue
+        where = f"record {number}" + (f" ({title})" if title else '')
+        print(f"  ✗ {where}: {field + ': ' if field else ''}{message}")
+    if len(errors) > MAX_LISTED:
+        print(f"  ... and {len(errors) - MAX_LISTED} more")
+        for field, count in Counter(field for _, _, field, _ in errors).most_common():
+            print(f"    {field or 'record'}: {count} problems")
+    for field, count in sorted(ignored.items()):
+        print(f"  ⚠ {count} records set '{field}', which the project does not have; the values are ignored")
+    if duplicates:
+        print(f"  ⚠ Titles used by more than one record: {len(duplicates)}; only the last record of each is used")
+    if errors:
+        print(f"✗ {len(errors)} problems in {source}; fix them before syncing.")
+    else:
+        print(f"✓ {source} is valid")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate issues.jsonl against the project schema.')
+    parser.add_argument('owner', nargs='?', default='bromso')
+    parser.add_argument('project_number', nargs='?', default='17')
+    parser.add_argument('issues_file', nargs='?', default='issues.jsonl', help="issues file, or '-' for stdin")
+    parser.add_argument('--epics-project', default='18', help='project whose Epics Epic Link must match')
+    parser.add_argument('--snapshot', help='read the project schema from a saved snapshot')
+    parser.add_argument('--epics-snapshot', help='read Epics from a saved snapshot')
+    parser.add_argument('--config', default=CONFIG_FILE, help='project config with the expected field types')
+    parser.add_argument('--offline', action='store_true',
+                        help='check against project_config.json only (no schema or Epic lookup)')
+    args = parser.parse_args(argv)
+
+    project_fields = None
+    resolver = None
+    if not args.offline:
+        if args.snapshot:
+            project_fields = load_snapshot(args.snapshot)['fields']
+        else:
+            project_id, _ = get_project_id(args.owner, args.project_number)
+            if not project_id:
+                print("Failed to get project ID")
+                sys.exit(1)
+            project_fields = get_project_fields(project_id)
+        epics_snapshot = load_or_fetch_snapshot(args.owner, args.epics_project, args.epics_snapshot)
+        if epics_snapshot is None:
+            sys.exit(1)
+        resolver = EpicResolver.from_items([item for item in epics_snapshot['items'] if is_epic_item(item)])
+
+    validators = compile_validators(build_schema(load_config_fields(args.config), project_fields), resolver)
+    # Records are checked as they are parsed, so large exports are never held in memory
+    errors = []
+    records = read_issues(args.issues_file, on_error=parse_error_collector(errors))
+    errors, duplicates, ignored = validate_records(records, validators, errors)
+    print()
+    print_report(errors, duplicates, ignored, args.issues_file)
+    if errors:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    run_main(main)
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Resilient pagination over a project's items.
+Failed pages are retried with jittered exponential backoff, continuing from
+the last good cursor rather than starting over. If a page still fails, the
+items fetched so far are returned marked incomplete (never silently
+truncated) and saved as a checkpoint, so the next run of the same scan
+resumes where this one stopped.
+
+The page size adapts as the scan runs: it grows additively while pages come
+back fast and is cut multiplicatively on slow pages, timeouts and node-limit
+errors. Items with more field values than fit in one nested page get the
+rest fetched separately, so no field values are dropped.
+
+Complete scans are memoized for the run alongside other reads: asking for
+the same project and selection again returns the items without another
+scan until a mutation is made.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+
+from github_api import cache_path, run_graphql, stream_graphql
+from graphql_stream import JsonArrayStream, compact_item
+from profiling import span
+from request_coalescing import normalize_query, reads
+from request_scheduler import read_all
+
+PAGE_SIZE = 100
+MIN_PAGE_SIZE = 5
+PAGE_SIZE_STEP = 10
+TARGET_PAGE_SECONDS = 5.0
+FIELD_VALUES_PAGE_SIZE = 100
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+CHECKPOINT_MAX_AGE = 3600
+# Errors a retry cannot fix: the query or the credentials are wrong
+PERMANENT_ERROR_TYPES = {'NOT_FOUND', 'FORBIDDEN', 'INSUFFICIENT_SCOPES', 'UNAUTHORIZED'}
+
+ITEMS_QUERY = '''{{
+  node(id: "{project_id}") {{
+    ... on ProjectV2 {{
+      items(first: {page_size}{after_clause}) {{
+        nodes {{{node_fields}
+        }}
+        pageInfo {{
+          hasNextPage
+          endCursor
+        }}
+      }}
+    }}
+  }}
+}}'''
+
+FIELD_VALUES_QUERY = '''{{
+  node(id: "{item_id}") {{
+    ... on ProjectV2Item {{
+      fieldValues(first: {page_size}{after_clause}) {{
+        nodes {{{selection}
+        }}
+        pageInfo {{
+          hasNextPage
+          endCursor
+        }}
+      }}
+    }}
+  }}
+}}'''
+
+FIELD_VALUES_CONNECTION = re.compile(r'fieldValues\(first: \d+\) \{')
+NODE_LIMIT = re.compile(r'requests up to ([\d,]+) nodes.*?limit of ([\d,]+)')
+TIMEOUT_MESSAGES = ('timeout', 'timed out', 'something went wrong', 'http 502', 'http 504')
+
+class PageError(Exception):
+    """A page request failed. `retryable` tells whether trying again may help.
+
+    `kind` is 'timeout' or 'node_limit' when a smaller page may succeed, with
+    `scale` the fraction of the page size that fits under a node limit.
+    """
+
+    def __init__(self, message, retryable=True, kind=None, scale=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.kind = kind
+        self.scale = scale
+
+class PageSizer:
+    """Additive-increase, multiplicative-decrease control of the page size."""
+
+    def __init__(self, size=PAGE_SIZE, minimum=MIN_PAGE_SIZE, maximum=PAGE_SIZE, target_seconds=TARGET_PAGE_SECONDS):
+        self.size = max(minimum, min(size, maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+
+    def succeeded(self, seconds):
+        """Grow after a fast page, shrink after a slow one."""
+        if seconds > self.target_seconds:
+            self.size = max(self.minimum, self.size // 2)
+        else:
+            self.size = min(self.maximum, self.size + PAGE_SIZE_STEP)
+
+    def failed(self, error):
+        """Shrink after a timeout or node-limit error. False if already minimal."""
+        if self.size <= self.minimum:
+            return False
+        if error.kind == 'node_limit' and error.scale:
+            # The node limit is fixed, so never probe above what fits under it
+            self.maximum = max(self.minimum, int(self.size * error.scale))
+            self.size = self.maximum
+        else:
+            self.size = max(self.minimum, self.size // 2)
+        return True
+
+class ProjectItems(list):
+    """Items of a project scan.
+
+    `complete` is False when the scan stopped early; `error` then says why
+    and `cursor` is where a later scan will resume.
+    """
+
+    def __init__(self, items=(), complete=True, error=None, cursor=None):
+        super().__init__(items)
+        self.complete = complete
+        self.error = error
+        self.cursor = cursor
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def classify_errors(errors):
+    """Build a PageError from GraphQL errors."""
+    message = '; '.join(err.get('message', 'Unknown error') for err in errors)
+    for error in errors:
+        match = NODE_LIMIT.search(error.get('message', ''))
+        if error.get('type') == 'MAX_NODE_LIMIT_EXCEEDED' or match:
+            scale = None
+            if match:
+                requested, limit = (int(group.replace(',', '')) for group in match.groups())
+                scale = limit / requested
+            return PageError(message, kind='node_limit', scale=scale)
+    if any(text in message.lower() for text in TIMEOUT_MESSAGES):
+        return PageError(message, kind='timeout')
+    return PageError(message, retryable=not is_permanent(errors))
+
+def is_permanent(errors):
+    """Whether GraphQL errors are ones a retry cannot fix."""
+    for error in errors:
+        if error.get('type') in PERMANENT_ERROR_TYPES:
+            return True
+        message = error.get('message', '')
+        if "doesn't exist on type" in message or 'Parse error' in message:
+            return True
+    return False
+
+def with_field_values_paging(node_fields):
+    """Add pageInfo to an item selection's fieldValues connection, if it has one."""
+    return FIELD_VALUES_CONNECTION.sub(
+        lambda match: match.group() + ' pageInfo { hasNextPage endCursor }', node_fields, count=1
+    )
+
+def field_values_selection(node_fields):
+    """The selection inside fieldValues { nodes { ... } }, or None."""
+    match = FIELD_VALUES_CONNECTION.search(node_fields)
+    if not match:
+        return None
+    start = node_fields.index('nodes {', match.end()) + len('nodes {')
+    depth = 1
+    for pos in range(start, len(node_fields)):
+        if node_fields[pos] == '{':
+            depth += 1
+        elif node_fields[pos] == '}':
+            depth -= 1
+            if depth == 0:
+                return node_fields[start:pos].rstrip()
+    return None
+
+def fetch_page(project_id, node_fields, cursor=None, page_size=PAGE_SIZE):
+    """Fetch one page of items. Returns (items, page_info); raises PageError."""
+    after_clause = f', after: "{cursor}"' if cursor else ''
+    query = ITEMS_QUERY.format(project_id=project_id, page_size=page_size,
+                               after_clause=after_clause, node_fields=node_fields)
+
+    page = JsonArrayStream(stream_graphql(query), transform=compact_item)
+    try:
+        with span('fetch'):
+            items = list(page)
+    except ValueError as e:
+        raise PageError(f'Truncated response: {e}', kind='timeout')
+
+    data = page.skeleton
+    if data.get('errors'):
+        raise classify_errors(data['errors'])
+
+    items_data = ((data.get('data') or {}).get('node') or {}).get('items')
+    if items_data is None:
+        raise PageError('Response has no items', retryable=False)
+    return items, items_data.get('pageInfo') or {}
+
+def fetch_remaining_field_values(item, selection, max_retries=MAX_RETRIES):
+    """Page in the field values of an item that did not fit in its first page."""
+    field_values = item['fieldValues']
+    page_info = field_values.pop('pageInfo', None) or {}
+    cursor = page_info.get('endCursor')
+
+    while page_info.get('hasNextPage'):
+        query = FIELD_VALUES_QUERY.format(item_id=item['id'], page_size=FIELD_VALUES_PAGE_SIZE,
+                                          after_clause=f', after: "{cursor}"', selection=selection)
+        for attempt in range(max_retries + 1):
+            data = run_graphql(query)
+            if not data.get('errors'):
+                break
+            error = classify_errors(data['errors'])
+            if not error.retryable or attempt == max_retries:
+                raise error
+            time.sleep(backoff_delay(attempt))
+
+        connection = ((data.get('data') or {}).get('node') or {}).get('fieldValues') or {}
+        field_values['nodes'].extend(fv for fv in connection.get('nodes', []) if fv)
+        page_info = connection.get('pageInfo') or {}
+        cursor = page_info.get('endCursor')
+    compact_item(item)
+
+def _checkpoint_file(project_id, node_fields):
+    key = hashlib.sha1(f'{project_id}\n{node_fields}'.encode('utf-8')).hexdigest()[:16]
+    return cache_path(f'scan_{key}.json')
+
+def _load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            checkpoint = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if time.time() - checkpoint.get('saved_at', 0) > CHECKPOINT_MAX_AGE:
+        return None
+    return checkpoint
+
+def _save_checkpoint(path, items, cursor):
+    temp_file = f'{path}.{os.getpid()}.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump({'saved_at': time.time(), 'cursor': cursor, 'items': items}, f)
+    os.replace(temp_file, path)
+
+class ItemScan:
+    """Iterate over a project's items one page (a list of items) at a time.
+
+    Pages are retried and resized as described above. When the scan stops
+    early, iteration ends with `complete` False, and `error` and `cursor`
+    say why and where; a checkpoint is saved for the next run, which starts
+    by yielding the checkpointed items as its first page.
+    """
+
+    def __init__(self, project_id, node_fields, page_size=PAGE_SIZE, max_retries=MAX_RETRIES, resume=True):
+        self.project_id = project_id
+        self.node_fields = node_fields
+        self.max_retries = max_retries
+        self.resume = resume
+        self.sizer = PageSizer(maximum=page_size)
+        self.items = []
+        self.complete = False
+        self.error = None
+        self.cursor = None
+
+    def __len__(self):
+        return len(self.items)
+
+    def _fetch_with_retries(self, query_fields, selection):
+        """Fetch the page at self.cursor. Returns (items, page_info); raises PageError."""
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                page_items, page_info = fetch_page(self.project_id, query_fields, self.cursor, self.sizer.size)
+                overflowing = []
+                for item in page_items:
+                    if (item.get('fieldValues') or {}).get('pageInfo', {}).get('hasNextPage'):
+                        overflowing.append(item)
+                    elif 'fieldValues' in item:
+                        item['fieldValues'].pop('pageInfo', None)
+                # Independent reads: page them in concurrently on the read lane
+                read_all(lambda item: fetch_remaining_field_values(item, selection, self.max_retries), overflowing)
+                self.sizer.succeeded(time.perf_counter() - started)
+                return page_items, page_info
+            except PageError as e:
+                # A smaller page may go through where this one did not
+                if e.kind and self.sizer.failed(e):
+                    print(f"  Page after {len(self.items)} items failed ({e}); retrying with {self.sizer.size} items")
+                    continue
+                if not e.retryable or attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"  Page after {len(self.items)} items failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    def __iter__(self):
+        checkpoint_file = _checkpoint_file(self.project_id, self.node_fields)
+        checkpoint = _load_checkpoint(checkpoint_file) if self.resume else None
+        if checkpoint:
+            self.items, self.cursor = checkpoint['items'], checkpoint['cursor']
+            print(f"  Resuming scan after {len(self.items)} items from an interrupted run")
+            if self.items:
+                yield list(self.items)
+
+        selection = field_values_selection(self.node_fields)
+        query_fields = with_field_values_paging(self.node_fields)
+
+        while True:
+            try:
+                page_items, page_info = self._fetch_with_retries(query_fields, selection)
+            except PageError as e:
+                self.error = str(e)
+                _save_checkpoint(checkpoint_file, self.items, self.cursor)
+                return
+
+            self.items.extend(page_items)
+            yield page_items
+            if not page_info.get('hasNextPage'):
+                break
+            self.cursor = page_info.get('endCursor')
+
+        self.complete = True
+        if os.path.exists(checkpoint_file):
+            os.remove(checkpoint_file)
+
+def prefetch(iterable, depth=1):
+    """Iterate in a background thread, staying up to `depth` elements ahead.
+
+    Lets the next page download while the caller works on the current one.
+    Exceptions from the iterable are re-raised in the caller.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    done = object()
+
+    def produce():
+        try:
+            for element in iterable:
+                buffer.put((element, None))
+        except BaseException as e:
+            buffer.put((None, e))
+        buffer.put((done, None))
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        element, error = buffer.get()
+        if error is not None:
+            raise error
+        if element is done:
+            return
+        yield element
+
+def fetch_project_items(project_id, node_fields, page_size=PAGE_SIZE, max_retries=MAX_RETRIES, resume=True):
+    """Fetch every item of a project, retrying failed pages.
+
+    `node_fields` is the selection for each item node. Returns ProjectItems;
+    check `complete` before treating a missing item as absent. Repeated
+    calls share one scan; the item dicts are shared too, so treat them as
+    read-only.
+    """
+    def scan_items():
+        scan = ItemScan(project_id, node_fields, page_size, max_retries, resume)
+        for _ in scan:
+            pass
+        return ProjectItems(scan.items, complete=scan.complete, error=scan.error, cursor=scan.cursor)
+
+    key = ('project_items', project_id, normalize_query(node_fields))
+    items = reads.get(key, scan_items, keep=lambda items: items.complete)
+    return ProjectItems(items, complete=items.complete, error=items.error, cursor=items.cursor)
+
+def require_complete(items, what='project items'):
+    """Stop the run if a scan is incomplete, rather than act on partial data."""
+    if items.complete:
+        return
+    print(f"✗ Only fetched {len(items)} {what}: {items.error}")
+    print("  Progress was saved; run again to resume the scan.")
+    sys.exit(1)
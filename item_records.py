@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory representation of project items for large projects.
+Raw GraphQL items are nested dicts that repeat every field name and
+`field { id name }` object on every item. An ItemStore keeps one slotted
+record per item and stores field values column-wise, one array per field
+indexed by item position: floats in typed arrays, strings deduplicated
+through a shared pool.
+Usage: python3 item_records.py [item_count]   (memory benchmark against raw dicts)
+"""
+
+import json
+import math
+import sys
+import tracemalloc
+from array import array
+
+from profiling import run_main
+
+class ItemRecord:
+    """One project item. Field values live in the owning ItemStore."""
+
+    __slots__ = ('store', 'index', 'id', 'updated_at', 'content_id', 'content_updated_at', 'number', 'title', 'state')
+
+    def __init__(self, store, index, item_id, updated_at, content_id, content_updated_at, number, title, state):
+        self.store = store
+        self.index = index
+        self.id = item_id
+        self.updated_at = updated_at
+        self.content_id = content_id
+        self.content_updated_at = content_updated_at
+        self.number = number
+        self.title = title
+        self.state = state
+
+    def get(self, field_name, default=None):
+        """The value of one field, or `default` if the item has none."""
+        value = self.store.value(self.index, field_name)
+        return default if value is None else value
+
+    def field_values(self):
+        """All field values as {field name: value}, like item_field_values."""
+        return self.store.values(self.index)
+
+    def __repr__(self):
+        return f'ItemRecord({self.id!r}, #{self.number}, {self.title!r})'
+
+class ItemStore:
+    """Items as slotted records plus one value column per field."""
+
+    def __init__(self):
+        self.records = []
+        self.fields = []
+        self.field_index = {}
+        self.field_ids = {}
+        self.columns = []
+        self.strings = {}
+
+    def _string(self, value):
+        """Deduplicate a string through the pool."""
+        if value is None:
+            return None
+        return self.strings.setdefault(value, value)
+
+    def _column(self, name, field_id, numeric):
+        index = self.field_index.get(name)
+        if index is None:
+            name = sys.intern(name)
+            index = len(self.fields)
+            self.fields.append(name)
+            self.field_index[name] = index
+            self.field_ids[name] = self._string(field_id)
+            self.columns.append(array('d') if numeric else [])
+        return self.columns[index]
+
+    def add(self, item):
+        """Add a raw GraphQL item dict and return its record."""
+        index = len(self.records)
+        content = item.get('content') or {}
+        record = ItemRecord(
+            self, index, item.get('id'), self._string(item.get('updatedAt')), content.get('id'),
+            self._string(content.get('updatedAt')), content.get('number'), self._string(content.get('title')), self._string(content.get('state'))
+        )
+        self.records.append(record)
+
+        for fv in (item.get('fieldValues') or {}).get('nodes', []):
+            field = fv.get('field') or {}
+            if not field.get('name'):
+                continue
+            if 'number' in fv:
+                column, value = self._column(field['name'], field.get('id'), True), fv['number']
+            else:
+                value = next((fv[key] for key in ('text', 'name', 'date', 'title') if key in fv), None)
+                column = self._column(field['name'], field.get('id'), False)
+                value = self._string(value)
+            if isinstance(column, array):
+                if value is None:
+                    continue
+                missing = math.nan
+            else:
+                missing = None
+            if len(column) < index:
+                column.extend([missing] * (index - len(column)))
+            column.append(value)
+        return record
+
+    @classmethod
+    def from_items(cls, items):
+        store = cls()
+        for item in items:
+            store.add(item)
+        return store
+
+    def value(self, index, field_name):
+        """The value of one field for the item at `index`, or None."""
+        field = self.field_index.get(field_name)
+        if field is None:
+            return None
+        column = self.columns[field]
+        if index >= len(column):
+            return None
+        value = column[index]
+        if isinstance(column, array):
+            return None if math.isnan(value) else value
+        return value
+
+    def values(self, index):
+        """All field values of the item at `index` as {field name: value}."""
+        values = {}
+        for name in self.fields:
+            value = self.value(index, name)
+            if value is not None:
+                values[name] = value
+        return values
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+def synthetic_items(count):
+    """Items shaped like the GraphQL response, for the memory benchmark."""
+    statuses = ['Icebox', 'Next Sprint', 'Current Sprint', 'Blocked', 'Test', 'Done']
+    items = []
+    for i in range(count):
+        items.append({
+            'id': f'PVTI_lADOBx{i:010d}',
+            'updatedAt': f'2025-10-{1 + i % 28:02d}T12:00:00Z',
+            'content': {'id': f'I_kwDOMx{i:010d}', 'number': i + 1, 'title': f'Issue title number {i % 5000}', 'state': 'OPEN'},
+            'fieldValues': {'nodes': [
+                {'field': {'id': 'PVTSSF_status', 'name': 'Status'}, 'name': statuses[i % len(statuses)], 'optionId': f'opt{i % 6}'},
+                {'field': {'id': 'PVTF_points', 'name': 'Story Points'}, 'number': float(i % 13)},
+                {'field': {'id': 'PVTF_estimate', 'name': 'Estimate'}, 'number': float(i % 8)},
+                {'field': {'id': 'PVTF_epic', 'name': 'Epic Link'}, 'text': f'EPIC: Epic {i % 40}'},
+                {'field': {'id': 'PVTF_due', 'name': 'Due Date'}, 'date': f'2026-0{1 + i % 9}-15'},
+                {'field': {'id': 'PVTIF_sprint', 'name': 'Sprint'}, 'title': f'Sprint {i % 20}', 'iterationId': f'it{i % 20}'},
+            ]}
+        })
+    return items
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 100000
+    # Round-trip through JSON so every string is a separate object, as when parsed from a response
+    text = json.dumps(synthetic_items(count))
+
+    tracemalloc.start()
+    items = json.loads(text)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    store = ItemStore.from_items(items)
+    del items
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"{count} items")
+    print(f"  Raw dicts:  {dict_bytes / 1e6:8.1f} MB")
+    print(f"  ItemStore:  {store_bytes / 1e6:8.1f} MB ({store_bytes / dict_bytes:.0%} of raw)")
+    assert store.records[-1].get('Status') and len(store) == count
+
+if __name__ == '__main__':
+    run_main(main)
@@ -4,111 +4,54 @@ Link child issues in project #17 to parent Epic issues in project #18.
 Matches based on Epic Link field values.
 """
 
-import json
 import sys
-import subprocess
-import time
-import re
 
-def get_project_id(owner, project_number):
-    """Get project ID."""
-    query = f'''{{
-      user(login: "{owner}") {{
-        projectV2(number: {project_number}) {{
-          id
-          title
-        }}
-      }}
-    }}'''
-    
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={query}'],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode != 0:
-        return None, None
-    
-    data = json.loads(result.stdout)
-    project = data.get('data', {}).get('user', {}).get('projectV2', {})
-    return project.get('id'), project.get('title')
+from epic_resolver import EpicResolver, normalize_epic_title
+from github_api import get_project_ids, run_graphql, run_graphql_many
+from item_paginator import fetch_project_items, require_complete
+from profiling import run_main
 
-def get_project_items(project_id):
-    """Get all items from a project with their field values."""
-    all_items = []
-    cursor = None
-    
-    while True:
-        query = f'''{{
-          node(id: "{project_id}") {{
-            ... on ProjectV2 {{
-              items(first: 100{f', after: "{cursor}"' if cursor else ''}) {{
-                nodes {{
+ITEM_FIELDS = '''
                   id
-                  content {{
-                    ... on Issue {{
+                  content {
+                    ... on Issue {
                       id
                       number
                       title
-                    }}
-                    ... on DraftIssue {{
+                    }
+                    ... on DraftIssue {
                       id
                       title
-                    }}
-                  }}
-                  fieldValues(first: 100) {{
-                    nodes {{
-                      ... on ProjectV2ItemFieldTextValue {{
-                        field {{
-                          ... on ProjectV2Field {{
+                    }
+                  }
+                  fieldValues(first: 100) {
+                    nodes {
+                      ... on ProjectV2ItemFieldTextValue {
+                        field {
+                          ... on ProjectV2Field {
                             id
                             name
-                          }}
-                        }}
+                          }
+                        }
                         text
-                      }}
-                      ... on ProjectV2ItemFieldSingleSelectValue {{
-                        field {{
-                          ... on ProjectV2SingleSelectField {{
+                      }
+                      ... on ProjectV2ItemFieldSingleSelectValue {
+                        field {
+                          ... on ProjectV2SingleSelectField {
                             id
                             name
-                          }}
-                        }}
+                          }
+                        }
                         name
-                      }}
-                    }}
-                  }}
-                }}
-                pageInfo {{
-                  hasNextPage
-                  endCursor
-                }}
-              }}
-            }}
-          }}
-        }}'''
-        
-        result = subprocess.run(
-            ['gh', 'api', 'graphql', '-f', f'query={query}'],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            break
-        
-        data = json.loads(result.stdout)
-        items = data.get('data', {}).get('node', {}).get('items', {}).get('nodes', [])
-        all_items.extend(items)
-        
-        page_info = data.get('data', {}).get('node', {}).get('items', {}).get('pageInfo', {})
-        if not page_info.get('hasNextPage'):
-            break
-        
-        cursor = page_info.get('endCursor')
-    
-    return all_items
+                      }
+                    }
+                  }'''
+
+def get_project_items(project_id):
+    """Get all items from a project with their field values."""
+    items = fetch_project_items(project_id, ITEM_FIELDS)
+    require_complete(items)
+    return items
 
 def get_field_id(project_id, field_name):
     """Get field ID by name."""
@@ -127,16 +70,11 @@ def get_field_id(project_id, field_name):
       }}
     }}'''
     
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={query}'],
-        capture_output=True,
-        text=True
-    )
+    data = run_graphql(query)
     
-    if result.returncode != 0:
+    if data.get('errors'):
         return None
     
-    data = json.loads(result.stdout)
     fields = data.get('data', {}).get('node', {}).get('fields', {}).get('nodes', [])
     
     for field in fields:
@@ -153,24 +91,9 @@ def extract_epic_link(item):
             return fv.get('text', '')
     return None
 
-def normalize_epic_title(title):
-    """Normalize epic title for matching."""
-    # Remove "EPIC: " prefix if present
-    title = re.sub(r'^EPIC:\s*', '', title, flags=re.IGNORECASE)
-    return title.strip()
-
-def update_parent_issue_direct(project_id, item_id, parent_item_id, parent_field_id):
-    """Update the Parent issue field using parent's project item ID directly."""
-    # Try different formats - GitHub API might accept the item ID string directly
-    # First try: using issueId field (parent issue node ID might be needed)
-    # Actually, for PARENT_ISSUE, we need the parent's project item ID
-    # But the value might just be the item ID string wrapped differently
-    
-    # Based on GitHub's API, PARENT_ISSUE field accepts an issueId (the issue node ID, not project item ID)
-    # So we need to get the issue ID from the parent item first
-    
-    # Get parent item's issue ID
-    query = f'''{{
+def parent_issue_query(parent_item_id):
+    """Query for the issue node ID behind a project item."""
+    return f'''{{
       node(id: "{parent_item_id}") {{
         ... on ProjectV2Item {{
           content {{
@@ -181,18 +104,31 @@ def update_parent_issue_direct(project_id, item_id, parent_item_id, parent_field
         }}
       }}
     }}'''
+
+def parent_issue_id_from(data):
+    if data.get('errors'):
+        return None
+    return (((data.get('data') or {}).get('node') or {}).get('content') or {}).get('id')
+
+def get_parent_issue_ids(parent_item_ids):
+    """Issue node IDs of several project items, looked up in packed requests."""
+    parent_item_ids = list(parent_item_ids)
+    responses = run_graphql_many([parent_issue_query(item_id) for item_id in parent_item_ids])
+    return {item_id: parent_issue_id_from(data) for item_id, data in zip(parent_item_ids, responses)}
+
+def update_parent_issue_direct(project_id, item_id, parent_item_id, parent_field_id, parent_issue_id=None):
+    """Update the Parent issue field using parent's project item ID directly."""
+    # Try different formats - GitHub API might accept the item ID string directly
+    # First try: using issueId field (parent issue node ID might be needed)
+    # Actually, for PARENT_ISSUE, we need the parent's project item ID
+    # But the value might just be the item ID string wrapped differently
     
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={query}'],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode != 0:
-        return False
+    # Based on GitHub's API, PARENT_ISSUE field accepts an issueId (the issue node ID, not project item ID)
+    # So we need to get the issue ID from the parent item first (unless it was looked up in advance)
     
-    data = json.loads(result.stdout)
-    parent_issue_id = data.get('data', {}).get('node', {}).get('content', {}).get('id')
+    # Get parent item's issue ID
+    if parent_issue_id is None:
+        parent_issue_id = parent_issue_id_from(run_graphql(parent_issue_query(parent_item_id)))
     
     if not parent_issue_id:
         return False
@@ -213,27 +149,14 @@ def update_parent_issue_direct(project_id, item_id, parent_item_id, parent_field
       }}
     }}'''
     
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={mutation}'],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode == 0:
-        data = json.loads(result.stdout)
-        if data.get('errors'):
-            print(f"    Error: {json.dumps(data.get('errors'))}")
-            return False
+    data = run_graphql(mutation)
+    
+    if not data.get('errors'):
         return True
     
     # Print error for debugging
-    try:
-        data = json.loads(result.stdout)
-        if data.get('errors'):
-            error_msg = data.get('errors')[0].get('message', 'Unknown error')
-            print(f"    Error: {error_msg}")
-    except:
-        print(f"    Error: {result.stderr[:200]}")
+    error_msg = data['errors'][0].get('message', 'Unknown error')
+    print(f"    Error: {error_msg[:200]}")
     
     return False
 
@@ -258,16 +181,11 @@ def update_parent_issue(project_id, item_id, parent_issue_id, parent_field_id):
       }}
     }}'''
     
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={query}'],
-        capture_output=True,
-        text=True
-    )
+    data = run_graphql(query)
     
-    if result.returncode != 0:
+    if data.get('errors'):
         return False
     
-    data = json.loads(result.stdout)
     items = data.get('data', {}).get('node', {}).get('items', {}).get('nodes', [])
     
     # Find parent's project item ID
@@ -296,13 +214,9 @@ def update_parent_issue(project_id, item_id, parent_issue_id, parent_field_id):
       }}
     }}'''
     
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={mutation}'],
-        capture_output=True,
-        text=True
-    )
+    data = run_graphql(mutation)
     
-    if result.returncode != 0:
+    if data.get('errors'):
         # Try alternative format
         mutation = f'''mutation {{
           updateProjectV2ItemFieldValue(input: {{
@@ -319,32 +233,22 @@ def update_parent_issue(project_id, item_id, parent_issue_id, parent_field_id):
           }}
         }}'''
         
-        result = subprocess.run(
-            ['gh', 'api', 'graphql', '-f', f'query={mutation}'],
-            capture_output=True,
-            text=True
-        )
-    
-    if result.returncode == 0:
-        # Check for errors in response
-        data = json.loads(result.stdout)
-        if data.get('errors'):
-            return False
-        return True
+        data = run_graphql(mutation)
     
-    return False
+    return not data.get('errors')
 
-def main():
-    owner = sys.argv[1] if len(sys.argv) > 1 else 'bromso'
-    epics_project_num = sys.argv[2] if len(sys.argv) > 2 else '18'
-    issues_project_num = sys.argv[3] if len(sys.argv) > 3 else '17'
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    owner = argv[0] if len(argv) > 0 else 'bromso'
+    epics_project_num = argv[1] if len(argv) > 1 else '18'
+    issues_project_num = argv[2] if len(argv) > 2 else '17'
     
     print(f"Linking child issues from project #{issues_project_num} to Epics in project #{epics_project_num}...")
     print()
     
     # Get project IDs
-    epics_project_id, epics_project_title = get_project_id(owner, epics_project_num)
-    issues_project_id, issues_project_title = get_project_id(owner, issues_project_num)
+    (epics_project_id, epics_project_title), (issues_project_id, issues_project_title) = get_project_ids(
+        owner, [epics_project_num, issues_project_num])
     
     if not epics_project_id or not issues_project_id:
         print("Failed to get project IDs")
@@ -386,6 +290,7 @@ def main():
             epic_lookup[normalized] = {
                 'item_id': epic_item_id,
                 'issue_id': epic_issue_id,
+                'issue_number': content.get('number'),
                 'title': title
             }
             epic_issues_to_add.append(epic_issue_id)
@@ -415,14 +320,9 @@ def main():
           }}
         }}'''
         
-        result = subprocess.run(
-            ['gh', 'api', 'graphql', '-f', f'query={query}'],
-            capture_output=True,
-            text=True
-        )
+        data = run_graphql(query)
         
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
+        if not data.get('errors'):
             items = data.get('data', {}).get('node', {}).get('items', {}).get('nodes', [])
             found = False
             for item in items:
@@ -444,18 +344,12 @@ def main():
                   }}
                 }}'''
                 
-                result = subprocess.run(
-                    ['gh', 'api', 'graphql', '-f', f'query={mutation}'],
-                    capture_output=True,
-                    text=True
-                )
+                data = run_graphql(mutation)
                 
-                if result.returncode == 0:
-                    data = json.loads(result.stdout)
+                if not data.get('errors'):
                     item_id = data.get('data', {}).get('addProjectV2ItemById', {}).get('item', {}).get('id')
                     if item_id:
                         epics_in_project17[epic_issue_id] = item_id
-                        time.sleep(0.2)
     
     # Update epic lookup with project #17 item IDs
     for normalized, epic_info in epic_lookup.items():
@@ -466,12 +360,18 @@ def main():
     print(f"Epics ready in project #17: {len(epics_in_project17)}/{len(epic_lookup)}")
     print()
     
+    resolver = EpicResolver(epic_lookup.values())
+    
     # Get all child issues
     print("Fetching child issues from project #17...")
     issues = get_project_items(issues_project_id)
     print(f"Found {len(issues)} items")
     print()
     
+    # Look up every parent's issue ID up front, packed into as few requests as fit
+    parent_issue_ids = get_parent_issue_ids(
+        {info['project17_item_id'] for info in epic_lookup.values() if info.get('project17_item_id')})
+    
     # Match and link
     linked_count = 0
     failed_count = 0
@@ -491,9 +391,9 @@ def main():
         # Normalize epic link for matching
         normalized_link = normalize_epic_title(epic_link)
         
-        # Find matching epic
-        if normalized_link in epic_lookup:
-            epic_info = epic_lookup[normalized_link]
+        # Find matching epic (exact title first, then fuzzy)
+        epic_info, score = resolver.resolve(epic_link)
+        if epic_info:
             parent_item_id = epic_info.get('project17_item_id')
             
             if not parent_item_id:
@@ -503,8 +403,11 @@ def main():
             
             print(f"Linking: {issue_title}")
             print(f"  → Epic: {epic_info['title']}")
+            if score < 1.0:
+                print(f"  ≈ Fuzzy match for '{epic_link}' (score: {score})")
             
-            if update_parent_issue_direct(issues_project_id, issue_item_id, parent_item_id, parent_field_id):
+            if update_parent_issue_direct(issues_project_id, issue_item_id, parent_item_id, parent_field_id,
+                                          parent_issue_ids.get(parent_item_id)):
                 print(f"  ✓ Linked successfully")
                 linked_count += 1
             else:
@@ -514,11 +417,10 @@ def main():
             print(f"⚠ No matching Epic found for: {issue_title}")
             print(f"  Epic Link value: '{epic_link}' (normalized: '{normalized_link}')")
         
-        time.sleep(0.2)  # Rate limiting
         print()
     
     print(f"Done! Linked {linked_count} issues, {failed_count} failed.")
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
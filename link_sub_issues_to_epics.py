@@ -3,95 +3,34 @@
 Link child issues from project #17 as sub-issues to their parent Epics in project #18.
 """
 
-import json
 import sys
-import subprocess
 import time
-import re
 
-def get_project_id(owner, project_number):
-    """Get project ID."""
-    query = f'''{{
-      user(login: "{owner}") {{
-        projectV2(number: {project_number}) {{
-          id
-          title
-        }}
-      }}
-    }}'''
-    
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={query}'],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode != 0:
-        return None, None
-    
-    data = json.loads(result.stdout)
-    project = data.get('data', {}).get('user', {}).get('projectV2', {})
-    return project.get('id'), project.get('title')
+from epic_resolver import EpicResolver, normalize_epic_title
+from github_api import get_project_ids, run_graphql, run_graphql_many
+from issue_import import read_issues
+from item_paginator import fetch_project_items, require_complete
+from profiling import run_main
 
-def get_project_items(project_id):
-    """Get all items from a project."""
-    all_items = []
-    cursor = None
-    has_next_page = True
-    
-    while has_next_page:
-        after_clause = f', after: "{cursor}"' if cursor else ''
-        query = f'''{{
-          node(id: "{project_id}") {{
-            ... on ProjectV2 {{
-              items(first: 100{after_clause}) {{
-                nodes {{
+ITEM_FIELDS = '''
                   id
-                  content {{
-                    ... on Issue {{
+                  content {
+                    ... on Issue {
                       id
                       number
                       title
-                    }}
-                    ... on DraftIssue {{
+                    }
+                    ... on DraftIssue {
                       id
                       title
-                    }}
-                  }}
-                }}
-                pageInfo {{
-                  hasNextPage
-                  endCursor
-                }}
-              }}
-            }}
-          }}
-        }}'''
-        
-        result = subprocess.run(
-            ['gh', 'api', 'graphql', '-f', f'query={query}'],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            break
-        
-        data = json.loads(result.stdout)
-        node = data.get('data', {}).get('node', {})
-        items_data = node.get('items', {})
-        items = items_data.get('nodes', [])
-        all_items.extend(items)
-        
-        page_info = items_data.get('pageInfo', {})
-        has_next_page = page_info.get('hasNextPage', False)
-        cursor = page_info.get('endCursor')
-    
-    return all_items
+                    }
+                  }'''
 
-def normalize_epic_title(title):
-    """Normalize epic title for matching."""
-    return re.sub(r'^EPIC:\s*', '', title, flags=re.IGNORECASE).strip()
+def get_project_items(project_id):
+    """Get all items from a project."""
+    items = fetch_project_items(project_id, ITEM_FIELDS)
+    require_complete(items)
+    return items
 
 def add_item_to_project(project_id, issue_node_id):
     """Add an issue to a project."""
@@ -106,17 +45,23 @@ def add_item_to_project(project_id, issue_node_id):
       }}
     }}'''
     
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={mutation}'],
-        capture_output=True,
-        text=True
-    )
+    data = run_graphql(mutation)
     
-    if result.returncode == 0:
-        data = json.loads(result.stdout)
+    if not data.get('errors'):
         return data.get('data', {}).get('addProjectV2ItemById', {}).get('item', {}).get('id')
     return None
 
+def epic_body_query(owner, repo, issue_number):
+    """Query for an issue's ID and body."""
+    return f'''{{
+      repository(owner: "{owner}", name: "{repo}") {{
+        issue(number: {issue_number}) {{
+          id
+          body
+        }}
+      }}
+    }}'''
+
 def get_issue_node_id(owner, repo, issue_number):
     """Get issue node ID from issue number."""
     query = f'''{{
@@ -128,33 +73,30 @@ def get_issue_node_id(owner, repo, issue_number):
       }}
     }}'''
     
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={query}'],
-        capture_output=True,
-        text=True
-    )
+    data = run_graphql(query)
     
-    if result.returncode != 0:
+    if data.get('errors'):
         return None, None
     
-    data = json.loads(result.stdout)
     issue = data.get('data', {}).get('repository', {}).get('issue')
     if issue:
         return issue.get('id'), issue.get('title')
     return None, None
 
-def main():
-    owner = sys.argv[1] if len(sys.argv) > 1 else 'bromso'
-    repo = sys.argv[2] if len(sys.argv) > 2 else 'uxcel-product-roadmap'
-    epics_project_num = sys.argv[3] if len(sys.argv) > 3 else '18'
-    issues_project_num = sys.argv[4] if len(sys.argv) > 4 else '17'
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    owner = argv[0] if len(argv) > 0 else 'bromso'
+    repo = argv[1] if len(argv) > 1 else 'uxcel-product-roadmap'
+    epics_project_num = argv[2] if len(argv) > 2 else '18'
+    issues_project_num = argv[3] if len(argv) > 3 else '17'
+    issues_file = argv[4] if len(argv) > 4 else 'issues.jsonl'
     
     print(f"Linking sub-issues from project #{issues_project_num} to Epics in project #{epics_project_num}...")
     print()
     
     # Get project IDs
-    epics_project_id, epics_project_title = get_project_id(owner, epics_project_num)
-    issues_project_id, issues_project_title = get_project_id(owner, issues_project_num)
+    (epics_project_id, epics_project_title), (issues_project_id, issues_project_title) = get_project_ids(
+        owner, [epics_project_num, issues_project_num])
     
     if not epics_project_id or not issues_project_id:
         print("Failed to get project IDs")
@@ -165,18 +107,13 @@ def main():
     print()
     
     # Load issues data
-    issues_file = 'issues.jsonl'
     issues_data = {}
     
-    with open(issues_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                issue = json.loads(line)
-                title = issue.get('title', '')
-                # Only process non-Epic issues
-                if 'EPIC:' not in title.upper():
-                    issues_data[title] = issue
+    for issue in read_issues(issues_file):
+        title = issue.get('title', '')
+        # Only process non-Epic issues
+        if 'EPIC:' not in title.upper():
+            issues_data[title] = issue
     
     print(f"Loaded {len(issues_data)} child issues from {issues_file}")
     print()
@@ -231,6 +168,7 @@ def main():
     
     # Build mapping: Epic -> list of child issues
     epic_to_children = {}
+    resolver = EpicResolver(epic_lookup.values())
     
     for child_title, child_info in child_issues.items():
         if child_title in issues_data:
@@ -238,8 +176,11 @@ def main():
             epic_link = issue_data.get('epic_link') or issue_data.get('Epic Link')
             
             if epic_link:
-                normalized_link = normalize_epic_title(epic_link)
-                if normalized_link in epic_lookup:
+                epic_info, score = resolver.resolve(epic_link)
+                if epic_info:
+                    normalized_link = normalize_epic_title(epic_info['title'])
+                    if score < 1.0:
+                        print(f"≈ Fuzzy Epic match for {child_title}: '{epic_link}' → {epic_info['title']} (score: {score})")
                     if normalized_link not in epic_to_children:
                         epic_to_children[normalized_link] = []
                     epic_to_children[normalized_link].append({
@@ -257,6 +198,11 @@ def main():
     
     total_added = 0
     
+    # Read the bodies of every Epic with sub-issues up front, packed into as few requests as fit
+    epic_numbers = [info['issue_number'] for title, info in epic_lookup.items() if title in epic_to_children]
+    epic_body_responses = dict(zip(epic_numbers, run_graphql_many(
+        [epic_body_query(owner, repo, number) for number in epic_numbers])))
+    
     for epic_title, epic_info in epic_lookup.items():
         if epic_title not in epic_to_children:
             continue
@@ -274,24 +220,10 @@ def main():
         existing_issue_ids = {item.get('content', {}).get('id') for item in existing_items if item.get('content', {}).get('id')}
         
         # First, get the Epic issue body to update it with task list
-        query = f'''{{
-          repository(owner: "{owner}", name: "{repo}") {{
-            issue(number: {epic_issue_number}) {{
-              id
-              body
-            }}
-          }}
-        }}'''
-        
-        result = subprocess.run(
-            ['gh', 'api', 'graphql', '-f', f'query={query}'],
-            capture_output=True,
-            text=True
-        )
+        data = epic_body_responses[epic_issue_number]
         
         epic_body = ""
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
+        if not data.get('errors'):
             epic_body = data.get('data', {}).get('repository', {}).get('issue', {}).get('body', '') or ''
         
         # Build task list for sub-issues
@@ -309,7 +241,6 @@ def main():
                 if child_project_item_id:
                     print(f"    ✓ Added to project #18")
                     total_added += 1
-                    time.sleep(0.3)
                 else:
                     print(f"    ✗ Failed to add to project #18")
                     continue
@@ -351,5 +282,5 @@ def main():
     print("All child issues are now in project #18 and can be linked to their parent Epics.")
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
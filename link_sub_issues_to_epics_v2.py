@@ -4,91 +4,32 @@ Link child issues from project #17 as sub-issues to their parent Epics in projec
 Updates Epic issue descriptions with task lists to create the parent-child relationship.
 """
 
-import json
 import sys
 import subprocess
-import time
-import re
 
-def get_project_id(owner, project_number):
-    """Get project ID."""
-    query = f'''{{
-      user(login: "{owner}") {{
-        projectV2(number: {project_number}) {{
-          id
-          title
-        }}
-      }}
-    }}'''
-    
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={query}'],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode != 0:
-        return None, None
-    
-    data = json.loads(result.stdout)
-    project = data.get('data', {}).get('user', {}).get('projectV2', {})
-    return project.get('id'), project.get('title')
+from epic_resolver import EpicResolver, normalize_epic_title
+from github_api import get_project_ids, invalidate_reads, run_graphql
+from http_cache import get_cache
+from issue_import import read_issues
+from item_paginator import fetch_project_items, require_complete
+from profiling import run_main
+from request_scheduler import read_all, write_lane
 
-def get_project_items(project_id):
-    """Get all items from a project."""
-    all_items = []
-    cursor = None
-    has_next_page = True
-    
-    while has_next_page:
-        after_clause = f', after: "{cursor}"' if cursor else ''
-        query = f'''{{
-          node(id: "{project_id}") {{
-            ... on ProjectV2 {{
-              items(first: 100{after_clause}) {{
-                nodes {{
+ITEM_FIELDS = '''
                   id
-                  content {{
-                    ... on Issue {{
+                  content {
+                    ... on Issue {
                       id
                       number
                       title
-                    }}
-                  }}
-                }}
-                pageInfo {{
-                  hasNextPage
-                  endCursor
-                }}
-              }}
-            }}
-          }}
-        }}'''
-        
-        result = subprocess.run(
-            ['gh', 'api', 'graphql', '-f', f'query={query}'],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            break
-        
-        data = json.loads(result.stdout)
-        node = data.get('data', {}).get('node', {})
-        items_data = node.get('items', {})
-        items = items_data.get('nodes', [])
-        all_items.extend(items)
-        
-        page_info = items_data.get('pageInfo', {})
-        has_next_page = page_info.get('hasNextPage', False)
-        cursor = page_info.get('endCursor')
-    
-    return all_items
+                    }
+                  }'''
 
-def normalize_epic_title(title):
-    """Normalize epic title for matching."""
-    return re.sub(r'^EPIC:\s*', '', title, flags=re.IGNORECASE).strip()
+def get_project_items(project_id):
+    """Get all items from a project."""
+    items = fetch_project_items(project_id, ITEM_FIELDS)
+    require_complete(items)
+    return items
 
 def add_item_to_project(project_id, issue_node_id):
     """Add an issue to a project."""
@@ -103,63 +44,58 @@ def add_item_to_project(project_id, issue_node_id):
       }}
     }}'''
     
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={mutation}'],
-        capture_output=True,
-        text=True
-    )
+    data = run_graphql(mutation)
     
-    if result.returncode == 0:
-        data = json.loads(result.stdout)
+    if not data.get('errors'):
         return data.get('data', {}).get('addProjectV2ItemById', {}).get('item', {}).get('id')
     return None
 
 def get_issue_body(owner, repo, issue_number):
-    """Get issue body."""
-    query = f'''{{
-      repository(owner: "{owner}", name: "{repo}") {{
-        issue(number: {issue_number}) {{
-          id
-          body
-        }}
-      }}
-    }}'''
-    
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={query}'],
-        capture_output=True,
-        text=True
-    )
+    """Get issue body.
+
+    Read over REST through the HTTP cache, so an unchanged Epic costs a
+    conditional request answered with 304.
+    """
+    response = get_cache().get(f'repos/{owner}/{repo}/issues/{issue_number}')
     
-    if result.returncode == 0:
-        data = json.loads(result.stdout)
-        issue = data.get('data', {}).get('repository', {}).get('issue', {})
-        return issue.get('body', '') or ''
+    if response.status_code == 200:
+        return (response.json() or {}).get('body', '') or ''
     return None
 
 def update_issue_body(owner, repo, issue_number, new_body):
     """Update issue body."""
     # Use REST API to update issue
-    result = subprocess.run(
-        ['gh', 'api', f'repos/{owner}/{repo}/issues/{issue_number}', '-X', 'PATCH', '-f', f'body={new_body}'],
-        capture_output=True,
-        text=True
-    )
+    def send():
+        result = subprocess.run(
+            ['gh', 'api', f'repos/{owner}/{repo}/issues/{issue_number}', '-X', 'PATCH', '-f', f'body={new_body}'],
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            return {'errors': [{'message': result.stderr.strip() or result.stdout.strip()}]}
+        return {}
+
+    # Paced with the GraphQL mutations on the write lane
+    data = write_lane.run(send)
+    # The body changed outside run_graphql, so earlier reads of it are stale
+    invalidate_reads()
     
-    return result.returncode == 0
+    return not data.get('errors')
 
-def main():
-    owner = sys.argv[1] if len(sys.argv) > 1 else 'bromso'
-    repo = sys.argv[2] if len(sys.argv) > 2 else 'uxcel-product-roadmap'
-    epics_project_num = sys.argv[3] if len(sys.argv) > 3 else '18'
-    issues_project_num = sys.argv[4] if len(sys.argv) > 4 else '17'
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    owner = argv[0] if len(argv) > 0 else 'bromso'
+    repo = argv[1] if len(argv) > 1 else 'uxcel-product-roadmap'
+    epics_project_num = argv[2] if len(argv) > 2 else '18'
+    issues_project_num = argv[3] if len(argv) > 3 else '17'
+    issues_file = argv[4] if len(argv) > 4 else 'issues.jsonl'
     
     print(f"Linking sub-issues from project #{issues_project_num} to Epics in project #{epics_project_num}...")
     print()
     
     # Get project IDs
-    epics_project_id, epics_project_title = get_project_id(owner, epics_project_num)
-    issues_project_id, issues_project_title = get_project_id(owner, issues_project_num)
+    (epics_project_id, epics_project_title), (issues_project_id, issues_project_title) = get_project_ids(
+        owner, [epics_project_num, issues_project_num])
     
     if not epics_project_id or not issues_project_id:
         print("Failed to get project IDs")
@@ -170,18 +106,13 @@ def main():
     print()
     
     # Load issues data
-    issues_file = 'issues.jsonl'
     issues_data = {}
     
-    with open(issues_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                issue = json.loads(line)
-                title = issue.get('title', '')
-                # Only process non-Epic issues
-                if 'EPIC:' not in title.upper():
-                    issues_data[title] = issue
+    for issue in read_issues(issues_file):
+        title = issue.get('title', '')
+        # Only process non-Epic issues
+        if 'EPIC:' not in title.upper():
+            issues_data[title] = issue
     
     print(f"Loaded {len(issues_data)} child issues from {issues_file}")
     print()
@@ -236,6 +167,7 @@ def main():
     
     # Build mapping: Epic -> list of child issues
     epic_to_children = {}
+    resolver = EpicResolver(epic_lookup.values())
     
     for child_title, child_info in child_issues.items():
         if child_title in issues_data:
@@ -243,8 +175,11 @@ def main():
             epic_link = issue_data.get('epic_link') or issue_data.get('Epic Link')
             
             if epic_link:
-                normalized_link = normalize_epic_title(epic_link)
-                if normalized_link in epic_lookup:
+                epic_info, score = resolver.resolve(epic_link)
+                if epic_info:
+                    normalized_link = normalize_epic_title(epic_info['title'])
+                    if score < 1.0:
+                        print(f"≈ Fuzzy Epic match for {child_title}: '{epic_link}' → {epic_info['title']} (score: {score})")
                     if normalized_link not in epic_to_children:
                         epic_to_children[normalized_link] = []
                     epic_to_children[normalized_link].append({
@@ -267,6 +202,10 @@ def main():
     total_added = 0
     total_updated = 0
     
+    # Read every Epic body up front, in parallel; only the writes below are sequential
+    epic_numbers = [info['issue_number'] for title, info in epic_lookup.items() if title in epic_to_children]
+    epic_bodies = dict(zip(epic_numbers, read_all(lambda number: get_issue_body(owner, repo, number), epic_numbers)))
+    
     for epic_title, epic_info in epic_lookup.items():
         if epic_title not in epic_to_children:
             continue
@@ -289,7 +228,6 @@ def main():
                 if child_project_item_id:
                     print(f"  ✓ Added issue #{child_issue_number} to project #18")
                     total_added += 1
-                    time.sleep(0.3)
                     # Update existing_issue_ids for next iteration
                     existing_issue_ids.add(child_issue_id)
             
@@ -297,7 +235,7 @@ def main():
             task_list_items.append(f"- [ ] #{child_issue_number}")
         
         # Get current Epic body
-        epic_body = get_issue_body(owner, repo, epic_issue_number)
+        epic_body = epic_bodies[epic_issue_number]
         if epic_body is None:
             print(f"  ⚠ Could not get Epic body, skipping update")
             continue
@@ -320,7 +258,6 @@ def main():
             print(f"  ✗ Failed to update Epic description")
         
         print()
-        time.sleep(0.3)
     
     print(f"Done!")
     print(f"Added {total_added} child issues to project #18")
@@ -329,5 +266,5 @@ def main():
     print("Sub-issues are now linked via task lists in Epic descriptions!")
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
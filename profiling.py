@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Profiling hooks for the roadmap scripts.
+Every script accepts --profile (or --profile=DIR): the run is executed under
+cProfile and tracemalloc, and the pstats dump, a text report and a JSON
+summary are written to DIR (default: profiles/), one set of files per run, so
+runs can be compared over time. The summary includes timing spans around
+the fetch, index, diff and mutate phases, which are recorded with span(),
+with the traced memory peak of each span. When a span ends with a peak
+more than SNAPSHOT_MARGIN above the last sampled one, the allocations live
+at that point are sampled, so the report shows what was held near the
+run's peak rather than what survives to exit.
+"""
+
+import os
+import sys
+import threading
+import time
+
+DEFAULT_PROFILE_DIR = 'profiles'
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 15
+SNAPSHOT_MARGIN = 0.15  # Sample allocations again only when a span peaks 15% higher
+
+_spans = {}
+_spans_lock = threading.Lock()
+_recording = False
+_active = set()
+_run_peak = [0]
+_peak_sample = [0, 0, None, None]  # span peak, traced bytes, span name, allocation statistics
+
+# Allocations made by the import system are not interesting in reports
+IGNORED_FRAMES = ['<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>']
+
+def _fold_peak(tracemalloc):
+    """Credit the peak since the last reset to the run and every open span.
+
+    Call with _spans_lock held. Returns the peak.
+    """
+    peak = tracemalloc.get_traced_memory()[1]
+    for active in _active:
+        active.peak = max(active.peak, peak)
+    _run_peak[0] = max(_run_peak[0], peak)
+    return peak
+
+def _sample_allocations(tracemalloc):
+    """The largest allocations live now, ignoring the import system."""
+    snapshot = tracemalloc.take_snapshot()
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, frame) for frame in IGNORED_FRAMES])
+    return snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+
+class span:
+    """Time a phase of the run: `with span('fetch'): ...`.
+
+    Costs a flag check unless a profiled run is recording. Spans are summed
+    per name across threads. Entering a span resets tracemalloc's peak, after
+    crediting it to the spans already open, so each span records its own
+    peak even when spans nest or overlap across threads.
+    """
+
+    __slots__ = ('name', 'started', 'peak')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if _recording:
+            import tracemalloc
+            with _spans_lock:
+                _fold_peak(tracemalloc)
+                tracemalloc.reset_peak()
+                self.peak = 0
+                _active.add(self)
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if _recording and self in _active:
+            import tracemalloc
+            elapsed = time.perf_counter() - self.started
+            with _spans_lock:
+                _fold_peak(tracemalloc)
+                _active.discard(self)
+                total = _spans.setdefault(self.name, [0, 0.0, 0])
+                total[0] += 1
+                total[1] += elapsed
+                total[2] = max(total[2], self.peak)
+                # Sampling is slow, so only when the peak has grown noticeably
+                if self.peak > _peak_sample[0] * (1 + SNAPSHOT_MARGIN):
+                    current = tracemalloc.get_traced_memory()[0]
+                    _peak_sample[:] = [self.peak, current, self.name, _sample_allocations(tracemalloc)]
+        return False
+
+def split_profile_args(argv):
+    """Remove --profile[=DIR] from argv. Returns (argv, profile dir or None)."""
+    profile_dir = None
+    remaining = []
+    for arg in argv:
+        if arg == '--profile':
+            profile_dir = DEFAULT_PROFILE_DIR
+        elif arg.startswith('--profile='):
+            profile_dir = arg.split('=', 1)[1] or DEFAULT_PROFILE_DIR
+        else:
+            remaining.append(arg)
+    return remaining, profile_dir
+
+def run_profiled(func, argv, name, profile_dir):
+    """Run func(argv) under cProfile and tracemalloc and write the results."""
+    global _recording
+    import cProfile
+    import json
+    import pstats
+    import tracemalloc
+
+    os.makedirs(profile_dir, exist_ok=True)
+    base = os.path.join(profile_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+
+    with _spans_lock:
+        _spans.clear()
+        _active.clear()
+        _run_peak[0] = 0
+        _peak_sample[:] = [0, 0, None, None]
+    started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+    _recording = True
+    tracemalloc.start()
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    exit_code = 0
+    try:
+        profiler.runcall(func, argv)
+    except SystemExit as e:
+        exit_code = e.code
+    finally:
+        elapsed = time.perf_counter() - started
+        profiler.disable()
+        _recording = False
+        with _spans_lock:
+            _fold_peak(tracemalloc)
+            peak = _run_peak[0]
+            _active.clear()
+        if _peak_sample[3] is None:
+            # No span sampled anything: fall back to what is live at exit
+            _peak_sample[:] = [peak, tracemalloc.get_traced_memory()[0], 'exit', _sample_allocations(tracemalloc)]
+        _, sampled, sampled_at, allocations = _peak_sample
+        tracemalloc.stop()
+
+        profiler.dump_stats(f'{base}.pstats')
+        with open(f'{base}.txt', 'w') as f:
+            f.write(f"{name} {' '.join(argv)}\n")
+            f.write(f"Wall time: {elapsed:.2f}s (under cProfile and tracemalloc)\n")
+            f.write(f"Peak traced memory: {peak / 1e6:.1f} MB\n\n")
+            f.write("Spans:\n")
+            for span_name, (count, seconds, span_peak) in sorted(_spans.items(), key=lambda entry: -entry[1][1]):
+                f.write(f"  {span_name:<12} {seconds:8.2f}s  ({count} calls, peak {span_peak / 1e6:.1f} MB)\n")
+            where = 'at exit' if sampled_at == 'exit' else f"at the end of the highest-peaking '{sampled_at}' span"
+            f.write(f"\nLargest allocations {where} ({sampled / 1e6:.1f} MB live):\n")
+            for stat in allocations:
+                f.write(f"  {stat}\n")
+            f.write("\n")
+            pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        with open(f'{base}.json', 'w') as f:
+            json.dump({
+                'command': name,
+                'argv': argv,
+                'started_at': started_at,
+                'seconds': round(elapsed, 3),
+                'peak_memory_bytes': peak,
+                'spans': {span_name: {'calls': count, 'seconds': round(seconds, 3), 'peak_memory_bytes': span_peak}
+                          for span_name, (count, seconds, span_peak) in _spans.items()}
+            }, f, indent=2)
+        print(f"Profile written to {base}.txt (.pstats, .json)", file=sys.stderr)
+
+    if exit_code:
+        sys.exit(exit_code)
+
+def run_main(main, name=None, argv=None):
+    """Entry point wrapper: run main(argv), profiled if --profile was given."""
+    argv, profile_dir = split_profile_args(sys.argv[1:] if argv is None else argv)
+    if profile_dir is None:
+        return main(argv)
+    name = name or os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    return run_profiled(main, argv, name, profile_dir)
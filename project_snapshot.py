@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Fetch a local snapshot of a GitHub project: every item with its content and
+field values, plus the project's field schema.
+Usage: python3 project_snapshot.py [owner] [project_number] [output_file]
+"""
+
+import json
+import os
+import sys
+
+from github_api import get_project_id, run_graphql
+from item_paginator import fetch_project_items, require_complete
+from profiling import run_main
+
+SNAPSHOT_FILE = 'project_{project_number}_snapshot.json'
+
+ITEM_NODE_FIELDS = '''
+                  id
+                  updatedAt
+                  content {
+                    ... on Issue {
+                      id
+                      number
+                      title
+                      state
+                      updatedAt
+                    }
+                    ... on DraftIssue {
+                      id
+                      title
+                      updatedAt
+                    }
+                  }
+                  fieldValues(first: 100) {
+                    nodes {
+                      ... on ProjectV2ItemFieldTextValue {
+                        field { ... on ProjectV2FieldCommon { id name } }
+                        text
+                      }
+                      ... on ProjectV2ItemFieldSingleSelectValue {
+                        field { ... on ProjectV2FieldCommon { id name } }
+                        name
+                        optionId
+                      }
+                      ... on ProjectV2ItemFieldNumberValue {
+                        field { ... on ProjectV2FieldCommon { id name } }
+                        number
+                      }
+                      ... on ProjectV2ItemFieldDateValue {
+                        field { ... on ProjectV2FieldCommon { id name } }
+                        date
+                      }
+                      ... on ProjectV2ItemFieldIterationValue {
+                        field { ... on ProjectV2FieldCommon { id name } }
+                        title
+                        iterationId
+                        startDate
+                      }
+                    }
+                  }'''
+
+def get_snapshot_items(project_id):
+    """Get all items from a project with content and all field values."""
+    items = fetch_project_items(project_id, ITEM_NODE_FIELDS)
+    require_complete(items)
+    return items
+
+def get_project_fields(project_id):
+    """Get the field schema: name -> id, dataType, options and iterations."""
+    query = f'''{{
+      node(id: "{project_id}") {{
+        ... on ProjectV2 {{
+          fields(first: 100) {{
+            nodes {{
+              ... on ProjectV2Field {{
+                id
+                name
+                dataType
+              }}
+              ... on ProjectV2SingleSelectField {{
+                id
+                name
+                dataType
+                options {{
+                  id
+                  name
+                }}
+              }}
+              ... on ProjectV2IterationField {{
+                id
+                name
+                dataType
+                configuration {{
+                  duration
+                  startDay
+                  iterations {{
+                    id
+                    title
+                    startDate
+                    duration
+                  }}
+                }}
+              }}
+            }}
+          }}
+        }}
+      }}
+    }}'''
+
+    data = run_graphql(query)
+    if data.get('errors'):
+        return {}
+
+    fields = {}
+    for field in (data.get('data') or {}).get('node', {}).get('fields', {}).get('nodes', []):
+        if not field.get('name'):
+            continue
+        fields[field['name']] = {
+            'id': field.get('id'),
+            'dataType': field.get('dataType'),
+            'options': {opt['name']: opt['id'] for opt in field.get('options') or []},
+            'iterations': (field.get('configuration') or {}).get('iterations', [])
+        }
+    return fields
+
+def item_field_values(item):
+    """Get an item's field values as {field name: value}."""
+    values = {}
+    for fv in item.get('fieldValues', {}).get('nodes', []):
+        name = (fv.get('field') or {}).get('name')
+        if not name:
+            continue
+        for key in ('text', 'name', 'number', 'date', 'title'):
+            if key in fv:
+                values[name] = fv[key]
+                break
+    return values
+
+def item_is_open(item):
+    """An item is open unless its issue is closed or its Status is Done."""
+    content = item.get('content') or {}
+    if content.get('state') == 'CLOSED':
+        return False
+    return item_field_values(item).get('Status') != 'Done'
+
+def is_epic_item(item):
+    """Epics have Work Item Type "Epic" or an "EPIC:" title prefix."""
+    title = (item.get('content') or {}).get('title', '')
+    return 'EPIC:' in title.upper() or item_field_values(item).get('Work Item Type') == 'Epic'
+
+def save_snapshot(snapshot, path):
+    """Write a snapshot ({'project_id', 'fields', 'items'}) to a JSON file."""
+    with open(path, 'w') as f:
+        json.dump(snapshot, f)
+
+def load_snapshot(path):
+    """Read a snapshot written by save_snapshot."""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def fetch_snapshot(project_id):
+    """Fetch the field schema and all items of a project."""
+    return {
+        'project_id': project_id,
+        'fields': get_project_fields(project_id),
+        'items': get_snapshot_items(project_id)
+    }
+
+def saved_snapshot_file(project_number):
+    """The snapshot main() saves for a project by default, if it exists, else None."""
+    path = SNAPSHOT_FILE.format(project_number=project_number)
+    return path if os.path.exists(path) else None
+
+def load_or_fetch_snapshot(owner, project_number, snapshot_file=None):
+    """Load a saved snapshot, or fetch one from the project. None on failure."""
+    if snapshot_file:
+        print(f"Loaded snapshot from {snapshot_file}")
+        return load_snapshot(snapshot_file)
+
+    project_id, project_title = get_project_id(owner, project_number)
+    if not project_id:
+        print("Failed to get project ID")
+        return None
+    print(f"Project: {project_title} (ID: {project_id})")
+    return fetch_snapshot(project_id)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    owner = argv[0] if len(argv) > 0 else 'bromso'
+    project_number = argv[1] if len(argv) > 1 else '17'
+    output_file = argv[2] if len(argv) > 2 else SNAPSHOT_FILE.format(project_number=project_number)
+
+    project_id, project_title = get_project_id(owner, project_number)
+    if not project_id:
+        print("Failed to get project ID")
+        sys.exit(1)
+
+    print(f"Project: {project_title} (ID: {project_id})")
+    snapshot = fetch_snapshot(project_id)
+    save_snapshot(snapshot, output_file)
+    print(f"Saved {len(snapshot['items'])} items and {len(snapshot['fields'])} fields to {output_file}")
+
+if __name__ == '__main__':
+    run_main(main)
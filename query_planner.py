@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Packing of small independent GraphQL reads into shared documents.
+Each query's top-level fields are renamed with a per-query alias prefix
+(q0_, q1_, ...) and the queries are merged into as few documents as fit
+under a node budget, estimated the way GitHub does: every connection
+counts its first/last argument times the size of the connections it is
+nested in. Responses are split back by prefix, so each caller gets the
+same dict a single request would have returned, errors included.
+
+A document that fails as a whole (an error without a path, such as a node
+limit or a parse error) is split in half and retried, down to single
+queries, so one bad query cannot fail its neighbours.
+"""
+
+import re
+
+MAX_DOCUMENT_NODES = 50000     # Well under GitHub's 500,000-node limit
+MAX_QUERIES_PER_DOCUMENT = 50
+
+_TOKEN = re.compile(r'''
+    (?P<skip>[\s,]+|\#[^\n]*)
+  | (?P<string>"""(?:[^"\\]|\\.|"(?!""))*"""|"(?:[^"\\]|\\.)*")
+  | (?P<name>[_A-Za-z][_0-9A-Za-z]*)
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<punct>\.\.\.|[!$():=@\[\]{|}])
+''', re.VERBOSE)
+
+_ALIAS = re.compile(r'q(\d+)_(.*)', re.DOTALL)
+
+class Unpackable(ValueError):
+    """A query that cannot share a document (mutation, variables, fragments)."""
+
+def tokenize(text):
+    """(kind, value, start, end) for every significant token."""
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            raise Unpackable(f'Unexpected character {text[pos]!r}')
+        if match.lastgroup != 'skip':
+            tokens.append((match.lastgroup, match.group(), match.start(), match.end()))
+        pos = match.end()
+    return tokens
+
+def _skip_balanced(tokens, i, open_char, close_char):
+    """Index just past the bracket that closes tokens[i]."""
+    depth = 0
+    while i < len(tokens):
+        value = tokens[i][1]
+        if value == open_char:
+            depth += 1
+        elif value == close_char:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise Unpackable(f'Unbalanced {open_char}')
+
+def top_level_fields(query):
+    """Split a query into its top-level fields.
+
+    Returns [(response key, text from the field name to its end)]. Raises
+    Unpackable for anything but a plain query without variables.
+    """
+    tokens = tokenize(query)
+    i = 0
+    if tokens and tokens[0][1] == 'query':
+        i = 1
+        if i < len(tokens) and tokens[i][0] == 'name':
+            i += 1
+    if i >= len(tokens) or tokens[i][1] != '{':
+        raise Unpackable('Not a plain query (mutation, variables or directives)')
+    end = _skip_balanced(tokens, i, '{', '}')
+    if end != len(tokens):
+        raise Unpackable('Document has more than one definition')
+
+    fields = []
+    i += 1
+    while tokens[i][1] != '}':
+        if tokens[i][0] != 'name':
+            raise Unpackable(f'Unsupported top-level selection {tokens[i][1]!r}')
+        key = tokens[i][1]
+        if tokens[i + 1][1] == ':':
+            i += 2  # Drop the caller's alias; it becomes part of the prefixed one
+        start = tokens[i][2]
+        i += 1
+        while True:
+            value = tokens[i][1]
+            if value == '(':
+                i = _skip_balanced(tokens, i, '(', ')')
+            elif value == '@':
+                i += 2
+            elif value == '{':
+                i = _skip_balanced(tokens, i, '{', '}')
+                break
+            else:
+                break
+        fields.append((key, query[start:tokens[i - 1][3]]))
+    return fields
+
+def estimate_nodes(query):
+    """Estimated node count of a query, from its first/last arguments."""
+    tokens = tokenize(query)
+    total = 0
+    scale = [1]
+    pending = None
+    for index, (_, value, _, _) in enumerate(tokens):
+        if value in ('first', 'last') and index + 2 < len(tokens) and tokens[index + 1][1] == ':':
+            if tokens[index + 2][0] == 'number':
+                pending = int(float(tokens[index + 2][1]))
+        elif value == '{':
+            multiplier = pending or 1
+            if pending:
+                total += scale[-1] * pending
+            scale.append(scale[-1] * multiplier)
+            pending = None
+        elif value == '}':
+            scale.pop()
+    return max(total, 1)
+
+def plan(queries, max_nodes=MAX_DOCUMENT_NODES, max_queries=MAX_QUERIES_PER_DOCUMENT):
+    """Group packable queries into documents.
+
+    Returns (groups, singles): groups is a list of lists of query indexes to
+    pack together, singles the indexes that must be sent on their own.
+    """
+    groups = []
+    singles = []
+    current, current_nodes = [], 0
+    for index, query in enumerate(queries):
+        try:
+            top_level_fields(query)
+        except (Unpackable, IndexError):
+            singles.append(index)
+            continue
+        nodes = estimate_nodes(query)
+        if current and (current_nodes + nodes > max_nodes or len(current) >= max_queries):
+            groups.append(current)
+            current, current_nodes = [], 0
+        current.append(index)
+        current_nodes += nodes
+    if current:
+        groups.append(current)
+    return groups, singles
+
+def pack(queries):
+    """Merge queries into one aliased document."""
+    selections = []
+    for position, query in enumerate(queries):
+        for key, text in top_level_fields(query):
+            selections.append(f'  q{position}_{key}: {text}')
+    return '{\n' + '\n'.join(selections) + '\n}'
+
+def split(data, count):
+    """Split a packed response into one response dict per query.
+
+    Returns None if the document failed as a whole (an error without a
+    path, or a response that does not match the aliases), so the caller can
+    retry with smaller documents.
+    """
+    errors = data.get('errors') or []
+    if any(not error.get('path') for error in errors):
+        return None
+
+    responses = [{'data': {}} for _ in range(count)]
+    for key, value in (data.get('data') or {}).items():
+        match = _ALIAS.match(key)
+        if match is None or int(match.group(1)) >= count:
+            return None
+        responses[int(match.group(1))]['data'][match.group(2)] = value
+    for error in errors:
+        match = _ALIAS.match(str(error['path'][0]))
+        if match is None or int(match.group(1)) >= count:
+            return None
+        error = dict(error, path=[match.group(2)] + list(error['path'][1:]))
+        responses[int(match.group(1))].setdefault('errors', []).append(error)
+    return responses
+
+def run_packed(queries, send):
+    """Run queries with as few requests as fit, via send(document) -> response.
+
+    Returns one response per query, in order, shaped as if each had been
+    sent alone.
+    """
+    results = [None] * len(queries)
+    groups, singles = plan(queries)
+    for index in singles:
+        results[index] = send(queries[index])
+
+    pending = list(groups)
+    while pending:
+        group = pending.pop()
+        if len(group) == 1:
+            results[group[0]] = send(queries[group[0]])
+            continue
+        responses = split(send(pack([queries[index] for index in group])), len(group))
+        if responses is None:
+            middle = len(group) // 2
+            pending += [group[:middle], group[middle:]]
+            continue
+        for index, response in zip(group, responses):
+            results[index] = response
+    return results
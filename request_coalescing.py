@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Coalescing of repeated reads within one run.
+A read is keyed by its normalized query and variables. The first caller
+runs it; identical reads made while it is in flight wait for the same
+result instead of sending their own request, and later ones are answered
+from a per-run memo. Any write clears the memo, so a read after a mutation
+always sees the new state.
+"""
+
+import json
+import re
+import threading
+from concurrent.futures import Future
+
+_STRING = re.compile(r'("(?:[^"\\]|\\.)*")')
+_WHITESPACE = re.compile(r'[\s,]+')
+_PUNCTUATION_SPACE = re.compile(r' ?([{}()\[\]:!=@$]) ?')
+
+def normalize_query(query):
+    """Drop insignificant whitespace and commas so formatting differences share a key.
+
+    String literals are kept as they are.
+    """
+    parts = _STRING.split(query)
+    for i in range(0, len(parts), 2):
+        parts[i] = _PUNCTUATION_SPACE.sub(r'\1', _WHITESPACE.sub(' ', parts[i]))
+    return ''.join(parts).strip()
+
+def request_key(query, variables=None):
+    """Memo key of a read: the normalized query and its sorted variables."""
+    return normalize_query(query), json.dumps(variables or {}, sort_keys=True)
+
+class Coalescer:
+    """Share in-flight reads and memoize their results for the run.
+
+    `get(key, fetch, keep)` returns the result of `fetch()` for `key`,
+    calling it at most once among concurrent callers. Results for which
+    `keep(result)` is false (errors, partial scans) are handed to the
+    callers that were waiting but not memoized.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.memo = {}
+        self.in_flight = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, fetch, keep=None):
+        with self.lock:
+            if key in self.memo:
+                self.hits += 1
+                return self.memo[key]
+            future = self.in_flight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = self.in_flight[key] = Future()
+                generation = self.generation
+            else:
+                self.hits += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            with self.lock:
+                self.in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+            # A write that landed while this read was running may have made it stale
+            if generation == self.generation and (keep is None or keep(result)):
+                self.memo[key] = result
+        future.set_result(result)
+        return result
+
+    def lookup(self, key):
+        """(True, result) if `key` is memoized, else (False, None)."""
+        with self.lock:
+            if key in self.memo:
+                self.hits += 1
+                return True, self.memo[key]
+            return False, None
+
+    def put(self, key, result):
+        """Memoize a result fetched outside get() (e.g. as part of a packed read)."""
+        with self.lock:
+            self.memo[key] = result
+
+    def invalidate(self):
+        """Forget every memoized read (after a write)."""
+        with self.lock:
+            self.memo.clear()
+            self.in_flight.clear()
+            self.generation += 1
+
+reads = Coalescer()
+
+def invalidate_reads():
+    """Forget memoized reads; call after changing data outside run_graphql."""
+    reads.invalidate()
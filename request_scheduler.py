@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Read and write lanes for API requests.
+GitHub's secondary rate limits punish concurrent writes, not concurrent
+reads. Reads (pagination, lookups) therefore run on a thread pool, while
+every mutation goes through a single write lane that sends them one at a
+time, in the order they were submitted, at least a second apart as GitHub
+asks for mutation requests. The gap only grows: it doubles when GitHub
+reports a secondary (abuse) rate limit, after which the write is retried.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+READ_CONCURRENCY = 8
+WRITE_INTERVAL = 1.0           # Gap between mutation requests, in seconds; never lowered
+MAX_WRITE_INTERVAL = 10.0
+SECONDARY_LIMIT_WAIT = 60      # GitHub asks for at least a minute without Retry-After
+MAX_WRITE_RETRIES = 3
+
+SECONDARY_LIMIT_MARKERS = ('secondary rate limit', 'abuse detection', 'abuse-rate-limits')
+
+def secondary_limit_wait(data):
+    """Seconds to wait if a response reports a secondary rate limit, else None."""
+    messages = ' '.join(str(error.get('message', '')) for error in data.get('errors') or []).lower()
+    if not any(marker in messages for marker in SECONDARY_LIMIT_MARKERS):
+        return None
+    return data.get('retry_after') or SECONDARY_LIMIT_WAIT
+
+class WriteLane:
+    """Runs writes one at a time, in submission order, spaced at least `interval` apart.
+
+    `submit(send)` queues a callable returning a GraphQL response dict and
+    returns a Future for that response.
+    """
+
+    def __init__(self, interval=WRITE_INTERVAL, max_interval=MAX_WRITE_INTERVAL, max_retries=MAX_WRITE_RETRIES):
+        self.interval = max(interval, WRITE_INTERVAL)
+        self.max_interval = max_interval
+        self.max_retries = max_retries
+        self.condition = threading.Condition()
+        self.pending = []
+        self.last_write = 0.0
+        self.slowdowns = 0
+        self.thread = None
+
+    def submit(self, send):
+        future = Future()
+        with self.condition:
+            self.pending.append((send, future))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        return future
+
+    def run(self, send):
+        """Queue a write and wait for its response."""
+        return self.submit(send).result()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                send, future = self.pending.pop(0)
+            try:
+                future.set_result(self._write(send))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _write(self, send):
+        for attempt in range(self.max_retries + 1):
+            wait = self.last_write + self.interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            data = send()
+            self.last_write = time.monotonic()
+
+            limit_wait = secondary_limit_wait(data)
+            if limit_wait is None:
+                return data
+
+            self.slowdowns += 1
+            self.interval = max(self.interval, min(self.max_interval, self.interval * 2))
+            if attempt == self.max_retries:
+                return data
+            print(f"  Secondary rate limit hit; pausing writes for {limit_wait}s "
+                  f"and spacing them {self.interval:.1f}s apart")
+            time.sleep(limit_wait)
+        return data
+
+class ReadLane:
+    """Runs independent reads concurrently on a thread pool."""
+
+    def __init__(self, workers=READ_CONCURRENCY):
+        self.workers = workers
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='read')
+        return self.executor.submit(fn, *args)
+
+    def map(self, fn, iterable):
+        """fn over every element concurrently. Returns results in order; re-raises errors."""
+        if threading.current_thread().name.startswith('read'):
+            # Already on a read worker: waiting on the pool from here could deadlock it
+            return [fn(element) for element in iterable]
+        futures = [self.submit(fn, element) for element in iterable]
+        return [future.result() for future in futures]
+
+read_lane = ReadLane()
+write_lane = WriteLane()
+
+def read_all(fn, iterable):
+    """Run independent reads concurrently on the read lane."""
+    return read_lane.map(fn, iterable)
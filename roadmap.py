@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the roadmap scripts.
+Each subcommand runs the main() of one script, and that script is imported
+only when its subcommand runs, so chaining commands in automation pays the
+import cost of the pieces it uses and nothing else.
+Usage: python3 roadmap.py <command> [args...]
+       python3 roadmap.py sync [owner] [repo] [issues_project] [epics_project] [issues_file] [--steps a,b]
+       python3 roadmap.py startup [--budget-ms N]   (measure cold start of every command)
+"""
+
+import sys
+
+from profiling import run_main
+
+# Subcommand -> (module, summary)
+COMMANDS = {
+    'configure': ('setup_project_fields', 'create project fields from project_config.json'),
+    'labels': ('add_labels', 'create or update repository labels'),
+    'milestones': ('add_milestones', 'create or update repository milestones'),
+    'validate': ('issue_validation', 'check issues.jsonl against the project schema'),
+    'update-fields': ('update_issue_fields', 'set project fields from issues.jsonl'),
+    'link-epics': ('link_epics_to_issues', 'link issues to Epics in the Epics project'),
+    'link-subissues': ('link_sub_issues_to_epics_v2', 'add issues as sub-issues of their Epics'),
+    'snapshot': ('project_snapshot', 'save a local snapshot of a project'),
+    'deps': ('dependency_graph', 'report dependency cycles and mark blocked items'),
+    'analytics': ('rollup_analytics', 'Story Points rollups, velocity and burndown'),
+    'epic-rollup': ('epic_rollup', 'roll child data up onto Epics'),
+    'plan-sprints': ('sprint_planner', 'assign backlog items to upcoming sprints'),
+    'archive': ('archive_items', 'archive stale items (or undo an archive run)'),
+    'dedup': ('dedup_items', 'find and merge duplicate items'),
+    'report': ('roadmap_report', 'regenerate epic_issue_mapping.md'),
+    'fanout': ('fanout_runner', 'run the pipeline for a manifest of teams'),
+    'app-token': ('github_app_auth', 'print a GitHub App installation token'),
+}
+SYNC_STEPS = ['validate', 'update-fields', 'link-epics', 'link-subissues']
+STARTUP_BUDGET_MS = 150
+
+def load_command(name):
+    """Import a subcommand's module and return its main()."""
+    import importlib
+    return importlib.import_module(COMMANDS[name][0]).main
+
+def print_usage():
+    print("Usage: roadmap.py <command> [args...]")
+    print()
+    print("Commands:")
+    for name, (_, summary) in COMMANDS.items():
+        print(f"  {name:<15} {summary}")
+    print(f"  {'sync':<15} run {', '.join(SYNC_STEPS)} for one project")
+    print(f"  {'startup':<15} measure cold start of every command")
+
+def sync(argv):
+    """Run pipeline steps for one project, stopping at the first failure."""
+    import argparse
+    from fanout_runner import STEPS
+
+    parser = argparse.ArgumentParser(prog='roadmap.py sync', description='Run pipeline steps for one project.')
+    parser.add_argument('owner', nargs='?', default='bromso')
+    parser.add_argument('repo', nargs='?', default='uxcel-product-roadmap')
+    parser.add_argument('issues_project', nargs='?', default='17')
+    parser.add_argument('epics_project', nargs='?', default='18')
+    parser.add_argument('issues_file', nargs='?', default='issues.jsonl')
+    parser.add_argument('--steps', default=','.join(SYNC_STEPS), help=f"comma-separated steps from: {', '.join(STEPS)}")
+    args = parser.parse_args(argv)
+
+    steps = args.steps.split(',')
+    unknown = [step for step in steps if step not in STEPS]
+    if unknown:
+        parser.error(f"unknown steps: {', '.join(unknown)}")
+
+    team = vars(args)
+    for step in steps:
+        _, build_args = STEPS[step]
+        print(f"=== {step} ===")
+        try:
+            load_command(step)(build_args(team))
+        except SystemExit as e:
+            if e.code:
+                print(f"✗ {step} failed (exit {e.code})")
+                sys.exit(e.code)
+        print()
+
+def measure_startup(argv):
+    """Import every command in a fresh interpreter and check it against a budget."""
+    import argparse
+    import os
+    import subprocess
+
+    parser = argparse.ArgumentParser(prog='roadmap.py startup', description='Measure cold start of every command.')
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS,
+                        help='maximum import time per command in milliseconds')
+    args = parser.parse_args(argv)
+
+    probe = ('import time; started = time.perf_counter(); import roadmap; roadmap.load_command({!r}); '
+             'print((time.perf_counter() - started) * 1000)')
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    over_budget = []
+    failed = []
+    for name in COMMANDS:
+        result = subprocess.run([sys.executable, '-c', probe.format(name)], cwd=here, capture_output=True, text=True)
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f'exit {result.returncode}'
+            print(f"✗ {name:<15} failed to import: {error}")
+            failed.append(name)
+            continue
+        elapsed = float(result.stdout.strip())
+        marker = '✓' if elapsed <= args.budget_ms else '✗'
+        print(f"{marker} {name:<15} {elapsed:6.1f} ms")
+        if elapsed > args.budget_ms:
+            over_budget.append(name)
+
+    print()
+    if failed:
+        print(f"{len(failed)} commands failed to import: {', '.join(failed)}")
+    if over_budget:
+        print(f"{len(over_budget)} commands over the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+    if failed or over_budget:
+        sys.exit(1)
+    print(f"All commands start within {args.budget_ms:.0f} ms.")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help', 'help'):
+        print_usage()
+        return
+
+    command, args = argv[0], argv[1:]
+    if command == 'sync':
+        sync(args)
+    elif command == 'startup':
+        measure_startup(args)
+    elif command in COMMANDS:
+        load_command(command)(args)
+    else:
+        print(f"Unknown command: {command}")
+        print()
+        print_usage()
+        sys.exit(2)
+
+if __name__ == '__main__':
+    command = next((arg for arg in sys.argv[1:] if not arg.startswith('--profile')), 'help')
+    run_main(main, name=f'roadmap-{command}')
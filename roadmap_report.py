@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Generate epic_issue_mapping.md from project snapshots.
+Renders the Epic → child issue mapping, with each Epic's progress (children
+done, Story Points done, latest Due Date), from the Epics and issues
+projects. Children whose Epic Link only matches fuzzily are marked. The projects are read from the snapshots project_snapshot.py saves
+(project_N_snapshot.json) when they exist; --live fetches them instead.
+A report is a list of sections; each section's text is cached under a
+version built from its items' IDs and update times, like epic_rollup.py's
+cache, so a run only re-renders the sections whose Epic or children changed,
+and the file is only rewritten when its content changed.
+Usage: python3 roadmap_report.py [owner] [epics_project_number] [issues_project_number]
+                                 [--output FILE] [--epics-snapshot FILE] [--issues-snapshot FILE] [--live]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+
+from epic_rollup import group_children, load_cache, save_cache
+from github_api import cache_path
+from profiling import run_main, span
+from project_snapshot import is_epic_item, item_field_values, load_or_fetch_snapshot, saved_snapshot_file
+
+CACHE_FILE = 'report_{name}.json'
+DEFAULT_OUTPUT = 'epic_issue_mapping.md'
+
+def items_version(items, extra=''):
+    """Cache key for the items a section shows: IDs and item and content update times."""
+    versions = [f"{item.get('id')}@{item.get('updatedAt')}@{(item.get('content') or {}).get('updatedAt')}"
+                for item in items]
+    return hashlib.sha1('\n'.join([extra] + versions).encode('utf-8')).hexdigest()
+
+def render_report(sections, cache):
+    """Join rendered sections, reusing cached text for unchanged ones.
+
+    `sections` is a list of (key, version, render) where render() returns
+    the section's Markdown; it is only called when the cached version
+    differs. The cache is replaced by the current sections.
+    Returns (text, number of sections rendered).
+    """
+    parts = []
+    rendered = 0
+    current = {}
+    for key, version, render in sections:
+        cached = cache.get(key)
+        if cached and cached.get('version') == version:
+            text = cached['text']
+        else:
+            text = render()
+            rendered += 1
+        current[key] = {'version': version, 'text': text}
+        parts.append(text)
+    cache.clear()
+    cache.update(current)
+    return '\n'.join(parts), rendered
+
+def child_data(item, score=None):
+    """What the report shows of a child item (score: its fuzzy Epic match, if any)."""
+    content = item.get('content') or {}
+    values = item_field_values(item)
+    return {
+        'number': content.get('number'),
+        'title': content.get('title', ''),
+        'closed': content.get('state') == 'CLOSED',
+        'status': values.get('Status'),
+        'points': values.get('Story Points'),
+        'due': values.get('Due Date'),
+        'fuzzy': score
+    }
+
+def epic_data(epic, children, fuzzy_scores):
+    content = epic.get('content') or {}
+    return {
+        'number': content.get('number'),
+        'title': content.get('title', ''),
+        'children': [child_data(child, fuzzy_scores.get(child['id'])) for child in children]
+    }
+
+def is_done(child):
+    return child['closed'] or child['status'] == 'Done'
+
+def render_header(data):
+    return f"""# Epic to Issue Mapping
+
+This document shows which child issues in Project #{data['issues_project']} should be linked to which Epic in Project #{data['epics_project']}.
+
+It is generated by `roadmap_report.py` from the project snapshots; edits will be overwritten.
+
+**Note:** The Parent issue field needs to be set manually in the GitHub UI because GitHub's API doesn't currently support setting PARENT_ISSUE field values programmatically.
+
+## How to Link Manually
+
+1. Go to: https://github.com/users/{data['owner']}/projects/{data['issues_project']}
+2. Open each child issue
+3. In the "Parent issue" field, select the matching Epic
+
+## Mappings
+"""
+
+def render_epic(data):
+    children = data['children']
+    lines = [f"### {data['title']}"]
+    if children:
+        done = sum(1 for child in children if is_done(child))
+        total_points = sum(child['points'] or 0 for child in children)
+        done_points = sum(child['points'] or 0 for child in children if is_done(child))
+        progress = f"{done}/{len(children)} done ({done * 100 // len(children)}%)"
+        if total_points:
+            progress += f", {done_points:g}/{total_points:g} points"
+        due_dates = [child['due'] for child in children if child['due']]
+        if due_dates:
+            progress += f", due {max(due_dates)}"
+        lines.append(f"Progress: {progress}")
+        lines.append('')
+    for child in children:
+        label = f"#{child['number']} " if child['number'] is not None else ''
+        status = f" ({child['status']})" if child['status'] else ''
+        check = '[x]' if is_done(child) else '[ ]'
+        fuzzy = f" ≈ fuzzy Epic Link match ({child['fuzzy']:.2f}), check it" if child.get('fuzzy') is not None else ''
+        lines.append(f"- {check} {label}{child['title']}{status}{fuzzy}")
+    if not children:
+        lines.append('- No child issues')
+    return '\n'.join(lines) + '\n'
+
+def render_unmatched(data):
+    lines = ['### Unmatched Epic Links', '']
+    for child in data['children']:
+        label = f"#{child['number']} " if child['number'] is not None else ''
+        lines.append(f"- {label}{child['title']} → \"{child['epic_link']}\"")
+    return '\n'.join(lines) + '\n'
+
+def render_footer(data):
+    return f"""---
+
+**Total:** {data['linked']} child issues need to be linked to their parent Epics across {data['epics']} Epics.
+"""
+
+def build_sections(args, epic_items, children, unmatched, fuzzy_scores):
+    header = {
+        'owner': args.owner,
+        'epics_project': args.epics_project_number,
+        'issues_project': args.issues_project_number
+    }
+    sections = [('header', f"{header['owner']}/{header['epics_project']}/{header['issues_project']}",
+                 lambda: render_header(header))]
+    for epic in epic_items:
+        epic_children = children.get(epic['id'], [])
+        scores = ' '.join(f"{child['id']}={fuzzy_scores[child['id']]}" for child in epic_children if child['id'] in fuzzy_scores)
+        sections.append((f"epic:{epic['id']}", items_version([epic] + epic_children, scores),
+                         lambda epic=epic, epic_children=epic_children: render_epic(epic_data(epic, epic_children, fuzzy_scores))))
+    if unmatched:
+        sections.append(('unmatched', items_version([item for item, _ in unmatched], '\n'.join(link for _, link in unmatched)),
+                         lambda: render_unmatched({
+                             'children': [dict(child_data(item), epic_link=epic_link) for item, epic_link in unmatched]
+                         })))
+    footer = {
+        'linked': sum(len(epic_children) for epic_children in children.values()),
+        'epics': len(epic_items)
+    }
+    sections.append(('footer', f"{footer['linked']}/{footer['epics']}", lambda: render_footer(footer)))
+    return sections
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate the Epic to issue mapping report.')
+    parser.add_argument('owner', nargs='?', default='bromso')
+    parser.add_argument('epics_project_number', nargs='?', default='18')
+    parser.add_argument('issues_project_number', nargs='?', default='17')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'report file (default: {DEFAULT_OUTPUT})')
+    parser.add_argument('--epics-snapshot', help='read Epics from a saved snapshot')
+    parser.add_argument('--issues-snapshot', help='read child issues from a saved snapshot')
+    parser.add_argument('--live', action='store_true',
+                        help='fetch both projects instead of reading their saved project_N_snapshot.json')
+    args = parser.parse_args(argv)
+
+    epics_file = args.epics_snapshot or (None if args.live else saved_snapshot_file(args.epics_project_number))
+    issues_file = args.issues_snapshot or (None if args.live else saved_snapshot_file(args.issues_project_number))
+    epics_snapshot = load_or_fetch_snapshot(args.owner, args.epics_project_number, epics_file)
+    issues_snapshot = load_or_fetch_snapshot(args.owner, args.issues_project_number, issues_file)
+    if epics_snapshot is None or issues_snapshot is None:
+        sys.exit(1)
+    print()
+
+    epic_items = [item for item in epics_snapshot['items'] if is_epic_item(item)]
+    child_items = [item for item in issues_snapshot['items'] if not is_epic_item(item)]
+    with span('index'):
+        # Fuzzy matches are shown, marked, so they can be checked when linking by hand
+        children, unmatched, fuzzy = group_children(epic_items, child_items, include_fuzzy=True)
+    fuzzy_scores = {item['id']: round(score, 2) for item, _, _, score in fuzzy}
+
+    name = hashlib.sha1(os.path.abspath(args.output).encode('utf-8')).hexdigest()[:12]
+    cache_file = cache_path(CACHE_FILE.format(name=name))
+    cache = load_cache(cache_file)
+    with span('diff'):
+        text, rendered = render_report(build_sections(args, epic_items, children, unmatched, fuzzy_scores), cache)
+    print(f"Rendered {rendered} of {len(cache)} sections ({len(cache) - rendered} unchanged)")
+
+    existing = None
+    if os.path.exists(args.output):
+        with open(args.output, 'r') as f:
+            existing = f.read()
+    if text == existing:
+        print(f"{args.output} is up to date")
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        print(f"Wrote {args.output} ({len(epic_items)} Epics, {len(unmatched)} unmatched Epic Links)")
+    save_cache(cache_file, cache)
+
+if __name__ == '__main__':
+    run_main(main)
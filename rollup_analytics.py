@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Story Points and Estimate rollups by Sprint, Status, Priority, Stage and Epic Link.
+Loads the project snapshot into columns (categorical codes for the grouping
+fields, float arrays for the measures) and computes group-by rollups,
+velocity and burndown series with vectorized operations.
+Usage: python3 rollup_analytics.py [owner] [project_number] [--by Sprint,Status]
+                                   [--snapshot FILE] [--json FILE]
+"""
+
+import argparse
+import json
+import math
+import sys
+
+from epic_resolver import normalize_epic_title
+from project_snapshot import load_or_fetch_snapshot
+from profiling import run_main, span
+
+_numpy = None
+
+GROUP_FIELDS = ['Sprint', 'Status', 'Priority', 'Stage', 'Epic Link']
+MEASURES = ['Story Points', 'Estimate']
+DONE_STATUS = 'Done'
+NONE_LABEL = '(none)'
+# Value keys of a field value node, in the order item_field_values reads them
+VALUE_KEYS = ('text', 'name', 'number', 'date', 'title')
+
+def get_numpy():
+    """The numpy module if available, otherwise None (use plain Python loops).
+
+    Checked on first use rather than at import time: importing NumPy alone
+    takes most of the command's startup budget.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+class Columns:
+    """Columnar view of snapshot items.
+
+    Each grouping field is stored as integer codes into a list of categories
+    (code 0 is "(none)"); each measure as floats with NaN for missing values.
+    """
+
+    def __init__(self, size, codes, categories, measures, sprint_starts):
+        self.size = size
+        self.codes = codes
+        self.categories = categories
+        self.measures = measures
+        self.sprint_starts = sprint_starts
+
+def _category_label(field, value):
+    """The category a raw field value is grouped under."""
+    if field == 'Epic Link' and value:
+        value = normalize_epic_title(value)
+    return value or NONE_LABEL
+
+def load_columns(items):
+    """Convert snapshot items into Columns.
+
+    Field value nodes are read directly (the same value item_field_values
+    would pick) and each distinct raw value is labelled once, so the
+    per-item work is a few dict lookups.
+    """
+    np = get_numpy()
+    labels = {field: {NONE_LABEL: 0} for field in GROUP_FIELDS}
+    raw_codes = {field: {} for field in GROUP_FIELDS}
+    codes = {field: [0] * len(items) for field in GROUP_FIELDS}
+    measures = {field: [math.nan] * len(items) for field in MEASURES}
+    sprint_starts = {}
+
+    for index, item in enumerate(items):
+        for fv in item.get('fieldValues', {}).get('nodes', []):
+            name = (fv.get('field') or {}).get('name')
+            if name not in raw_codes and name not in measures:
+                continue
+            for key in VALUE_KEYS:
+                if key in fv:
+                    value = fv[key]
+                    break
+            else:
+                continue
+            if name in measures:
+                measures[name][index] = float(value) if value is not None else math.nan
+                continue
+            code = raw_codes[name].get(value)
+            if code is None:
+                label = _category_label(name, value)
+                code = labels[name].setdefault(label, len(labels[name]))
+                raw_codes[name][value] = code
+            codes[name][index] = code
+            if name == 'Sprint' and fv.get('startDate'):
+                sprint_starts[value] = fv['startDate']
+
+    categories = {field: list(labels[field]) for field in GROUP_FIELDS}
+    if np is not None:
+        codes = {field: np.asarray(col, dtype=np.int32) for field, col in codes.items()}
+        measures = {field: np.asarray(col, dtype=np.float64) for field, col in measures.items()}
+    return Columns(len(items), codes, categories, measures, sprint_starts)
+
+def _group_codes(columns, by):
+    """Combine the codes of several grouping fields into one code per item."""
+    np = get_numpy()
+    sizes = [len(columns.categories[field]) for field in by]
+    if np is not None:
+        combined = np.zeros(columns.size, dtype=np.int64)
+        for field, size in zip(by, sizes):
+            combined = combined * size + columns.codes[field]
+    else:
+        combined = [0] * columns.size
+        for field, size in zip(by, sizes):
+            combined = [c * size + code for c, code in zip(combined, columns.codes[field])]
+    return combined, sizes
+
+def _bincount(codes, weights, length):
+    """Sum weights (skipping NaN) and count items per code."""
+    np = get_numpy()
+    if np is not None:
+        present = ~np.isnan(weights)
+        sums = np.bincount(codes[present], weights=weights[present], minlength=length)
+        counts = np.bincount(codes, minlength=length)
+        return sums.tolist(), counts.tolist()
+
+    sums, counts = [0.0] * length, [0] * length
+    for code, weight in zip(codes, weights):
+        counts[code] += 1
+        if not math.isnan(weight):
+            sums[code] += weight
+    return sums, counts
+
+def _occupied(combined):
+    """The distinct combined codes (sorted) and each item's index into them.
+
+    Only groups that have items are kept, so the work does not grow with the
+    product of the fields' category counts.
+    """
+    np = get_numpy()
+    if np is not None:
+        occupied, inverse = np.unique(combined, return_inverse=True)
+        return occupied.tolist(), inverse
+    occupied = sorted(set(combined))
+    positions = {code: position for position, code in enumerate(occupied)}
+    return occupied, [positions[code] for code in combined]
+
+def _unravel(code, sizes):
+    parts = []
+    for size in reversed(sizes):
+        code, part = divmod(code, size)
+        parts.append(part)
+    return reversed(parts)
+
+def rollup(columns, by):
+    """Totals of every measure grouped by one or more fields."""
+    combined, sizes = _group_codes(columns, by)
+    occupied, inverse = _occupied(combined)
+    totals = {field: _bincount(inverse, columns.measures[field], len(occupied)) for field in MEASURES}
+
+    rows = []
+    counts = totals[MEASURES[0]][1]
+    for position, code in enumerate(occupied):
+        row = {field: columns.categories[field][part] for field, part in zip(by, _unravel(code, sizes))}
+        row['Items'] = counts[position]
+        for field in MEASURES:
+            row[field] = totals[field][0][position]
+        rows.append(row)
+    return rows
+
+def _sprint_order(columns):
+    """Sprint codes sorted by iteration start date (sprints without one last)."""
+    sprints = columns.categories['Sprint']
+    return sorted(
+        range(1, len(sprints)),
+        key=lambda code: (columns.sprint_starts.get(sprints[code]) or '9999', sprints[code])
+    )
+
+def velocity(columns, measure='Story Points'):
+    """Completed points per sprint, in sprint order."""
+    np = get_numpy()
+    sprints = columns.categories['Sprint']
+    done = columns.categories['Status'].index(DONE_STATUS) if DONE_STATUS in columns.categories['Status'] else -1
+    if np is not None:
+        mask = columns.codes['Status'] == done
+        sprint_codes = columns.codes['Sprint'][mask]
+        points = columns.measures[measure][mask]
+    else:
+        mask = [code == done for code in columns.codes['Status']]
+        sprint_codes = [c for c, m in zip(columns.codes['Sprint'], mask) if m]
+        points = [p for p, m in zip(columns.measures[measure], mask) if m]
+    completed, _ = _bincount(sprint_codes, points, len(sprints))
+    return [{'Sprint': sprints[code], measure: completed[code]} for code in _sprint_order(columns)]
+
+def burndown(columns, measure='Story Points'):
+    """Remaining sprint-planned points after each sprint, in sprint order."""
+    sprints = columns.categories['Sprint']
+    scope, _ = _bincount(columns.codes['Sprint'], columns.measures[measure], len(sprints))
+    remaining = sum(scope[1:])
+    series = []
+    for row in velocity(columns, measure):
+        remaining -= row[measure]
+        series.append({'Sprint': row['Sprint'], 'Completed': row[measure], 'Remaining': remaining})
+    return series
+
+def format_table(rows):
+    """Render a list of row dicts as a plain-text table."""
+    if not rows:
+        return '(no items)'
+    headers = list(rows[0])
+    cells = [[f'{row[h]:g}' if isinstance(row[h], float) else str(row[h]) for h in headers] for row in rows]
+    widths = [max(len(h), *(len(r[i]) for r in cells)) for i, h in enumerate(headers)]
+    lines = ['  '.join(h.ljust(w) for h, w in zip(headers, widths))]
+    lines.append('  '.join('-' * w for w in widths))
+    lines.extend('  '.join(c.ljust(w) for c, w in zip(r, widths)) for r in cells)
+    return '\n'.join(line.rstrip() for line in lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Story Points and Estimate rollups for a project.')
+    parser.add_argument('owner', nargs='?', default='bromso')
+    parser.add_argument('project_number', nargs='?', default='17')
+    parser.add_argument('--by', default=None, help='comma-separated grouping fields (default: each field separately)')
+    parser.add_argument('--snapshot', help='read items from a saved snapshot instead of the API')
+    parser.add_argument('--json', dest='json_file', help='also write the report as JSON to this file')
+    args = parser.parse_args(argv)
+
+    groupings = [args.by.split(',')] if args.by else [[field] for field in GROUP_FIELDS]
+    for by in groupings:
+        unknown = [field for field in by if field not in GROUP_FIELDS]
+        if unknown:
+            parser.error(f"unknown grouping field(s): {', '.join(unknown)} (choose from {', '.join(GROUP_FIELDS)})")
+
+    snapshot = load_or_fetch_snapshot(args.owner, args.project_number, args.snapshot)
+    if snapshot is None:
+        sys.exit(1)
+
+    with span('index'):
+        columns = load_columns(snapshot['items'])
+    print(f"Loaded {columns.size} items{' (NumPy)' if get_numpy() else ''}")
+    print()
+
+    report = {'rollups': {}, 'velocity': velocity(columns), 'burndown': burndown(columns)}
+    for by in groupings:
+        key = ' × '.join(by)
+        report['rollups'][key] = rollup(columns, by)
+        print(f"By {key}")
+        print(format_table(report['rollups'][key]))
+        print()
+
+    print("Velocity (completed Story Points per sprint)")
+    print(format_table(report['velocity']))
+    print()
+    print("Burndown (remaining sprint-planned Story Points)")
+    print(format_table(report['burndown']))
+
+    if args.json_file:
+        with open(args.json_file, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print()
+        print(f"Wrote report to {args.json_file}")
+
+if __name__ == '__main__':
+    run_main(main)
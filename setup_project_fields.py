@@ -9,6 +9,9 @@ import os
 import sys
 import subprocess
 
+from github_api import run_graphql
+from profiling import run_main
+
 def get_auth_token():
     """Get GitHub token from MCP or environment."""
     # Try to get token from gh CLI
@@ -24,18 +27,7 @@ def get_auth_token():
 
 def make_graphql_request(query, token):
     """Make GraphQL request using gh CLI."""
-    try:
-        result = subprocess.run(
-            ['gh', 'api', 'graphql', '-f', f'query={query}'],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return json.loads(result.stdout)
-    except subprocess.CalledProcessError as e:
-        return {'errors': [{'message': e.stderr}]}
-    except json.JSONDecodeError:
-        return {'errors': [{'message': 'Invalid JSON response'}]}
+    return run_graphql(query)
 
 def get_project_id(owner, project_number):
     """Get project ID."""
@@ -185,9 +177,10 @@ def create_field(project_id, field_config):
         return True
     return False
 
-def main():
-    owner = sys.argv[1] if len(sys.argv) > 1 else 'bromso'
-    project_number = sys.argv[2] if len(sys.argv) > 2 else '17'
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    owner = argv[0] if len(argv) > 0 else 'bromso'
+    project_number = argv[1] if len(argv) > 1 else '17'
     
     # Load config
     config_file = 'project_config.json'
@@ -224,5 +217,5 @@ def main():
     print("All custom fields are now available in your project!")
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Assign backlog items to upcoming Sprint iterations.
+Takes the Icebox and Next Sprint items without a Sprint from a snapshot,
+orders them by Priority and Risk (riskier work first) while keeping every
+item behind the open items it Depends On, and packs them first-fit into the
+upcoming iterations against a Story Points capacity per sprint. Points of
+items already planned into a sprint count against its capacity. The Sprint
+field is then written in batched mutations.
+Usage: python3 sprint_planner.py [owner] [project_number] [--capacity N] [--snapshot FILE] [--dry-run]
+"""
+
+import argparse
+import heapq
+import sys
+from datetime import date, timedelta
+
+from dependency_graph import DependencyGraph
+from github_api import field_value_mutation, run_mutations
+from profiling import run_main, span
+from project_snapshot import item_field_values, item_is_open, load_or_fetch_snapshot
+
+SPRINT_FIELD = 'Sprint'
+POINTS_FIELD = 'Story Points'
+BACKLOG_STATUSES = ['Icebox', 'Next Sprint']
+DEFAULT_CAPACITY = 40
+RANK = {'High': 0, 'Medium': 1, 'Low': 2}
+
+def item_iteration_id(item):
+    """The iteration ID of an item's Sprint, or None."""
+    for fv in (item.get('fieldValues') or {}).get('nodes', []):
+        if (fv.get('field') or {}).get('name') == SPRINT_FIELD and fv.get('iterationId'):
+            return fv['iterationId']
+    return None
+
+def upcoming_iterations(sprint_field, today=None):
+    """Iterations that have not ended yet, in start order."""
+    today = today or date.today()
+    upcoming = []
+    for iteration in sprint_field.get('iterations') or []:
+        start = date.fromisoformat(iteration['startDate'])
+        if start + timedelta(days=iteration.get('duration') or 14) > today:
+            upcoming.append(iteration)
+    return sorted(upcoming, key=lambda iteration: iteration['startDate'])
+
+def plan_order(candidates, graph):
+    """Candidates in planning order.
+
+    A priority-aware topological sort: among the items whose blocking
+    candidates are already ordered, the one with the highest Priority comes
+    next, then the highest Risk, then the lowest issue number. Edges that
+    close a dependency cycle are ignored.
+    """
+    by_number = {candidate['number']: candidate for candidate in candidates}
+    waiting = {}
+    for number in by_number:
+        waiting[number] = sum(1 for blocker in graph.blockers.get(number, ())
+                              if blocker in by_number and (blocker, number) not in graph.cyclic)
+
+    ready = [candidate['sort_key'] for number, candidate in by_number.items() if not waiting[number]]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        number = heapq.heappop(ready)[-1]
+        order.append(by_number[number])
+        for dependent in graph.dependents.get(number, ()):
+            if dependent in waiting and (number, dependent) not in graph.cyclic:
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    heapq.heappush(ready, by_number[dependent]['sort_key'])
+    return order
+
+def assign(order, remaining, capacity, graph, planned):
+    """Pack ordered candidates first-fit into iterations.
+
+    `remaining` is the free capacity per iteration and `planned` maps issue
+    numbers already in a sprint to its index; both are updated. An item goes
+    into the first iteration, no earlier than any of its open blockers', with
+    room for its points. An open blocker that is not planned (left out of
+    the backlog, unestimated or without room) keeps it out of the plan.
+    Returns (assignments, unplaced), where unplaced holds (candidate, reason).
+    """
+    assignments = []
+    unplaced = []
+    for candidate in order:
+        number = candidate['number']
+        earliest = 0
+        blocked_by = None
+        for blocker in graph.blockers.get(number, ()):
+            if (blocker, number) in graph.cyclic or not graph.open.get(blocker):
+                continue
+            if blocker in planned:
+                earliest = max(earliest, planned[blocker])
+            else:
+                blocked_by = blocker
+        if blocked_by is not None:
+            unplaced.append((candidate, f'blocked by #{blocked_by}, which is not planned'))
+            continue
+
+        points = candidate['points']
+        slot = next((i for i in range(earliest, len(remaining)) if remaining[i] >= points), None)
+        if slot is None:
+            unplaced.append((candidate, 'larger than a sprint' if points > capacity else 'no sprint has room'))
+            continue
+        remaining[slot] -= points
+        planned[number] = slot
+        assignments.append((candidate, slot))
+    return assignments, unplaced
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Assign backlog items to upcoming Sprint iterations.')
+    parser.add_argument('owner', nargs='?', default='bromso')
+    parser.add_argument('project_number', nargs='?', default='17')
+    parser.add_argument('--capacity', type=float, default=DEFAULT_CAPACITY, help='Story Points per sprint')
+    parser.add_argument('--sprints', type=int, help='plan at most this many upcoming sprints')
+    parser.add_argument('--default-points', type=float,
+                        help='points for items without Story Points (default: leave them unplanned)')
+    parser.add_argument('--snapshot', help='read items from a saved snapshot instead of the API')
+    parser.add_argument('--dry-run', action='store_true', help='report the plan without writing it')
+    args = parser.parse_args(argv)
+
+    snapshot = load_or_fetch_snapshot(args.owner, args.project_number, args.snapshot)
+    if snapshot is None:
+        sys.exit(1)
+
+    sprint_field = snapshot['fields'].get(SPRINT_FIELD)
+    if not sprint_field or sprint_field.get('dataType') != 'ITERATION':
+        print(f"Could not find the '{SPRINT_FIELD}' iteration field")
+        sys.exit(1)
+    iterations = upcoming_iterations(sprint_field)[:args.sprints]
+    if not iterations:
+        print(f"The '{SPRINT_FIELD}' field has no upcoming iterations")
+        sys.exit(1)
+    index_of = {iteration['id']: i for i, iteration in enumerate(iterations)}
+
+    items = snapshot['items']
+    graph = DependencyGraph.from_items(items)
+    remaining = [args.capacity] * len(iterations)
+    planned = {}
+    candidates = {}
+    unestimated = []
+
+    with span('index'):
+        for item in items:
+            content = item.get('content') or {}
+            number = content.get('number')
+            values = item_field_values(item)
+            points = values.get(POINTS_FIELD)
+            iteration_id = item_iteration_id(item)
+            if iteration_id is not None:
+                # Already planned: it takes up room in its sprint
+                if iteration_id in index_of and number is not None:
+                    planned[number] = index_of[iteration_id]
+                if iteration_id in index_of and item_is_open(item):
+                    remaining[index_of[iteration_id]] -= points or 0
+                continue
+            if number is None or values.get('Status') not in BACKLOG_STATUSES or not item_is_open(item):
+                continue
+            if points is None:
+                if args.default_points is None:
+                    unestimated.append(item)
+                    continue
+                points = args.default_points
+            candidates[number] = {
+                'number': number,
+                'item': item,
+                'points': points,
+                'sort_key': (RANK.get(values.get('Priority'), len(RANK)), RANK.get(values.get('Risk'), len(RANK)), number),
+            }
+
+    with span('diff'):
+        order = plan_order(list(candidates.values()), graph)
+        assignments, unplaced = assign(order, remaining, args.capacity, graph, planned)
+
+    print(f"Planning {len(candidates)} backlog items into {len(iterations)} sprints of {args.capacity:g} points")
+    for cycle in graph.find_cycles():
+        print(f"⚠ Dependency cycle (ignored for ordering): {' → '.join(f'#{n}' for n in cycle)}")
+    print()
+
+    by_sprint = {}
+    for candidate, slot in assignments:
+        by_sprint.setdefault(slot, []).append(candidate)
+    for slot, iteration in enumerate(iterations):
+        used = args.capacity - remaining[slot]
+        print(f"{iteration['title']} ({iteration['startDate']}): {used:g}/{args.capacity:g} points")
+        for candidate in by_sprint.get(slot, []):
+            values = item_field_values(candidate['item'])
+            print(f"  + #{candidate['number']} {candidate['item']['content'].get('title', '')} "
+                  f"({candidate['points']:g} pts, Priority {values.get('Priority', '-')}, Risk {values.get('Risk', '-')})")
+
+    if unplaced or unestimated:
+        print()
+        print(f"Not planned: {len(unplaced) + len(unestimated)} items")
+        for candidate, reason in unplaced:
+            print(f"  - #{candidate['number']} {candidate['item']['content'].get('title', '')}: {reason}")
+        for item in unestimated:
+            print(f"  - #{item['content'].get('number')} {item['content'].get('title', '')}: no {POINTS_FIELD}")
+
+    mutations = [
+        field_value_mutation(snapshot['project_id'], candidate['item']['id'], sprint_field['id'],
+                             {'iterationId': iterations[slot]['id']})
+        for candidate, slot in assignments
+    ]
+
+    if args.dry_run:
+        print()
+        print(f"Dry run: {len(mutations)} items would be assigned a {SPRINT_FIELD}.")
+        return
+
+    results = run_mutations(mutations)
+    print()
+    print(f"Done! Assigned {sum(1 for r in results if r)}/{len(mutations)} items to sprints.")
+
+if __name__ == '__main__':
+    run_main(main)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Pool of GitHub credentials for spreading API requests over several rate limits.
+Each request is scheduled onto the token with the most remaining budget, as
+last reported by GitHub's X-RateLimit-* headers. Per-token limiter state is
+persisted in the local cache (keyed by a token fingerprint, never the token
+itself) so a new run starts from what the previous run saw. Mutations can be
+pinned to one token so changes are authored by a known account.
+
+Configure with environment variables:
+  GITHUB_TOKENS="alice=ghp_...,bot=ghs_..."   (labels are optional)
+  GITHUB_MUTATION_TOKEN=alice                  (pin mutations to a label)
+A GitHub App installation (GITHUB_APP_*, see github_app_auth.py) joins the
+pool as the "app" token and is refreshed automatically before it expires.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+
+from github_api import cache_path
+from github_app_auth import InstallationToken
+
+STATE_FILE = 'token_state.json'
+DEFAULT_LIMIT = 5000
+
+def token_fingerprint(token):
+    """Short stable ID for a token, safe to write to disk."""
+    if callable(token):
+        return token.fingerprint
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()[:16]
+
+def parse_tokens(value):
+    """Parse "label=token,token2" into {label: token}."""
+    tokens = {}
+    for i, entry in enumerate(part.strip() for part in (value or '').split(',')):
+        if not entry:
+            continue
+        label, sep, token = entry.partition('=')
+        if not sep:
+            label, token = f'token{i + 1}', entry
+        tokens[label.strip()] = token.strip()
+    return tokens
+
+class TokenPool:
+    """Schedules requests onto the credential with the most remaining budget."""
+
+    def __init__(self, tokens, mutation_label=None, state_file=None):
+        if not tokens:
+            raise ValueError('TokenPool needs at least one token')
+        if mutation_label and mutation_label not in tokens:
+            raise ValueError(f"Unknown mutation token label: {mutation_label}")
+
+        self.tokens = dict(tokens)
+        self.mutation_label = mutation_label
+        self.state_file = state_file or cache_path(STATE_FILE)
+        self.lock = threading.Lock()
+        self.state = {label: {'limit': DEFAULT_LIMIT, 'remaining': DEFAULT_LIMIT, 'reset': 0}
+                      for label in self.tokens}
+        self.load()
+
+    @classmethod
+    def from_env(cls):
+        """Build a pool from GITHUB_TOKENS and GITHUB_APP_*, or None if neither is set."""
+        tokens = parse_tokens(os.getenv('GITHUB_TOKENS'))
+        app_token = InstallationToken.from_env()
+        if app_token:
+            tokens['app'] = app_token
+        if not tokens:
+            return None
+        pool = cls(tokens, os.getenv('GITHUB_MUTATION_TOKEN') or None)
+        atexit.register(pool.save)
+        return pool
+
+    def add_token(self, label, token):
+        """Add or replace a credential: a token string, or a callable returning one."""
+        with self.lock:
+            self.tokens[label] = token
+            self.state.setdefault(label, {'limit': DEFAULT_LIMIT, 'remaining': DEFAULT_LIMIT, 'reset': 0})
+
+    def _estimated_remaining(self, label, now):
+        state = self.state[label]
+        if state['reset'] and now >= state['reset']:
+            return state['limit']
+        if not state['reset'] and state['remaining'] <= 0:
+            # Only our own counting got here (no response has reported a
+            # window), so nothing will ever reset it: treat it as unknown
+            return state['limit']
+        return state['remaining']
+
+    def acquire(self, mutation=False):
+        """Pick a token for the next request. Returns (label, token).
+
+        Mutations go to the pinned token when one is configured. When every
+        token is exhausted, waits for the earliest reset.
+        """
+        while True:
+            with self.lock:
+                now = time.time()
+                if mutation and self.mutation_label:
+                    candidates = [self.mutation_label]
+                else:
+                    candidates = list(self.tokens)
+                label = max(candidates, key=lambda l: self._estimated_remaining(l, now))
+                remaining = self._estimated_remaining(label, now)
+                if remaining > 0:
+                    state = self.state[label]
+                    if state['reset'] and now >= state['reset']:
+                        state['reset'] = 0
+                    # Count the request now so concurrent callers spread out
+                    state['remaining'] = remaining - 1
+                    token = self.tokens[label]
+                    break
+                wait = min(self.state[l]['reset'] for l in candidates) - now
+            time.sleep(max(1.0, wait))
+        if not callable(token):
+            return label, token
+        # Token providers may refresh over the network, so call them unlocked
+        try:
+            return label, token()
+        except Exception:
+            self.release(label)
+            raise
+
+    def release(self, label):
+        """Give back the request acquire() counted when it got no response."""
+        with self.lock:
+            state = self.state.get(label)
+            if state is not None:
+                state['remaining'] = min(state['limit'], state['remaining'] + 1)
+
+    def record(self, label, headers, status=200):
+        """Update a token's limiter state from a response."""
+        with self.lock:
+            state = self.state.get(label)
+            if state is None:
+                return
+            if headers.get('X-RateLimit-Remaining') is not None:
+                state['remaining'] = int(headers['X-RateLimit-Remaining'])
+            if headers.get('X-RateLimit-Limit') is not None:
+                state['limit'] = int(headers['X-RateLimit-Limit'])
+            if headers.get('X-RateLimit-Reset') is not None:
+                state['reset'] = int(headers['X-RateLimit-Reset'])
+            if status in (403, 429) and headers.get('Retry-After'):
+                state['remaining'] = 0
+                state['reset'] = time.time() + int(headers['Retry-After'])
+
+    def load(self):
+        """Restore limiter state saved by a previous run."""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r') as f:
+                saved = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        for label, token in self.tokens.items():
+            if token_fingerprint(token) in saved:
+                self.state[label].update(saved[token_fingerprint(token)])
+
+    def save(self):
+        """Persist limiter state, merged with state saved by other runs."""
+        saved = {}
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r') as f:
+                    saved = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                saved = {}
+        with self.lock:
+            for label, token in self.tokens.items():
+                saved[token_fingerprint(token)] = dict(self.state[label])
+        temp_file = f'{self.state_file}.{os.getpid()}.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(saved, f)
+        os.replace(temp_file, self.state_file)
@@ -2,131 +2,84 @@
 """
 Update issue fields in GitHub project from issues.jsonl data.
 Updates: OKR, Story Points, Start Date, Due Date, and attempts Parent issue linking.
+The issues file may be gzip or zstd compressed, or `-` to read from stdin.
 """
 
-import json
+import queue
 import sys
-import subprocess
-import time
+import threading
 import re
 
-def get_project_id(owner, project_number):
-    """Get project ID."""
-    query = f'''{{
-      user(login: "{owner}") {{
-        projectV2(number: {project_number}) {{
-          id
-          title
-        }}
-      }}
-    }}'''
-    
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={query}'],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode != 0:
-        return None, None
-    
-    data = json.loads(result.stdout)
-    project = data.get('data', {}).get('user', {}).get('projectV2', {})
-    return project.get('id'), project.get('title')
+from github_api import (
+    MUTATION_BATCH_SIZE, field_value_mutation, get_project_id, run_graphql, run_mutations
+)
+from issue_import import read_issues
+from issue_validation import (
+    build_schema, compile_validators, load_config_fields, parse_error_collector, parse_number, print_report,
+    validate_records
+)
+from item_paginator import ItemScan, fetch_project_items, prefetch, require_complete
+from profiling import run_main, span
 
-def get_project_items_with_fields(project_id):
-    """Get all items from a project with their field values."""
-    all_items = []
-    cursor = None
-    
-    while True:
-        query = f'''{{
-          node(id: "{project_id}") {{
-            ... on ProjectV2 {{
-              items(first: 100{f', after: "{cursor}"' if cursor else ''}) {{
-                nodes {{
+ITEM_FIELDS = '''
                   id
-                  content {{
-                    ... on Issue {{
+                  content {
+                    ... on Issue {
                       id
                       number
                       title
-                    }}
-                    ... on DraftIssue {{
+                    }
+                    ... on DraftIssue {
                       id
                       title
-                    }}
-                  }}
-                  fieldValues(first: 100) {{
-                    nodes {{
-                      ... on ProjectV2ItemFieldTextValue {{
-                        field {{
-                          ... on ProjectV2Field {{
+                    }
+                  }
+                  fieldValues(first: 100) {
+                    nodes {
+                      ... on ProjectV2ItemFieldTextValue {
+                        field {
+                          ... on ProjectV2Field {
                             id
                             name
-                          }}
-                        }}
+                          }
+                        }
                         text
-                      }}
-                      ... on ProjectV2ItemFieldSingleSelectValue {{
-                        field {{
-                          ... on ProjectV2SingleSelectField {{
+                      }
+                      ... on ProjectV2ItemFieldSingleSelectValue {
+                        field {
+                          ... on ProjectV2SingleSelectField {
                             id
                             name
-                          }}
-                        }}
+                          }
+                        }
                         name
-                      }}
-                      ... on ProjectV2ItemFieldNumberValue {{
-                        field {{
-                          ... on ProjectV2Field {{
+                      }
+                      ... on ProjectV2ItemFieldNumberValue {
+                        field {
+                          ... on ProjectV2Field {
                             id
                             name
-                          }}
-                        }}
+                          }
+                        }
                         number
-                      }}
-                      ... on ProjectV2ItemFieldDateValue {{
-                        field {{
-                          ... on ProjectV2Field {{
+                      }
+                      ... on ProjectV2ItemFieldDateValue {
+                        field {
+                          ... on ProjectV2Field {
                             id
                             name
-                          }}
-                        }}
+                          }
+                        }
                         date
-                      }}
-                    }}
-                  }}
-                }}
-                pageInfo {{
-                  hasNextPage
-                  endCursor
-                }}
-              }}
-            }}
-          }}
-        }}'''
-        
-        result = subprocess.run(
-            ['gh', 'api', 'graphql', '-f', f'query={query}'],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            break
-        
-        data = json.loads(result.stdout)
-        items = data.get('data', {}).get('node', {}).get('items', {}).get('nodes', [])
-        all_items.extend(items)
-        
-        page_info = data.get('data', {}).get('node', {}).get('items', {}).get('pageInfo', {})
-        if not page_info.get('hasNextPage'):
-            break
-        
-        cursor = page_info.get('endCursor')
-    
-    return all_items
+                      }
+                    }
+                  }'''
+
+def get_project_items_with_fields(project_id):
+    """Get all items from a project with their field values."""
+    items = fetch_project_items(project_id, ITEM_FIELDS)
+    require_complete(items)
+    return items
 
 def get_field_ids(project_id):
     """Get all field IDs from project."""
@@ -156,16 +109,11 @@ def get_field_ids(project_id):
       }}
     }}'''
     
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={query}'],
-        capture_output=True,
-        text=True
-    )
+    data = run_graphql(query)
     
-    if result.returncode != 0:
+    if data.get('errors'):
         return {}
     
-    data = json.loads(result.stdout)
     fields = data.get('data', {}).get('node', {}).get('fields', {}).get('nodes', [])
     
     field_ids = {}
@@ -177,73 +125,124 @@ def get_field_ids(project_id):
     
     return field_ids
 
-def update_field_value(project_id, item_id, field_id, field_type, value):
-    """Update a field value."""
-    if value is None or value == "":
-        return True  # Skip empty values
-    
-    # Build mutation based on field type
+def field_value_input(field_type, value):
+    """ProjectV2FieldValue input for a value of the given field type, or None."""
     if field_type == 'TEXT':
-        mutation = f'''mutation {{
-          updateProjectV2ItemFieldValue(input: {{
-            projectId: "{project_id}"
-            itemId: "{item_id}"
-            fieldId: "{field_id}"
-            value: {{
-              text: "{value}"
-            }}
-          }}) {{
-            projectV2Item {{
-              id
-            }}
-          }}
-        }}'''
-    elif field_type == 'NUMBER':
-        mutation = f'''mutation {{
-          updateProjectV2ItemFieldValue(input: {{
-            projectId: "{project_id}"
-            itemId: "{item_id}"
-            fieldId: "{field_id}"
-            value: {{
-              number: {value}
-            }}
-          }}) {{
-            projectV2Item {{
-              id
-            }}
-          }}
-        }}'''
-    elif field_type == 'DATE':
-        mutation = f'''mutation {{
-          updateProjectV2ItemFieldValue(input: {{
-            projectId: "{project_id}"
-            itemId: "{item_id}"
-            fieldId: "{field_id}"
-            value: {{
-              date: "{value}"
-            }}
-          }}) {{
-            projectV2Item {{
-              id
-            }}
-          }}
-        }}'''
-    else:
-        return False
-    
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={mutation}'],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode == 0:
-        data = json.loads(result.stdout)
-        if data.get('errors'):
-            return False
-        return True
-    
-    return False
+        return {'text': str(value)}
+    if field_type == 'NUMBER':
+        return {'number': value}
+    if field_type == 'DATE':
+        return {'date': value}
+    return None
+
+def issue_field_updates(issue_data, field_ids):
+    """Fields to set from an issues.jsonl record: [(field name, value)]."""
+    updates = []
+    
+    # OKR (if present in data)
+    okr = issue_data.get('okr') or issue_data.get('OKR')
+    if okr and okr != "" and 'OKR' in field_ids:
+        updates.append(('OKR', str(okr)))
+    
+    # Story Points (if present in data, or use estimate as fallback)
+    story_points = issue_data.get('story_points') or issue_data.get('Story Points')
+    if story_points is None:
+        story_points = issue_data.get('estimate')
+    if story_points is not None and 'Story Points' in field_ids:
+        updates.append(('Story Points', parse_number(story_points)))
+    
+    # Start Date
+    start_date = issue_data.get('start_date') or issue_data.get('Start Date')
+    if start_date and 'Start Date' in field_ids:
+        updates.append(('Start Date', start_date))
+    
+    # Due Date (if present in data)
+    due_date = issue_data.get('due_date') or issue_data.get('Due Date')
+    if due_date and due_date != "" and 'Due Date' in field_ids:
+        updates.append(('Due Date', due_date))
+    
+    return updates
+
+class FieldWriter:
+    """Writes field updates on a background thread as they are queued.
+
+    Queued issues are sent in aliased mutation batches as soon as they
+    arrive, so writing starts while later pages are still being fetched.
+    """
+
+    def __init__(self, project_id, field_ids):
+        self.project_id = project_id
+        self.field_ids = field_ids
+        self.queue = queue.Queue()
+        self.updated_count = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, item_id, title, updates, epic_link=None):
+        self.queue.put((item_id, title, updates, epic_link))
+
+    def close(self):
+        """Wait for every queued update to be written."""
+        self.queue.put(None)
+        self.thread.join()
+
+    def _next_batch(self):
+        """Block for one queued issue, then take more while they fit in a batch."""
+        entry = self.queue.get()
+        if entry is None:
+            return None, True
+        batch = [entry]
+        size = len(entry[2])
+        while size < MUTATION_BATCH_SIZE:
+            try:
+                entry = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                return batch, True
+            batch.append(entry)
+            size += len(entry[2])
+        return batch, False
+
+    def _write(self, batch):
+        mutations = []
+        for item_id, title, updates, _ in batch:
+            for name, value in updates:
+                field = self.field_ids[name]
+                value_input = field_value_input(field['dataType'], value)
+                if value_input is not None:
+                    mutations.append(field_value_mutation(self.project_id, item_id, field['id'], value_input))
+        results = iter(run_mutations(mutations))
+
+        for item_id, title, updates, epic_link in batch:
+            print(f"Updating: {title}")
+            updates_made = False
+            for name, value in updates:
+                field = self.field_ids[name]
+                ok = field_value_input(field['dataType'], value) is not None and next(results) is not None
+                if ok:
+                    print(f"  ✓ {name}: {value}")
+                    updates_made = True
+                else:
+                    print(f"  ✗ Failed to update {name}")
+            
+            # Note about Parent issue: Epics are in project #18, Parent issue linking must be done manually
+            if epic_link:
+                print(f"  ℹ Parent Epic: {epic_link}")
+                print("    Note: Parent issue field must be set manually in GitHub UI")
+                print("    Epic is in project #18 and needs to be linked manually")
+            
+            if updates_made:
+                self.updated_count += 1
+            print()
+
+    def _run(self):
+        while True:
+            batch, closed = self._next_batch()
+            if batch:
+                self._write(batch)
+            if closed:
+                return
 
 def find_epic_item_id(project_id, epic_title):
     """Find epic's project item ID by title."""
@@ -290,33 +289,29 @@ def update_parent_issue_field(project_id, item_id, parent_field_id, epic_issue_n
       }}
     }}'''
     
-    result = subprocess.run(
-        ['gh', 'api', 'graphql', '-f', f'query={mutation}'],
-        capture_output=True,
-        text=True
-    )
+    run_graphql(mutation)
     
     # This will likely fail, but we'll note it for manual linking
     return False  # API doesn't support this yet
 
-def main():
-    owner = sys.argv[1] if len(sys.argv) > 1 else 'bromso'
-    project_number = sys.argv[2] if len(sys.argv) > 2 else '17'
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    owner = argv[0] if len(argv) > 0 else 'bromso'
+    project_number = argv[1] if len(argv) > 1 else '17'
+    issues_file = argv[2] if len(argv) > 2 else 'issues.jsonl'
     
     print(f"Updating issue fields in project #{project_number} for {owner}...")
     print()
     
     # Load issues data
-    issues_file = 'issues.jsonl'
     issues_data = {}
     
-    with open(issues_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                issue = json.loads(line)
-                title = issue.get('title', '')
-                issues_data[title] = issue
+    # Unreadable lines are reported with the validation errors below
+    parse_errors = []
+    records = list(read_issues(issues_file, on_error=parse_error_collector(parse_errors)))
+    for issue in records:
+        if isinstance(issue, dict):
+            issues_data[issue.get('title', '')] = issue
     
     print(f"Loaded {len(issues_data)} issues from {issues_file}")
     print()
@@ -340,110 +335,67 @@ def main():
         print(f"⚠ Warning: Missing fields: {', '.join(missing_fields)}")
         print("Available fields:", ', '.join(field_ids.keys()))
     
+    # Check every record against the schema before anything is written
+    errors, duplicates, ignored = validate_records(
+        records, compile_validators(build_schema(load_config_fields(), field_ids)), parse_errors)
+    if errors:
+        print()
+        print_report(errors, duplicates, ignored, issues_file)
+        sys.exit(1)
+    
     print()
     
     # Note: Epics are in project #18, not #17. Parent issue field will need manual linking.
     
-    # Get all project items
-    print("Fetching project items...")
-    items = get_project_items_with_fields(project_id)
-    print(f"Found {len(items)} items in project")
+    # Fetch pages in the background and queue updates for each page as it
+    # arrives, so fetching, matching and writing overlap
+    print("Fetching project items and updating fields...")
     print()
-    
-    # Update fields for each matching issue
-    updated_count = 0
+    writer = FieldWriter(project_id, field_ids)
+    scan = ItemScan(project_id, ITEM_FIELDS)
     parent_manual_count = 0
+    duplicate_count = 0
     seen_titles = set()
     
-    for item in items:
-        content = item.get('content', {})
-        if not content:
-            continue
-        
-        title = content.get('title', '')
-        item_id = item.get('id')
-        
-        # Skip EPIC items - they should not be in project #17
-        if 'EPIC:' in title.upper():
-            continue
-        
-        if title not in issues_data:
-            continue
-        
-        # Skip duplicates
-        if title in seen_titles:
-            continue
-        seen_titles.add(title)
-        
-        issue_data = issues_data[title]
-        print(f"Updating: {title}")
-        
-        updates_made = False
-        
-        # Update OKR (if present in data)
-        okr = issue_data.get('okr') or issue_data.get('OKR')
-        if okr and okr != "" and 'OKR' in field_ids:
-            field_id = field_ids['OKR']['id']
-            field_type = field_ids['OKR']['dataType']
-            if update_field_value(project_id, item_id, field_id, field_type, str(okr)):
-                print(f"  ✓ OKR: {okr}")
-                updates_made = True
-            else:
-                print(f"  ✗ Failed to update OKR")
-        
-        # Update Story Points (if present in data, or use estimate as fallback)
-        story_points = issue_data.get('story_points') or issue_data.get('Story Points')
-        if story_points is None:
-            # Try estimate as fallback
-            story_points = issue_data.get('estimate')
-        if story_points is not None and 'Story Points' in field_ids:
-            field_id = field_ids['Story Points']['id']
-            field_type = field_ids['Story Points']['dataType']
-            if update_field_value(project_id, item_id, field_id, field_type, int(story_points)):
-                print(f"  ✓ Story Points: {story_points}")
-                updates_made = True
-            else:
-                print(f"  ✗ Failed to update Story Points")
-        
-        # Update Start Date
-        start_date = issue_data.get('start_date') or issue_data.get('Start Date')
-        if start_date and 'Start Date' in field_ids:
-            field_id = field_ids['Start Date']['id']
-            field_type = field_ids['Start Date']['dataType']
-            if update_field_value(project_id, item_id, field_id, field_type, start_date):
-                print(f"  ✓ Start Date: {start_date}")
-                updates_made = True
-            else:
-                print(f"  ✗ Failed to update Start Date")
-        
-        # Update Due Date (if present in data)
-        due_date = issue_data.get('due_date') or issue_data.get('Due Date')
-        if due_date and due_date != "" and 'Due Date' in field_ids:
-            field_id = field_ids['Due Date']['id']
-            field_type = field_ids['Due Date']['dataType']
-            if update_field_value(project_id, item_id, field_id, field_type, due_date):
-                print(f"  ✓ Due Date: {due_date}")
-                updates_made = True
-            else:
-                print(f"  ✗ Failed to update Due Date")
-        
-        # Note about Parent issue: Epics are in project #18, Parent issue linking must be done manually
-        epic_link = issue_data.get('epic_link') or issue_data.get('Epic Link')
-        if epic_link and 'Parent issue' in field_ids:
-            print(f"  ℹ Parent Epic: {epic_link}")
-            print(f"    Note: Parent issue field must be set manually in GitHub UI")
-            print(f"    Epic is in project #18 and needs to be linked manually")
-            parent_manual_count += 1
-        
-        if updates_made:
-            updated_count += 1
-        
-        time.sleep(0.2)  # Rate limiting
-        print()
-    
-    print(f"Done! Updated {updated_count} issues.")
+    for page in prefetch(scan):
+        with span('diff'):
+            for item in page:
+                content = item.get('content', {})
+                if not content:
+                    continue
+            
+                title = content.get('title', '')
+            
+                # Skip EPIC items - they should not be in project #17
+                if 'EPIC:' in title.upper():
+                    continue
+            
+                if title not in issues_data:
+                    continue
+            
+                # Skip duplicates
+                if title in seen_titles:
+                    duplicate_count += 1
+                    continue
+                seen_titles.add(title)
+            
+                issue_data = issues_data[title]
+                epic_link = issue_data.get('epic_link') or issue_data.get('Epic Link')
+                if not epic_link or 'Parent issue' not in field_ids:
+                    epic_link = None
+                else:
+                    parent_manual_count += 1
+            
+                writer.submit(item.get('id'), title, issue_field_updates(issue_data, field_ids), epic_link)
+    
+    writer.close()
+    print(f"Found {len(scan)} items in project")
+    print(f"Done! Updated {writer.updated_count} issues.")
     if parent_manual_count > 0:
         print(f"{parent_manual_count} issues need Parent issue field set manually in GitHub UI.")
+    if duplicate_count > 0:
+        print(f"⚠ Skipped {duplicate_count} items with a repeated title; run dedup_items.py to find and merge duplicates.")
+    require_complete(scan)
 
 if __name__ == '__main__':
-    main()
+    run_main(main)